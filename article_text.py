@@ -0,0 +1,166 @@
+"""
+Canonical text record for one article
+Computes cleaned and normalized text, tokens and hashes once per article
+and caches them, so the scraper, NLP processor and duplicate detection
+don't repeat the same regex passes
+"""
+
+import hashlib
+from typing import Dict, Optional
+from utils import clean_text
+
+# Crime keywords of the legacy keyword-set similarity hash
+SIMILARITY_KEYWORDS = frozenset({
+    'murder', 'robbery', 'assault', 'theft', 'burglary', 'shooting',
+    'stabbing', 'arrest', 'police', 'victim', 'suspect', 'charged',
+    'court', 'jail', 'prison', 'crime', 'criminal', 'felony'
+})
+
+class ArticleText:
+    """
+    Text of one article with lazily computed, cached derived forms
+
+    Built from the scraped headline and content. Exposes the stored forms
+    (`headline`, `full_text`), the NLP cache key and the duplicate
+    detection hashes, each computed on first use only. The hashes are
+    identical to generate_content_hash() and generate_similarity_hash()
+    applied to the stored headline and full_text.
+    """
+
+    __slots__ = (
+        'raw_headline', 'raw_content', '_headline', '_full_text', '_cache_key',
+        '_normalized_headline', '_normalized_full_text', '_tokens',
+        '_content_hashes', '_similarity_hash', '_signature'
+    )
+
+    def __init__(self, headline: Optional[str], content: Optional[str]):
+        self.raw_headline = headline or ''
+        self.raw_content = content or ''
+        self._headline: Optional[str] = None
+        self._full_text: Optional[str] = None
+        self._cache_key: Optional[str] = None
+        self._normalized_headline: Optional[str] = None
+        self._normalized_full_text: Optional[str] = None
+        self._tokens: Optional[frozenset] = None
+        self._content_hashes: Dict[str, str] = {}
+        self._similarity_hash: Optional[str] = None
+        self._signature = None
+
+    @classmethod
+    def for_article(cls, article: Dict) -> 'ArticleText':
+        """
+        Get the ArticleText attached to an article dictionary, creating it if needed
+
+        Args:
+            article (Dict): Scraped article with headline and content
+
+        Returns:
+            ArticleText: The article's text record (stored under 'article_text')
+        """
+        text = article.get('article_text')
+        if text is None:
+            text = cls(article.get('headline', ''), article.get('content', ''))
+            article['article_text'] = text
+        return text
+
+    @classmethod
+    def from_record(cls, headline: Optional[str], full_text: Optional[str]) -> 'ArticleText':
+        """
+        Build a text record for an already processed article
+
+        Args:
+            headline (str): Stored (cleaned) headline
+            full_text (str): Stored full text
+
+        Returns:
+            ArticleText: Record whose stored forms are the given values
+        """
+        text = cls(headline, full_text)
+        text._headline = headline or ''
+        text._full_text = full_text or ''
+        return text
+
+    @property
+    def headline(self) -> str:
+        """Cleaned headline, as stored"""
+        if self._headline is None:
+            self._headline = clean_text(self.raw_headline)
+        return self._headline
+
+    @property
+    def full_text(self) -> str:
+        """Cleaned headline and content, as stored and processed by NLP"""
+        if self._full_text is None:
+            self._full_text = clean_text(f"{self.raw_headline} {self.raw_content}")
+        return self._full_text
+
+    @property
+    def cache_key(self) -> str:
+        """NLP result cache key (case-sensitive hash of the cleaned headline and content)"""
+        if self._cache_key is None:
+            normalized = f"{clean_text(self.raw_headline).strip()}||{clean_text(self.raw_content).strip()}"
+            self._cache_key = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return self._cache_key
+
+    @property
+    def normalized_headline(self) -> str:
+        """Lowercased headline as hashed for duplicate detection"""
+        if self._normalized_headline is None:
+            self._normalized_headline = clean_text(self.headline).lower().strip()
+        return self._normalized_headline
+
+    @property
+    def normalized_full_text(self) -> str:
+        """Lowercased full text as hashed for duplicate detection"""
+        if self._normalized_full_text is None:
+            self._normalized_full_text = clean_text(self.full_text).lower().strip()
+        return self._normalized_full_text
+
+    @property
+    def tokens(self) -> frozenset:
+        """Distinct whitespace-separated words of the normalized headline and full text"""
+        if self._tokens is None:
+            self._tokens = frozenset(self.normalized_headline.split()) | frozenset(self.normalized_full_text.split())
+        return self._tokens
+
+    def content_hash(self, source: Optional[str] = None) -> str:
+        """
+        Get the SHA-256 content hash, optionally including the source
+
+        Args:
+            source (str, optional): Source website name
+
+        Returns:
+            str: Same value as generate_content_hash(headline, full_text, source)
+        """
+        key = source or ''
+        if key not in self._content_hashes:
+            if source:
+                content_string = f"{source}||{self.normalized_headline}||{self.normalized_full_text}"
+            else:
+                content_string = f"{self.normalized_headline}||{self.normalized_full_text}"
+            self._content_hashes[key] = hashlib.sha256(content_string.encode('utf-8')).hexdigest()
+        return self._content_hashes[key]
+
+    @property
+    def similarity_hash(self) -> str:
+        """Legacy keyword-set similarity hash (generate_similarity_hash)"""
+        if self._similarity_hash is None:
+            signature = '||'.join(sorted(self.tokens & SIMILARITY_KEYWORDS)[:10])
+            self._similarity_hash = hashlib.md5(signature.encode('utf-8')).hexdigest()
+        return self._similarity_hash
+
+    def signature(self, hasher):
+        """
+        Get the MinHash signature used for near-duplicate detection
+
+        Args:
+            hasher (MinHasher): Hasher of the near-duplicate index
+
+        Returns:
+            numpy.ndarray: Signature of the headline and full text shingles
+        """
+        if self._signature is None:
+            from near_duplicates import shingles
+            self._signature = hasher.signature(shingles(f"{self.headline} {self.full_text}"))
+        return self._signature
@@ -0,0 +1,456 @@
+"""
+Offline benchmarks for the Crime Data Scraper
+Times link and content extraction on stored HTML fixtures of the configured
+sources, NLP extraction, duplicate detection and statistics on a synthetic
+corpus, and compares the results with a saved baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+def _isolate() -> str:
+    """
+    Point the data and log directories at a temporary directory
+
+    Must run before any module that imports config, so benchmarks never
+    touch the real article store, indexes or log file.
+
+    Returns:
+        str: The temporary working directory
+    """
+    work_dir = tempfile.mkdtemp(prefix='crime_benchmark_')
+    os.environ['CRIME_SCRAPER_DATA_DIR'] = os.path.join(work_dir, 'data')
+    os.environ['CRIME_SCRAPER_LOGS_DIR'] = os.path.join(work_dir, 'logs')
+    return work_dir
+
+class _FixtureResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+class FixtureSession:
+    """
+    Stand-in for requests.Session that serves stored fixture pages
+    """
+
+    def __init__(self, pages: Dict[str, bytes]):
+        self.pages = pages
+        self.headers: Dict[str, str] = {}
+
+    def get(self, url: str, **kwargs) -> _FixtureResponse:
+        import requests
+        if url not in self.pages:
+            raise requests.exceptions.HTTPError(f"404 Not Found: {url}")
+        return _FixtureResponse(self.pages[url])
+
+def generate_fixtures(fixtures_dir: str, articles_per_source: int = 12) -> int:
+    """
+    Write hub and article page fixtures for every configured source
+
+    Args:
+        fixtures_dir (str): Output directory
+        articles_per_source (int): Crime articles linked from each hub page
+
+    Returns:
+        int: Number of sources written
+    """
+    from urllib.parse import urljoin
+    from config import NEWS_WEBSITES
+    from synthetic_news import generate_articles, hub_page_html, article_page_html, article_path, source_slug
+
+    articles = generate_articles(articles_per_source * len(NEWS_WEBSITES), seed=7, near_duplicate_rate=0)
+    manifest = []
+
+    for website_config in NEWS_WEBSITES:
+        own = [article for article in articles if article['source'] == website_config['name']]
+        own = own[:articles_per_source]
+        slug = source_slug(website_config['name'])
+        source_dir = os.path.join(fixtures_dir, slug)
+        os.makedirs(source_dir, exist_ok=True)
+
+        with open(os.path.join(source_dir, 'hub.html'), 'w', encoding='utf-8') as f:
+            f.write(hub_page_html(website_config, own))
+        with open(os.path.join(source_dir, 'article.html'), 'w', encoding='utf-8') as f:
+            f.write(article_page_html(website_config, own[0]))
+
+        manifest.append({
+            'name': website_config['name'],
+            'dir': slug,
+            'hub_url': website_config['url'],
+            'article_url': urljoin(website_config['url'], article_path(website_config, own[0])),
+            'links': len(own)
+        })
+
+    with open(os.path.join(fixtures_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return len(manifest)
+
+def load_fixtures(fixtures_dir: str) -> List[Dict]:
+    """
+    Load the fixture manifest with the page contents
+
+    Returns:
+        List[Dict]: Manifest entries with 'hub_html' and 'article_html' bytes
+    """
+    with open(os.path.join(fixtures_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    for entry in manifest:
+        for page in ('hub', 'article'):
+            with open(os.path.join(fixtures_dir, entry['dir'], f"{page}.html"), 'rb') as f:
+                entry[f"{page}_html"] = f.read()
+    return manifest
+
+def _measure(function: Callable, repeats: int, setup: Optional[Callable] = None) -> List[float]:
+    """
+    Time a function over several runs after one warm-up run
+
+    Args:
+        function (Callable): Code to time
+        repeats (int): Timed runs
+        setup (Callable, optional): Untimed preparation before every run
+
+    Returns:
+        List[float]: Seconds per timed run
+    """
+    timings = []
+    for run in range(repeats + 1):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if run > 0:
+            timings.append(elapsed)
+    return timings
+
+def _summary(timings: List[float], items: int) -> Dict:
+    median = statistics.median(timings)
+    return {
+        'items': items,
+        'repeats': len(timings),
+        'min_seconds': round(min(timings), 6),
+        'median_seconds': round(median, 6),
+        'mean_seconds': round(statistics.mean(timings), 6),
+        'per_item_ms': round(median / items * 1000, 4) if items else 0.0
+    }
+
+def processed_records(articles: List[Dict]) -> List[Dict]:
+    """
+    Build article rows as process_article() would store them, without spaCy
+
+    Args:
+        articles (List[Dict]): Articles from generate_articles()
+
+    Returns:
+        List[Dict]: Rows with headline, full_text, url, source and entity columns
+    """
+    from utils import clean_text
+
+    return [{
+        'date_scraped': f"{article['published']} 12:00:00",
+        'article_url': article['url'],
+        'headline': clean_text(article['headline']),
+        'publication_date': str(article['published']),
+        'who': article['who'],
+        'what': article['facts']['crime'],
+        'where': article['where'],
+        'full_text': clean_text(f"{article['headline']} {article['content']}"),
+        'source': article['source']
+    } for article in articles]
+
+def _reset_indexes():
+    from near_duplicates import get_near_duplicate_index
+    from story_clusters import get_story_cluster_index
+    get_near_duplicate_index().clear()
+    get_story_cluster_index().clear()
+
+def run_benchmarks(fixtures_dir: str, work_dir: str, corpus_size: int, repeats: int,
+                   selected: Optional[List[str]] = None) -> Dict:
+    """
+    Run the benchmarks
+
+    Args:
+        fixtures_dir (str): Directory with the HTML fixtures
+        work_dir (str): Temporary directory for stores created by benchmarks
+        corpus_size (int): Articles in the synthetic corpus
+        repeats (int): Timed runs per benchmark
+        selected (List[str], optional): Benchmark names to run (default all)
+
+    Returns:
+        Dict: Results per benchmark, with 'skipped' reasons where a
+            benchmark could not run
+    """
+    from config import NEWS_WEBSITES
+    from scraper import WebScraper
+    from synthetic_news import generate_articles
+    from utils import append_to_csv_with_dedup
+
+    results: Dict[str, Dict] = {}
+
+    def wanted(name: str) -> bool:
+        return not selected or name in selected
+
+    fixtures = load_fixtures(fixtures_dir)
+    pages = {}
+    for entry in fixtures:
+        pages[entry['hub_url']] = entry['hub_html']
+        pages[entry['article_url']] = entry['article_html']
+
+    scraper = WebScraper()
+    scraper.session = FixtureSession(pages)
+    configs = {website['name']: website for website in NEWS_WEBSITES}
+
+    if wanted('extract_article_links'):
+        def links():
+            for entry in fixtures:
+                scraper.extract_article_links(configs[entry['name']])
+        results['extract_article_links'] = _summary(_measure(links, repeats), len(fixtures))
+
+    if wanted('extract_article_content'):
+        def contents():
+            for entry in fixtures:
+                scraper.extract_article_content(entry['article_url'], configs[entry['name']])
+        results['extract_article_content'] = _summary(_measure(contents, repeats), len(fixtures))
+
+    corpus = generate_articles(corpus_size, seed=42)
+
+    if wanted('process_article') or wanted('process_multiple_articles'):
+        try:
+            from nlp_processor import CrimeNLPProcessor
+            processor = CrimeNLPProcessor(use_cache=False)
+        except Exception as e:
+            reason = f"NLP processor unavailable: {str(e)}"
+            for name in ('process_article', 'process_multiple_articles'):
+                if wanted(name):
+                    results[name] = {'skipped': reason}
+        else:
+            raw = [{key: article[key] for key in ('headline', 'content', 'url', 'source')} for article in corpus]
+            if wanted('process_article'):
+                def each():
+                    for article in raw:
+                        processor.process_article(dict(article))
+                results['process_article'] = _summary(_measure(each, repeats), len(raw))
+            if wanted('process_multiple_articles'):
+                results['process_multiple_articles'] = _summary(
+                    _measure(lambda: processor.process_multiple_articles([dict(a) for a in raw]), repeats),
+                    len(raw)
+                )
+
+    records = processed_records(corpus)
+
+    if wanted('append_to_csv_with_dedup'):
+        state = {'run': 0}
+
+        def fresh_store():
+            state['run'] += 1
+            state['path'] = os.path.join(work_dir, f"dedup_{state['run']}.csv")
+            _reset_indexes()
+
+        def append_all():
+            for record in records:
+                append_to_csv_with_dedup(dict(record), state['path'])
+
+        results['append_to_csv_with_dedup'] = _summary(
+            _measure(append_all, repeats, setup=fresh_store), len(records)
+        )
+
+    if wanted('get_statistics') or wanted('get_statistics_cold'):
+        from storage import get_article_store
+        from stats_rollup import get_stats_rollup
+        from main import CrimeDataScraper
+
+        # The configured store lives in the temporary data directory
+        get_article_store().append_many([dict(record) for record in records])
+        pipeline = CrimeDataScraper()
+
+        if wanted('get_statistics'):
+            pipeline.get_statistics()
+            results['get_statistics'] = _summary(_measure(pipeline.get_statistics, repeats), len(records))
+        if wanted('get_statistics_cold'):
+            def invalidate():
+                # Forces a rebuild from the store, as after an external change
+                get_stats_rollup().signature = None
+            results['get_statistics_cold'] = _summary(
+                _measure(pipeline.get_statistics, repeats, setup=invalidate), len(records)
+            )
+
+    return results
+
+def run_dedup_check(corpus_size: int = 200, exact_repeats: int = 20) -> Dict:
+    """
+    Check duplicate detection end to end on a synthetic corpus
+
+    Every article is saved once, then `exact_repeats` of them are saved again.
+    The repeats must be skipped, and generated rewrites should be flagged as
+    near-duplicates of another source.
+
+    Args:
+        corpus_size (int): Articles in the corpus
+        exact_repeats (int): Articles saved a second time
+
+    Returns:
+        Dict: Counts of saved, skipped and flagged articles and whether the check passed
+    """
+    from synthetic_news import generate_articles
+    from utils import append_to_csv_with_dedup
+
+    corpus = generate_articles(corpus_size, seed=3, near_duplicate_rate=0.15)
+    records = processed_records(corpus)
+    _reset_indexes()
+
+    saved = flagged_rewrites = false_flags = 0
+    for article, record in zip(corpus, records):
+        result = append_to_csv_with_dedup(dict(record))
+        if result['success']:
+            saved += 1
+        if result.get('duplicate_info'):
+            if article['duplicate_of'] is not None:
+                flagged_rewrites += 1
+            else:
+                false_flags += 1
+
+    skipped = sum(
+        1 for record in records[:exact_repeats]
+        if append_to_csv_with_dedup(dict(record)).get('skipped')
+    )
+    rewrites = sum(1 for article in corpus if article['duplicate_of'] is not None)
+
+    return {
+        'articles': len(corpus),
+        'saved': saved,
+        'exact_repeats': exact_repeats,
+        'exact_repeats_skipped': skipped,
+        'rewrites': rewrites,
+        'rewrites_flagged': flagged_rewrites,
+        'originals_flagged': false_flags,
+        'passed': skipped == exact_repeats and saved == len(corpus) and false_flags == 0
+    }
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[Dict]:
+    """
+    Compare benchmark medians with a baseline
+
+    Args:
+        results (Dict): Current results
+        baseline (Dict): Saved baseline results
+        tolerance (float): Allowed relative slowdown of the median
+
+    Returns:
+        List[Dict]: One row per benchmark present in both, with the change
+            and a 'regression' flag
+    """
+    rows = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if not before or 'median_seconds' not in current or 'median_seconds' not in before:
+            continue
+        # Compare per item, so runs with a different corpus size stay comparable
+        change = (current['per_item_ms'] - before['per_item_ms']) / before['per_item_ms'] if before['per_item_ms'] else 0.0
+        rows.append({
+            'name': name,
+            'baseline_ms': before['per_item_ms'],
+            'current_ms': current['per_item_ms'],
+            'change': change,
+            'regression': change > tolerance
+        })
+    return rows
+
+def main():
+    """
+    Run the benchmark suite from the command line
+    """
+    parser = argparse.ArgumentParser(description='Offline benchmarks for the Crime Data Scraper')
+    parser.add_argument('--generate-fixtures', action='store_true',
+                        help='Regenerate the HTML fixtures from the configured sources')
+    parser.add_argument('--only', nargs='+', metavar='NAME', help='Run only these benchmarks')
+    parser.add_argument('--corpus-size', type=int, help='Articles in the synthetic corpus')
+    parser.add_argument('--repeats', type=int, help='Timed runs per benchmark')
+    parser.add_argument('--output', type=str, help='Write the results as JSON')
+    parser.add_argument('--save-baseline', nargs='?', const='', metavar='PATH',
+                        help='Save the results as the baseline')
+    parser.add_argument('--compare', nargs='?', const='', metavar='PATH',
+                        help='Compare with the baseline; exits 1 on a regression')
+    parser.add_argument('--dedup-check', action='store_true',
+                        help='Check duplicate detection on a synthetic corpus instead of timing')
+    args = parser.parse_args()
+
+    work_dir = _isolate()
+    try:
+        from config import (
+            BENCHMARK_FIXTURES_DIR, BENCHMARK_BASELINE_PATH, BENCHMARK_CORPUS_SIZE,
+            BENCHMARK_REPEATS, BENCHMARK_REGRESSION_TOLERANCE
+        )
+        import logging
+        # Per-article INFO lines would dominate the console and the timings
+        logging.disable(logging.INFO)
+
+        if args.dedup_check:
+            report = run_dedup_check(args.corpus_size or BENCHMARK_CORPUS_SIZE)
+            for key, value in report.items():
+                print(f"{key}: {value}")
+            sys.exit(0 if report['passed'] else 1)
+
+        if args.generate_fixtures:
+            count = generate_fixtures(BENCHMARK_FIXTURES_DIR)
+            print(f"Wrote fixtures for {count} sources to {BENCHMARK_FIXTURES_DIR}")
+            return
+
+        corpus_size = args.corpus_size or BENCHMARK_CORPUS_SIZE
+        repeats = args.repeats or BENCHMARK_REPEATS
+        results = run_benchmarks(BENCHMARK_FIXTURES_DIR, work_dir, corpus_size, repeats, args.only)
+
+        print(f"{'Benchmark':<28} {'items':>6} {'median s':>10} {'per item ms':>12}")
+        for name, result in results.items():
+            if 'skipped' in result:
+                print(f"{name:<28} skipped: {result['skipped']}")
+            else:
+                print(f"{name:<28} {result['items']:>6} {result['median_seconds']:>10.4f} {result['per_item_ms']:>12.4f}")
+
+        report = {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpus_size': corpus_size,
+            'repeats': repeats,
+            'results': results
+        }
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+
+        if args.save_baseline is not None:
+            path = args.save_baseline or BENCHMARK_BASELINE_PATH
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            print(f"Baseline saved to {path}")
+
+        if args.compare is not None:
+            path = args.compare or BENCHMARK_BASELINE_PATH
+            with open(path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            rows = compare(results, baseline['results'], BENCHMARK_REGRESSION_TOLERANCE)
+
+            print(f"\nCompared with {path} ({baseline.get('created', 'unknown date')}):")
+            for row in rows:
+                flag = '  REGRESSION' if row['regression'] else ''
+                print(f"{row['name']:<28} {row['baseline_ms']:>10.4f} -> {row['current_ms']:>10.4f} ms/item "
+                      f"({row['change']:+.1%}){flag}")
+            if any(row['regression'] for row in rows):
+                sys.exit(1)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
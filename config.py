@@ -11,8 +11,11 @@ from verified_sources_config import VERIFIED_NEWS_WEBSITES
 
 # Base directory for the project
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-LOGS_DIR = os.path.join(BASE_DIR, "logs")
+
+# Data and log directories; the CRIME_SCRAPER_DATA_DIR and CRIME_SCRAPER_LOGS_DIR
+# environment variables override them (benchmark.py keeps its data separate this way)
+DATA_DIR = os.environ.get("CRIME_SCRAPER_DATA_DIR") or os.path.join(BASE_DIR, "data")
+LOGS_DIR = os.environ.get("CRIME_SCRAPER_LOGS_DIR") or os.path.join(BASE_DIR, "logs")
 
 # Create directories if they don't exist
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -21,9 +24,100 @@ os.makedirs(LOGS_DIR, exist_ok=True)
 # CSV file path
 CSV_FILE_PATH = os.path.join(DATA_DIR, "crime_articles.csv")
 
+# Storage backend: "csv" (CSV_FILE_PATH), "sqlite" (SQLITE_DB_PATH) or
+# "parquet" (PARQUET_DIR, requires pyarrow).
+# SQLite data can be exported with `python storage.py --export-csv <file>`.
+STORAGE_BACKEND = "csv"
+SQLITE_DB_PATH = os.path.join(DATA_DIR, "crime_articles.sqlite")
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
+# Statistics rollup, updated on each save and read by `main.py --mode stats`
+STATS_ROLLUP_PATH = os.path.join(DATA_DIR, "stats_rollup.json")
+# Rows per chunk when statistics are computed by streaming over a store
+STATS_CHUNK_SIZE = 5000
+# Crime types and locations kept by the rollup. Counts are exact up to
+# 2 * STATS_TOP_K distinct values; beyond that only the most frequent are kept.
+STATS_TOP_K = 500
+
+# Near-duplicate detection (MinHash LSH over word shingles). Articles whose
+# estimated Jaccard similarity reaches the threshold share a similarity_hash.
+NEAR_DUP_INDEX_PATH = os.path.join(DATA_DIR, "near_dup_index.sqlite")
+NEAR_DUP_THRESHOLD = 0.7
+NEAR_DUP_NUM_PERM = 128
+NEAR_DUP_SHINGLE_SIZE = 3
+
+# Cross-source story clustering: articles about the same incident share an
+# event_id. Candidates must share entities within the time window.
+STORY_CLUSTER_INDEX_PATH = os.path.join(DATA_DIR, "story_clusters.sqlite")
+STORY_CLUSTER_WINDOW_DAYS = 2
+STORY_CLUSTER_THRESHOLD = 0.35
+STORY_CLUSTER_MIN_SHARED_ENTITIES = 2
+STORY_CLUSTER_MAX_CANDIDATES = 200
+STORY_CLUSTER_CONTENT_WEIGHT = 0.4  # the rest is entity overlap
+
+# Hash backfill for legacy CSV rows (python migrate_hashes.py)
+HASH_MIGRATION_CHUNK_SIZE = 2000
+HASH_MIGRATION_WORKERS = 0  # 0 = one worker process per CPU
+
 # Log file path
 LOG_FILE_PATH = os.path.join(LOGS_DIR, "scraper.log")
 
+# Logging (set up once per process; file and console output are written by a
+# background thread). The log file rotates when it exceeds LOG_MAX_BYTES or
+# LOG_ROTATE_HOURS have passed, keeping LOG_BACKUP_COUNT old files.
+LOG_LEVEL = os.environ.get("CRIME_SCRAPER_LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_ROTATE_HOURS = 24  # 0 = rotate by size only
+LOG_BACKUP_COUNT = 14
+# One JSON object per line in the log file instead of plain text
+LOG_JSON = os.environ.get("CRIME_SCRAPER_LOG_JSON", "").lower() in ("1", "true", "yes")
+# Repetitive INFO/DEBUG lines (the same log statement, e.g. one per fetched
+# URL) are sampled: the first LOG_SAMPLE_BURST per LOG_SAMPLE_WINDOW seconds
+# are kept, then one in LOG_SAMPLE_EVERY, and a summary line reports how many
+# were dropped. Warnings and errors are never sampled. 0 = keep everything.
+LOG_SAMPLE_BURST = 20
+LOG_SAMPLE_WINDOW = 60
+LOG_SAMPLE_EVERY = 50
+
+# Run metrics: a JSON report per run, plus an optional Prometheus textfile
+# (e.g. in the node_exporter textfile collector directory; None = off)
+RUN_REPORT_DIR = os.path.join(LOGS_DIR, "runs")
+RUN_REPORT_KEEP = 500  # newest reports kept in RUN_REPORT_DIR
+METRICS_TEXTFILE_PATH = None
+METRICS_LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# Run journal for resumable full runs (python main.py --resume): progress and
+# fetched content of the current run. Unfinished runs older than
+# RUN_JOURNAL_RESUME_HOURS are not resumed; summaries of the last
+# RUN_JOURNAL_KEEP_RUNS finished runs are kept.
+RUN_JOURNAL_PATH = os.path.join(DATA_DIR, "run_journal.sqlite")
+RUN_JOURNAL_RESUME_HOURS = 24
+RUN_JOURNAL_KEEP_RUNS = 50
+
+# Run deadlines (python main.py --deadline SECONDS). Near the deadline no new
+# fetches are started: a fetch can take MAX_RETRIES * REQUEST_TIMEOUT plus
+# backoff, what is fetched still needs about DEADLINE_SECONDS_PER_ARTICLE of
+# NLP each, and DEADLINE_MARGIN_SECONDS stay free for saving and the report. Work left over stays in the run journal.
+RUN_DEADLINE_SECONDS = None  # default for main.py (None = no deadline)
+DEADLINE_MARGIN_SECONDS = 60
+DEADLINE_SECONDS_PER_ARTICLE = 0.5
+DEADLINE_YIELD_HISTORY_RUNS = 20  # run reports used to rank sources by yield
+# Exit status of main.py when a run stopped early at its deadline
+PARTIAL_RUN_EXIT_CODE = 3
+
+# Profiling (`python main.py --profile`): one directory per run under PROFILE_DIR
+PROFILE_DIR = os.path.join(LOGS_DIR, "profiles")
+PROFILE_SAMPLE_INTERVAL = 0.005  # seconds between stack samples for flame graphs
+PROFILE_TRACEMALLOC_FRAMES = 10
+PROFILE_TOP_N = 30  # functions and allocation sites listed per stage
+
+# Offline benchmarks (python benchmark.py)
+BENCHMARK_FIXTURES_DIR = os.path.join(BASE_DIR, "benchmarks", "fixtures")
+BENCHMARK_BASELINE_PATH = os.path.join(BASE_DIR, "benchmarks", "baseline.json")
+BENCHMARK_CORPUS_SIZE = 200
+BENCHMARK_REPEATS = 5
+BENCHMARK_REGRESSION_TOLERANCE = 0.2  # slowdown of the median that counts as a regression
+
 # Crime-related keywords for filtering articles
 CRIME_KEYWORDS = [
     # Violent crimes
@@ -64,17 +158,124 @@ CRIME_KEYWORDS = [
     "trial", "guilty", "plea", "warrant", "manhunt"
 ]
 
+# Crime keyword weights (0-1), used for headline priorities and the body
+# pre-filter. Strong terms name a specific crime; weak terms also appear in
+# stories that are not crime reports. CRIME_KEYWORDS not listed here get
+# CRIME_KEYWORD_DEFAULT_WEIGHT.
+CRIME_KEYWORD_DEFAULT_WEIGHT = 0.4
+CRIME_KEYWORD_WEIGHTS = {
+    "murder": 1.0, "homicide": 1.0, "shooting": 0.9, "stabbing": 0.9, "rape": 0.9,
+    "kidnapping": 0.9, "manhunt": 0.9, "sexual assault": 0.9, "robbery": 0.8,
+    "carjacking": 0.8, "arson": 0.8, "assault": 0.7, "burglary": 0.7, "trafficking": 0.7,
+    "extortion": 0.7, "fraud": 0.6, "money laundering": 0.6, "arrest": 0.6, "suspect": 0.6,
+    "charges filed": 0.6, "indictment": 0.6, "sentenced": 0.6, "theft": 0.6,
+    "police": 0.15, "court": 0.15, "crime": 0.2, "criminal": 0.2, "investigation": 0.2,
+    "trial": 0.2, "prison": 0.2, "jail": 0.2, "custody": 0.2, "attack": 0.2, "gun": 0.25,
+    "drug": 0.25, "violence": 0.3, "weapon": 0.3, "plea": 0.2, "guilty": 0.3, "FBI": 0.3
+}
+
 # Use verified sources from comprehensive testing
 NEWS_WEBSITES = VERIFIED_NEWS_WEBSITES
 
+# Local news site simulator for load tests (python news_simulator.py). When
+# CRIME_SCRAPER_SIMULATED_NEWS_URL is set (e.g. http://127.0.0.1:8765), every
+# source is fetched from the simulator instead of the real site.
+SIMULATED_NEWS_URL = os.environ.get("CRIME_SCRAPER_SIMULATED_NEWS_URL")
+if SIMULATED_NEWS_URL:
+    from synthetic_news import simulated_sources
+    NEWS_WEBSITES = simulated_sources(VERIFIED_NEWS_WEBSITES, SIMULATED_NEWS_URL)
+
+# Simulator defaults (overridable on the news_simulator.py command line)
+SIMULATOR_HOST = "127.0.0.1"
+SIMULATOR_PORT = 8765
+SIMULATOR_ARTICLES_PER_HUB = 20
+SIMULATOR_LATENCY = 0.05  # seconds before each response
+SIMULATOR_JITTER = 0.05  # up to this many extra seconds, uniformly random
+SIMULATOR_ERROR_RATE = 0.0  # share of requests answered with a 5xx error
+SIMULATOR_SLOW_RATE = 0.0  # share of responses dripped out slowly
+SIMULATOR_DRIP_BYTES = 512
+SIMULATOR_DRIP_DELAY = 0.05  # seconds between dripped chunks
+SIMULATOR_RATE_LIMIT = 0.0  # requests per second per client and source (0 = no limit)
+SIMULATOR_RATE_LIMIT_BURST = 5
+
+# Fetch planner: candidate article links from all sources are fetched in
+# order of a priority score (headline keyword strength from
+# CRIME_KEYWORD_WEIGHTS, the source's recent yield of saved articles per
+# fetch, and recency), under optional budgets of article fetches per run and
+# per source (None = unlimited)
+FETCH_BUDGET_GLOBAL = None
+FETCH_BUDGET_PER_SOURCE = None
+FETCH_PRIORITY_WEIGHTS = {"keywords": 0.5, "source_yield": 0.3, "recency": 0.2}
+FETCH_YIELD_HISTORY_RUNS = 20  # run reports used for source yields
+FETCH_RECENCY_HALF_LIFE_DAYS = 2  # for dates in article URLs
 # HTTP request settings
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 3
-DELAY_BETWEEN_REQUESTS = 1  # seconds
+# Politeness delay between article fetches (none against the local simulator)
+DELAY_BETWEEN_REQUESTS = 0 if SIMULATED_NEWS_URL else 1  # seconds
+
+# Scheduled runs are killed after SCHEDULED_RUN_TIMEOUT seconds; they get a
+# deadline SCHEDULED_RUN_DEADLINE seconds in, so they wind down first
+SCHEDULED_RUN_TIMEOUT = 3600
+SCHEDULED_RUN_DEADLINE = 3300
+
+# Scheduler daemon mode (python scheduler.py --daemon): the warm pipeline runs
+# in a worker process, replaced after this many runs (full or single-source)
+# or when its resident memory exceeds the limit (0 = never)
+DAEMON_RECYCLE_AFTER_RUNS = 24
+DAEMON_MAX_MEMORY_MB = 1500
+
+# Adaptive per-source polling (python scheduler.py --schedule adaptive)
+SOURCE_POLLING_STATE_PATH = os.path.join(DATA_DIR, "source_polling.json")
+ADAPTIVE_MIN_INTERVAL_MINUTES = 15
+ADAPTIVE_MAX_INTERVAL_MINUTES = 24 * 60
+ADAPTIVE_DEFAULT_INTERVAL_MINUTES = 120
+ADAPTIVE_TARGET_ARTICLES_PER_POLL = 3
+ADAPTIVE_RATE_SMOOTHING = 0.3  # weight of the latest observation
+ADAPTIVE_BACKOFF_FACTOR = 1.5  # interval multiplier after an empty poll
+ADAPTIVE_JITTER = 0.1  # +/- fraction applied to each interval
+
+# Distributed scraping (python distributed.py coordinator|worker). Workers on
+# any machine that can open WORK_QUEUE_PATH claim tasks under a lease; leases
+# not completed or extended in time are re-queued by the coordinator.
+WORK_QUEUE_PATH = os.environ.get("CRIME_SCRAPER_WORK_QUEUE") or os.path.join(DATA_DIR, "work_queue.sqlite")
+WORK_QUEUE_LEASE_SECONDS = 300
+WORK_QUEUE_MAX_ATTEMPTS = 3  # claims per task before it is marked failed
+WORK_QUEUE_POLL_INTERVAL = 1.0  # seconds between polls of an empty queue
+WORK_QUEUE_RESULT_BATCH = 100  # results saved per coordinator transaction
 
 # spaCy model name
 SPACY_MODEL = "en_core_web_sm"
 
+# Crime pre-filter run on article bodies before NLP (python crime_prefilter.py
+# shows how stored articles score). The score is the weighted count of crime
+# keywords (CRIME_KEYWORD_WEIGHTS, each counted at most
+# PREFILTER_MAX_HITS_PER_KEYWORD times) per 100 words, with the word count
+# clamped to PREFILTER_MIN_WORDS..PREFILTER_MAX_WORDS so short briefs are not
+# favoured and long reports are not penalized. Articles scoring below the
+# threshold skip spaCy and are not saved; the threshold is calibrated so no
+# stored article with a crime type would be skipped (lowest scores ~0.2).
+PREFILTER_ENABLED = True
+PREFILTER_THRESHOLD = 0.15
+PREFILTER_MAX_HITS_PER_KEYWORD = 3
+PREFILTER_MIN_WORDS = 150
+PREFILTER_MAX_WORDS = 300
+# URLs skipped by the pre-filter are logged with their score and not fetched
+# again for PREFILTER_SKIP_DAYS (kept in data/ so scheduled runs on a fresh
+# checkout see them too). Lowering the threshold re-admits URLs scoring above it.
+PREFILTER_SKIP_LOG_PATH = os.path.join(DATA_DIR, "prefilter_skipped.csv")
+PREFILTER_SKIP_DAYS = 30
+
+# NLP result cache (skips re-processing identical content, e.g. wire stories)
+NLP_CACHE_ENABLED = True
+NLP_CACHE_PATH = os.path.join(DATA_DIR, "nlp_cache.sqlite")
+NLP_CACHE_MAX_ENTRIES = 5000
+
+# Startup budget for `python main.py --mode import-check` (seconds).
+# Heavy modules must only be imported by the code paths that use them.
+IMPORT_TIME_BUDGET = 0.5
+HEAVY_MODULES = ["spacy", "pandas", "bs4", "requests", "fake_useragent"]
+
 # CSV column headers
 CSV_COLUMNS = [
     "date_scraped",
@@ -0,0 +1,223 @@
+"""
+Crime pre-filter for the Crime Data Scraper
+Scores article bodies by the density of weighted crime keywords, so articles
+that are clearly not crime reports skip the spaCy pipeline
+"""
+
+import csv
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+from utils import crime_keyword_patterns, get_current_timestamp
+from csv_writer import CSVBatchWriter
+from config import (
+    PREFILTER_THRESHOLD, PREFILTER_MAX_HITS_PER_KEYWORD, PREFILTER_MIN_WORDS, PREFILTER_MAX_WORDS,
+    PREFILTER_SKIP_LOG_PATH, PREFILTER_SKIP_DAYS
+)
+
+WORD_PATTERN = re.compile(r'\w+')
+
+class CrimePreFilter:
+    """
+    Keyword-density classifier run before NLP
+
+    The score is the weighted number of crime keyword hits per 100 words.
+    Each keyword counts at most `max_hits_per_keyword` times, so a story
+    repeating "police" does not pass on that alone. The word count is clamped
+    to `min_words`..`max_words`: a single weak term in a brief does not pass,
+    and since hits are capped, long reports are not diluted by their length.
+    """
+
+    def __init__(self, threshold: float = PREFILTER_THRESHOLD,
+                 max_hits_per_keyword: int = PREFILTER_MAX_HITS_PER_KEYWORD,
+                 min_words: int = PREFILTER_MIN_WORDS, max_words: int = PREFILTER_MAX_WORDS):
+        self.threshold = threshold
+        self.max_hits_per_keyword = max_hits_per_keyword
+        self.min_words = min_words
+        self.max_words = max_words
+        self.keyword_patterns = crime_keyword_patterns()
+
+    def score(self, text: str) -> float:
+        """
+        Score the crime keyword density of a text
+
+        Args:
+            text (str): Article headline and/or body
+
+        Returns:
+            float: Weighted keyword hits per 100 words
+        """
+        text = text.lower()
+        words = len(WORD_PATTERN.findall(text))
+        weighted_hits = 0.0
+        for pattern, weight in self.keyword_patterns:
+            hits = 0
+            for _ in pattern.finditer(text):
+                hits += 1
+                if hits == self.max_hits_per_keyword:
+                    break
+            weighted_hits += hits * weight
+        return 100.0 * weighted_hits / min(max(words, self.min_words), self.max_words)
+
+    def passes(self, text: str) -> bool:
+        """
+        Check whether a text scores at or above the threshold
+
+        Args:
+            text (str): Article headline and/or body
+
+        Returns:
+            bool: True if the article should go through NLP
+        """
+        return self.score(text) >= self.threshold
+
+class PrefilterSkipLog:
+    """
+    Log of article URLs skipped by the pre-filter
+
+    A small CSV (url, score, skipped_at) appended to on every skip, so later
+    runs don't fetch the same off-topic links again. Entries expire after
+    `max_age_days`, and a URL only counts as skipped while its score is
+    below the threshold in use.
+    """
+
+    COLUMNS = ['url', 'score', 'skipped_at']
+
+    def __init__(self, log_path: Optional[str] = None, max_age_days: float = PREFILTER_SKIP_DAYS):
+        self.log_path = log_path or PREFILTER_SKIP_LOG_PATH
+        self.max_age_days = max_age_days
+        self.writer = CSVBatchWriter(self.log_path, self.COLUMNS)
+        self._entries: Optional[Dict[str, Tuple[float, str]]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Tuple[float, str]]:
+        """
+        Read the log, dropping expired entries (rewriting the file if any)
+
+        Returns:
+            Dict[str, Tuple[float, str]]: Score and skip time per URL
+        """
+        if self._entries is not None:
+            return self._entries
+
+        entries: Dict[str, Tuple[float, str]] = {}
+        expired = 0
+        cutoff = (datetime.now() - timedelta(days=self.max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+        if os.path.exists(self.log_path):
+            with open(self.log_path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    try:
+                        score = float(row['score'])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if (row.get('skipped_at') or '') < cutoff:
+                        expired += 1
+                        continue
+                    entries[row['url']] = (score, row['skipped_at'])
+        if expired:
+            self.writer.rewrite(
+                {'url': url, 'score': score, 'skipped_at': skipped_at}
+                for url, (score, skipped_at) in entries.items()
+            )
+        self._entries = entries
+        return entries
+
+    def is_skipped(self, url: str, threshold: float = PREFILTER_THRESHOLD) -> bool:
+        """
+        Check whether a URL was skipped by the pre-filter at this threshold
+
+        Args:
+            url (str): Article URL
+            threshold (float): Threshold in use
+
+        Returns:
+            bool: True if the URL scored below the threshold when it was skipped
+        """
+        with self._lock:
+            entry = self._load().get(url)
+        return entry is not None and entry[0] < threshold
+
+    def record(self, url: str, score: float):
+        """
+        Log a skipped URL
+
+        Args:
+            url (str): Article URL
+            score (float): Its pre-filter score
+        """
+        with self._lock:
+            entries = self._load()
+            skipped_at = get_current_timestamp()
+            entries[url] = (round(score, 4), skipped_at)
+            self.writer.ensure_header()
+            self.writer.write({'url': url, 'score': round(score, 4), 'skipped_at': skipped_at})
+            self.writer.commit()
+
+_skip_log: Optional[PrefilterSkipLog] = None
+
+def get_prefilter_skip_log() -> PrefilterSkipLog:
+    """
+    Get the pre-filter skip log shared within the process
+
+    Returns:
+        PrefilterSkipLog: Log at PREFILTER_SKIP_LOG_PATH
+    """
+    global _skip_log
+    if _skip_log is None:
+        _skip_log = PrefilterSkipLog()
+    return _skip_log
+
+def evaluate(store, prefilter: Optional[CrimePreFilter] = None) -> Dict[str, Dict]:
+    """
+    Count how stored articles would fare with the pre-filter
+
+    Stored articles with a crime type are the ones NLP found to be crime
+    reports; those below the threshold would be lost by the pre-filter, so
+    the threshold should stay under their lowest score.
+
+    Args:
+        store: Article store to read
+        prefilter (CrimePreFilter, optional): Pre-filter to evaluate
+
+    Returns:
+        Dict[str, Dict]: Passed and skipped counts and the lowest score
+            (None without articles) for articles with and without a crime type
+    """
+    prefilter = prefilter or CrimePreFilter()
+    counts = {
+        'with_crime_type': {'passed': 0, 'skipped': 0, 'lowest_score': None},
+        'without_crime_type': {'passed': 0, 'skipped': 0, 'lowest_score': None}
+    }
+    for article in store.iter_articles(['full_text', 'what']):
+        group = counts['with_crime_type' if isinstance(article.get('what'), str) and article['what'] else 'without_crime_type']
+        score = prefilter.score(str(article.get('full_text') or ''))
+        group['passed' if score >= prefilter.threshold else 'skipped'] += 1
+        if group['lowest_score'] is None or score < group['lowest_score']:
+            group['lowest_score'] = round(score, 3)
+    return counts
+
+def main():
+    """
+    Print how the articles of the configured store score against the pre-filter
+    """
+    import argparse
+    from storage import get_article_store, CSVArticleStore
+
+    parser = argparse.ArgumentParser(description='Crime pre-filter evaluation')
+    parser.add_argument('--threshold', type=float, default=PREFILTER_THRESHOLD,
+                        help='Score threshold to evaluate (default: PREFILTER_THRESHOLD)')
+    parser.add_argument('--csv', help='Evaluate this CSV file instead of the configured store')
+
+    args = parser.parse_args()
+    store = CSVArticleStore(args.csv) if args.csv else get_article_store()
+    counts = evaluate(store, CrimePreFilter(threshold=args.threshold))
+
+    print(f"Threshold: {args.threshold}")
+    for group, outcomes in counts.items():
+        print(f"{group}: {outcomes['passed']} passed, {outcomes['skipped']} skipped, "
+              f"lowest score {outcomes['lowest_score']}")
+
+if __name__ == "__main__":
+    main()
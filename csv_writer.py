@@ -0,0 +1,206 @@
+"""
+Buffered CSV writer for article rows
+Writes rows with the stdlib csv module in batches, in CSV_COLUMNS order,
+with fsync at commit points and an atomic temp-file rewrite mode
+"""
+
+import csv
+import io
+import os
+from typing import Dict, Iterable, List, Optional
+from config import CSV_FILE_PATH, CSV_COLUMNS
+
+class CSVBatchWriter:
+    """
+    Appends article rows to a CSV file in batches
+
+    Rows are buffered and written with a single write call per batch, so a
+    crash can at most leave the last record of a batch incomplete. Such a
+    torn record is removed the next time the file is opened for appending. The
+    batch is flushed and fsynced on commit().
+    """
+
+    def __init__(self, csv_file_path: Optional[str] = None, columns: Optional[List[str]] = None,
+                 batch_size: int = 100):
+        self.csv_file_path = csv_file_path or CSV_FILE_PATH
+        self.columns = columns or CSV_COLUMNS
+        self.batch_size = batch_size
+        self._buffer: List[List] = []
+        # File size after this writer's last write, when known to be intact
+        self._checked_size: Optional[int] = None
+
+    def __enter__(self) -> 'CSVBatchWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Commit what was buffered even on errors; those rows are complete
+        self.commit()
+
+    def _format_row(self, data: Dict) -> List:
+        """
+        Order a row by the writer's columns, writing missing and NaN values as empty
+
+        Args:
+            data (Dict): Row data keyed by column name
+
+        Returns:
+            List: Values in column order
+        """
+        row = []
+        for column in self.columns:
+            value = data.get(column)
+            if value is None or (isinstance(value, float) and value != value):
+                value = ''
+            row.append(value)
+        return row
+
+    def _render(self, rows: Iterable[List]) -> str:
+        """
+        Render rows as CSV text (pandas-compatible quoting and line endings)
+
+        Args:
+            rows (Iterable[List]): Rows in column order
+
+        Returns:
+            str: CSV text
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerows(rows)
+        return buffer.getvalue()
+
+    def ensure_header(self):
+        """
+        Create the file with a header row if it doesn't exist or is empty
+        """
+        if not os.path.exists(self.csv_file_path) or os.path.getsize(self.csv_file_path) == 0:
+            with open(self.csv_file_path, 'w', newline='', encoding='utf-8') as f:
+                f.write(self._render([self.columns]))
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _repair_tail(self):
+        """
+        Truncate an incomplete last record left by an interrupted write
+
+        Record boundaries are newlines outside quoted fields, found by quote
+        parity, so a write torn right after a newline inside a quoted field
+        is not mistaken for a complete record. The last record is then
+        checked with csv.reader. The file is scanned once per writer; later
+        calls only check it still has the size this writer left it at.
+        """
+        if not os.path.exists(self.csv_file_path):
+            return
+        size = os.path.getsize(self.csv_file_path)
+        if size == self._checked_size:
+            return
+
+        with open(self.csv_file_path, 'rb+') as f:
+            record_start = record_end = position = 0
+            in_quotes = False
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                segments = chunk.split(b'\n')
+                for segment in segments[:-1]:
+                    in_quotes ^= segment.count(b'"') % 2 == 1
+                    position += len(segment) + 1
+                    if not in_quotes:
+                        record_start, record_end = record_end, position
+                in_quotes ^= segments[-1].count(b'"') % 2 == 1
+                position += len(segments[-1])
+
+            if record_end > 0:
+                f.seek(record_start)
+                record = f.read(record_end - record_start).decode('utf-8', errors='replace')
+                csv.field_size_limit(max(csv.field_size_limit(), len(record)))
+                try:
+                    valid = len(list(csv.reader(io.StringIO(record, newline=''), strict=True))) == 1
+                except csv.Error:
+                    valid = False
+                if not valid:
+                    record_end = record_start
+
+            if record_end < size:
+                f.truncate(record_end)
+        self._checked_size = record_end
+
+    def write(self, data: Dict):
+        """
+        Buffer one row, flushing when the batch is full
+
+        Args:
+            data (Dict): Row data keyed by column name
+        """
+        self._buffer.append(self._format_row(data))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, rows: Iterable[Dict]):
+        """
+        Buffer several rows
+
+        Args:
+            rows (Iterable[Dict]): Rows keyed by column name
+        """
+        for data in rows:
+            self.write(data)
+
+    def flush(self, sync: bool = False):
+        """
+        Append buffered rows to the file in one write
+
+        Args:
+            sync (bool): fsync the file after writing
+        """
+        if not self._buffer:
+            return
+
+        self._repair_tail()
+        self.ensure_header()
+
+        text = self._render(self._buffer)
+        with open(self.csv_file_path, 'a', newline='', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            if sync:
+                os.fsync(f.fileno())
+            self._checked_size = os.fstat(f.fileno()).st_size
+
+        self._buffer = []
+
+    def commit(self):
+        """
+        Write buffered rows and fsync so they survive a crash
+        """
+        self.flush(sync=True)
+
+    def rewrite(self, rows: Iterable[Dict]) -> int:
+        """
+        Replace the whole file atomically
+
+        Rows are written to a temporary file in the same directory, fsynced
+        and then renamed over the original, so readers see either the old
+        or the new file, never a partial one.
+
+        Args:
+            rows (Iterable[Dict]): All rows of the new file
+
+        Returns:
+            int: Number of rows written
+        """
+        self._buffer = []
+        directory = os.path.dirname(os.path.abspath(self.csv_file_path))
+        temp_path = os.path.join(directory, f".{os.path.basename(self.csv_file_path)}.tmp")
+
+        count = 0
+        with open(temp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(self.columns)
+            for data in rows:
+                writer.writerow(self._format_row(data))
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, self.csv_file_path)
+        self._checked_size = None
+        return count
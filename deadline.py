@@ -0,0 +1,128 @@
+"""
+Run deadlines for the Crime Data Scraper
+Lets a run stop starting new fetches in time to process and save what it
+already fetched, and records the work it skipped
+"""
+
+import time
+from typing import Dict, Optional
+from config import DEADLINE_MARGIN_SECONDS, DEADLINE_SECONDS_PER_ARTICLE, REQUEST_TIMEOUT, MAX_RETRIES
+
+def worst_case_fetch_seconds() -> float:
+    """
+    Get the longest a page fetch can take before WebScraper gives up
+
+    Returns:
+        float: MAX_RETRIES timed-out requests plus the backoff between them
+    """
+    return MAX_RETRIES * REQUEST_TIMEOUT + sum(2 ** attempt for attempt in range(MAX_RETRIES - 1))
+
+class Deadline:
+    """
+    Wall-clock budget of one run
+
+    `pending` counts fetched articles still waiting for NLP; each one
+    reserves DEADLINE_SECONDS_PER_ARTICLE of the remaining time. A new
+    fetch also reserves `fetch_seconds`, the time it can take at worst
+    (retries and backoff included). A Deadline without seconds never
+    expires, so callers need no special case.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, margin: float = DEADLINE_MARGIN_SECONDS,
+                 per_article: float = DEADLINE_SECONDS_PER_ARTICLE,
+                 fetch_seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.margin = margin
+        self.per_article = per_article
+        self.fetch_seconds = worst_case_fetch_seconds() if fetch_seconds is None else fetch_seconds
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self.pending = 0
+        self.skipped: Dict = {
+            'sources_not_started': [],
+            'articles_not_fetched': {},
+            'articles_not_processed': 0
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """
+        True if the deadline has seconds set and can expire
+        """
+        return self.expires_at is not None
+
+    def remaining(self) -> float:
+        """
+        Seconds left until the deadline (infinite without a deadline)
+        """
+        if self.expires_at is None:
+            return float('inf')
+        return self.expires_at - time.monotonic()
+
+    def allows_fetch(self) -> bool:
+        """
+        Check whether another fetch can start and its result still be processed
+
+        Returns:
+            bool: True if the remaining time covers the margin, the fetch at
+                its slowest and NLP of all pending articles plus one more
+        """
+        return self.remaining() > self.margin + self.fetch_seconds + (self.pending + 1) * self.per_article
+
+    def allows_processing(self) -> bool:
+        """
+        Check whether another article can be processed before saving must start
+        """
+        return self.remaining() > self.margin
+
+    def skip_source(self, source: str):
+        """
+        Record a source that was not started because of the deadline
+
+        Args:
+            source (str): Source website name
+        """
+        self.skipped['sources_not_started'].append(source)
+
+    def skip_fetches(self, source: str, count: int):
+        """
+        Record article links of a source that were not fetched
+
+        Args:
+            source (str): Source website name
+            count (int): Number of links left unfetched
+        """
+        if count:
+            self.skipped['articles_not_fetched'][source] = self.skipped['articles_not_fetched'].get(source, 0) + count
+
+    def skip_processing(self, count: int):
+        """
+        Record fetched articles that were not processed
+
+        Args:
+            count (int): Number of articles left unprocessed
+        """
+        self.skipped['articles_not_processed'] += count
+
+    @property
+    def hit(self) -> bool:
+        """
+        True if any work was skipped because of the deadline
+        """
+        return bool(self.skipped['sources_not_started'] or self.skipped['articles_not_fetched']
+                    or self.skipped['articles_not_processed'])
+
+    def summary(self) -> Dict:
+        """
+        Get the deadline and skipped work for the run report
+
+        Returns:
+            Dict: Deadline seconds, whether it was hit and what was skipped
+        """
+        not_fetched = self.skipped['articles_not_fetched']
+        return {
+            'seconds': self.seconds,
+            'hit': self.hit,
+            'sources_not_started': list(self.skipped['sources_not_started']),
+            'articles_not_fetched': dict(sorted(not_fetched.items(), key=lambda item: -item[1])),
+            'articles_not_processed': self.skipped['articles_not_processed']
+        }
@@ -0,0 +1,606 @@
+"""
+Distributed scraping for the Crime Data Scraper
+A coordinator puts one task per source on a shared work queue; workers on
+any number of machines claim tasks under a lease, fetch and process articles
+with the regular WebScraper and CrimeNLPProcessor, and hand the results back
+to the coordinator, the single writer that runs duplicate detection and saves.
+
+The queue is a SQLite database (WORK_QUEUE_PATH) as a local stand-in for a
+shared queue service; every node must be able to open the same file.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from utils import setup_logging, ensure_csv_exists, append_to_csv_with_dedup, rate_limit_delay
+from log_setup import configure_logging
+from storage import get_article_store
+from metrics import get_run_metrics
+from config import (
+    NEWS_WEBSITES, DELAY_BETWEEN_REQUESTS, WORK_QUEUE_PATH, WORK_QUEUE_LEASE_SECONDS,
+    WORK_QUEUE_MAX_ATTEMPTS, WORK_QUEUE_POLL_INTERVAL, WORK_QUEUE_RESULT_BATCH, PREFILTER_ENABLED
+)
+
+if TYPE_CHECKING:
+    from scraper import WebScraper
+    from nlp_processor import CrimeNLPProcessor
+    from crime_prefilter import CrimePreFilter
+
+# Follow-up task: (kind, task key, payload)
+FollowUp = Tuple[str, str, Dict]
+
+class WorkQueue:
+    """
+    SQLite-backed task queue with leases
+
+    Tasks move pending -> leased -> done. A worker that dies leaves its task
+    leased until the lease expires; `requeue_expired` then makes it pending
+    again, or failed once it has been claimed `max_attempts` times. Completing
+    a task atomically stores its results and follow-up tasks, and only
+    succeeds while the worker still holds the lease, so a re-queued task
+    never delivers its results twice.
+    """
+
+    def __init__(self, queue_path: Optional[str] = None, lease_seconds: float = WORK_QUEUE_LEASE_SECONDS,
+                 max_attempts: int = WORK_QUEUE_MAX_ATTEMPTS):
+        self.queue_path = queue_path or WORK_QUEUE_PATH
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(self.queue_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.queue_path, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, kind TEXT NOT NULL, "
+            "task_key TEXT NOT NULL, payload TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, lease_expires REAL, error TEXT, "
+            "updated REAL NOT NULL, UNIQUE (run_id, kind, task_key))"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, lease_expires)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, "
+            "task_id INTEGER NOT NULL, payload TEXT NOT NULL)"
+        )
+
+    def _transaction(self):
+        """
+        Open a write transaction
+
+        BEGIN IMMEDIATE takes the write lock up front, so two workers can
+        never claim the same task.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def enqueue(self, run_id: str, kind: str, task_key: str, payload: Dict) -> bool:
+        """
+        Add a task unless the run already has a task of this kind and key
+
+        Args:
+            run_id (str): Run the task belongs to
+            kind (str): Task kind ('source' or 'article')
+            task_key (str): Key unique within the run and kind (e.g. the URL)
+            payload (Dict): JSON-serializable task data
+
+        Returns:
+            bool: True if the task was added
+        """
+        cursor = self.conn.execute(
+            "INSERT OR IGNORE INTO tasks (run_id, kind, task_key, payload, updated) VALUES (?, ?, ?, ?, ?)",
+            (run_id, kind, task_key, json.dumps(payload), time.time())
+        )
+        return cursor.rowcount == 1
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """
+        Lease the oldest pending task
+
+        Args:
+            worker_id (str): Claiming worker
+
+        Returns:
+            Optional[Dict]: Task with id, run_id, kind, task_key, payload and
+                attempts, or None if no task is pending
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            row = self.conn.execute(
+                "SELECT id, run_id, kind, task_key, payload, attempts FROM tasks "
+                "WHERE status = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row[0])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        return {
+            'id': row[0],
+            'run_id': row[1],
+            'kind': row[2],
+            'task_key': row[3],
+            'payload': json.loads(row[4]),
+            'attempts': row[5] + 1
+        }
+
+    def extend(self, task_id: int, worker_id: str) -> bool:
+        """
+        Renew a lease before starting a long step
+
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE tasks SET lease_expires = ?, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (now + self.lease_seconds, now, task_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task: Dict, worker_id: str, results: Optional[List[Dict]] = None,
+                 follow_ups: Optional[List[FollowUp]] = None) -> bool:
+        """
+        Finish a task, storing its results and follow-up tasks
+
+        Args:
+            task (Dict): Task from claim
+            worker_id (str): Worker holding the lease
+            results (List[Dict], optional): Results for the coordinator
+            follow_ups (List[FollowUp], optional): New tasks of the same run
+
+        Returns:
+            bool: False (and nothing stored) if the lease was lost
+        """
+        now = time.time()
+        self._transaction()
+        try:
+            cursor = self.conn.execute(
+                "UPDATE tasks SET status = 'done', lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = 'leased'",
+                (now, task['id'], worker_id)
+            )
+            if cursor.rowcount != 1:
+                self.conn.execute("ROLLBACK")
+                return False
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (run_id, kind, task_key, payload, updated) VALUES (?, ?, ?, ?, ?)",
+                [(task['run_id'], kind, key, json.dumps(payload), now) for kind, key, payload in follow_ups or []]
+            )
+            self.conn.executemany(
+                "INSERT INTO results (run_id, task_id, payload) VALUES (?, ?, ?)",
+                [(task['run_id'], task['id'], json.dumps(result)) for result in results or []]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def fail(self, task: Dict, worker_id: str, error: str):
+        """
+        Give a task back after an error, or mark it failed after max_attempts claims
+        """
+        self.conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = ?, updated = ? "
+            "WHERE id = ? AND worker = ? AND status = 'leased'",
+            (self.max_attempts, error[:1000], time.time(), task['id'], worker_id)
+        )
+
+    def requeue_expired(self) -> int:
+        """
+        Re-queue tasks whose lease expired (their worker died or stalled)
+
+        Returns:
+            int: Number of tasks re-queued or marked failed
+        """
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, error = 'lease expired', updated = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (self.max_attempts, now, now)
+        )
+        return cursor.rowcount
+
+    def take_results(self, run_id: str, limit: int = WORK_QUEUE_RESULT_BATCH) -> List[Tuple[int, Dict]]:
+        """
+        Get the oldest unsaved results of a run
+
+        Returns:
+            List[Tuple[int, Dict]]: Result ids and payloads; pass the ids to
+                ack_results once saved
+        """
+        rows = self.conn.execute(
+            "SELECT id, payload FROM results WHERE run_id = ? ORDER BY id LIMIT ?", (run_id, limit)
+        ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def ack_results(self, result_ids: List[int]):
+        """
+        Remove saved results
+        """
+        self.conn.executemany("DELETE FROM results WHERE id = ?", [(result_id,) for result_id in result_ids])
+
+    def counts(self, run_id: str) -> Dict[str, int]:
+        """
+        Count the tasks of a run per status, plus results waiting to be saved
+
+        Returns:
+            Dict[str, int]: Counts for pending, leased, done, failed and results
+        """
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        for status, count in self.conn.execute(
+            "SELECT status, COUNT(*) FROM tasks WHERE run_id = ? GROUP BY status", (run_id,)
+        ):
+            counts[status] = count
+        counts['results'] = self.conn.execute(
+            "SELECT COUNT(*) FROM results WHERE run_id = ?", (run_id,)
+        ).fetchone()[0]
+        return counts
+
+    def failed_tasks(self, run_id: str) -> List[Dict]:
+        """
+        List the failed tasks of a run
+
+        Returns:
+            List[Dict]: Kind, key and last error of each failed task
+        """
+        return [
+            {'kind': kind, 'task_key': key, 'error': error}
+            for kind, key, error in self.conn.execute(
+                "SELECT kind, task_key, error FROM tasks WHERE run_id = ? AND status = 'failed' ORDER BY id",
+                (run_id,)
+            )
+        ]
+
+    def latest_run(self) -> Optional[str]:
+        """
+        Get the run id of the most recently added task
+        """
+        row = self.conn.execute("SELECT run_id FROM tasks ORDER BY id DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        """
+        Close the underlying database connection
+        """
+        self.conn.close()
+
+class Coordinator:
+    """
+    Starts distributed runs and saves their results
+
+    The coordinator is the only process that writes to the article store, so
+    duplicate detection sees every article of the run in one place.
+    """
+
+    def __init__(self, queue: Optional[WorkQueue] = None, sources: Optional[List[Dict]] = None):
+        self.logger = setup_logging()
+        self.queue = queue or WorkQueue()
+        self.sources = sources or NEWS_WEBSITES
+
+    def start_run(self, run_id: Optional[str] = None) -> str:
+        """
+        Queue one task per source
+
+        Args:
+            run_id (str, optional): Run id; an existing run is resumed
+                without queueing its sources again
+
+        Returns:
+            str: Run id
+        """
+        run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        added = sum(
+            self.queue.enqueue(run_id, 'source', website_config['name'], website_config)
+            for website_config in self.sources
+        )
+        self.logger.info(f"Run {run_id}: queued {added} source tasks")
+        return run_id
+
+    def save_results(self, run_id: str) -> Tuple[int, int]:
+        """
+        Save one batch of results with duplicate detection
+
+        Returns:
+            Tuple[int, int]: Articles saved and duplicates skipped
+        """
+        results = self.queue.take_results(run_id)
+        saved = skipped = 0
+        if not results:
+            return saved, skipped
+
+        with get_article_store().batch():
+            for _, article in results:
+                result = append_to_csv_with_dedup(article)
+                if result['success']:
+                    saved += 1
+                elif result.get('skipped'):
+                    skipped += 1
+                else:
+                    self.logger.error(f"Failed to save article: {article.get('headline', 'Unknown')}")
+        # Acknowledged only after the batch is committed; results saved twice
+        # after a crash in between are caught by duplicate detection
+        self.queue.ack_results([result_id for result_id, _ in results])
+        return saved, skipped
+
+    def run(self, run_id: Optional[str] = None, poll_interval: float = WORK_QUEUE_POLL_INTERVAL) -> Dict:
+        """
+        Start (or resume) a run and save results until all its tasks are finished
+
+        Args:
+            run_id (str, optional): Run to resume
+            poll_interval (float): Seconds to wait when there is nothing to save
+
+        Returns:
+            Dict: Run summary with task counts, articles saved and skipped
+        """
+        metrics = get_run_metrics()
+        metrics.reset()
+        ensure_csv_exists()
+        run_id = self.start_run(run_id)
+        saved_count = skipped_count = 0
+
+        while True:
+            requeued = self.queue.requeue_expired()
+            if requeued:
+                self.logger.warning(f"Re-queued {requeued} tasks with expired leases")
+
+            saved, skipped = self.save_results(run_id)
+            saved_count += saved
+            skipped_count += skipped
+            if saved or skipped:
+                continue
+
+            counts = self.queue.counts(run_id)
+            if not counts['pending'] and not counts['leased'] and not counts['results']:
+                break
+            time.sleep(poll_interval)
+
+        counts = self.queue.counts(run_id)
+        failed = self.queue.failed_tasks(run_id)
+        for task in failed:
+            self.logger.warning(f"Task failed: {task['kind']} {task['task_key']} ({task['error']})")
+        self.logger.info(f"Run {run_id} finished: saved {saved_count} articles, "
+                         f"skipped {skipped_count} duplicates, {counts['failed']} failed tasks")
+
+        summary = {
+            'run_id': run_id,
+            'tasks_done': counts['done'],
+            'tasks_failed': counts['failed'],
+            'articles_saved': saved_count,
+            'duplicates_skipped': skipped_count
+        }
+        metrics.finish(mode='distributed', status='ok' if not failed else 'partial', **summary)
+        try:
+            summary['report_path'] = metrics.write_report()
+            metrics.write_prometheus()
+        except OSError as e:
+            self.logger.error(f"Could not write run report: {str(e)}")
+        return summary
+
+class Worker:
+    """
+    Claims tasks from the work queue and runs them
+
+    'source' tasks extract the article links of a website and queue one
+    'article' task per link; 'article' tasks fetch and NLP-process one
+    article and return the processed record to the coordinator.
+    """
+
+    def __init__(self, queue: Optional[WorkQueue] = None, worker_id: Optional[str] = None):
+        self.logger = setup_logging()
+        self.queue = queue or WorkQueue()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._scraper = None
+        self._nlp_processor = None
+        # Shared by the scraper and the NLP processor (see CrimeDataScraper)
+        self._prefilter = None
+
+    @property
+    def prefilter(self) -> Optional['CrimePreFilter']:
+        """
+        Crime pre-filter, created on first use (None when disabled)
+        """
+        if self._prefilter is None and PREFILTER_ENABLED:
+            from crime_prefilter import CrimePreFilter
+            self._prefilter = CrimePreFilter()
+        return self._prefilter
+
+    @property
+    def scraper(self) -> 'WebScraper':
+        """
+        Web scraper, created on first use
+        """
+        if self._scraper is None:
+            from scraper import WebScraper
+            self._scraper = WebScraper(prefilter=self.prefilter)
+        return self._scraper
+
+    @property
+    def nlp_processor(self) -> 'CrimeNLPProcessor':
+        """
+        NLP processor, created (and the spaCy model loaded) on first use
+        """
+        if self._nlp_processor is None:
+            from nlp_processor import CrimeNLPProcessor
+            self._nlp_processor = CrimeNLPProcessor(prefilter=self.prefilter)
+        return self._nlp_processor
+
+    def run_source_task(self, task: Dict) -> Tuple[List[Dict], List[FollowUp]]:
+        """
+        Extract the article links of a website
+
+        Args:
+            task (Dict): Claimed 'source' task; its payload is the website config
+
+        Returns:
+            Tuple[List[Dict], List[FollowUp]]: No results, and one 'article'
+                task per link found
+        """
+        website_config = task['payload']
+        articles = self.scraper.extract_article_links(website_config)
+        follow_ups = [
+            ('article', article['url'], {
+                'url': article['url'],
+                'headline': article['headline'],
+                'source': article['source'],
+                'website': website_config
+            })
+            for article in articles
+        ]
+        return [], follow_ups
+
+    def run_article_task(self, task: Dict) -> Tuple[List[Dict], List[FollowUp]]:
+        """
+        Fetch and NLP-process one article
+
+        Args:
+            task (Dict): Claimed 'article' task with url, headline, source
+                and website config in its payload
+
+        Returns:
+            Tuple[List[Dict], List[FollowUp]]: The processed record (none if
+                the article could not be fetched or was filtered out), and no
+                follow-up tasks
+
+        Raises:
+            RuntimeError: If the lease was lost while fetching
+        """
+        from article_text import ArticleText
+
+        payload = task['payload']
+        rate_limit_delay(DELAY_BETWEEN_REQUESTS)
+        content = self.scraper.extract_article_content(payload['url'], payload['website'])
+        if not content:
+            return [], []
+
+        if not self.queue.extend(task['id'], self.worker_id):
+            raise RuntimeError('lease lost while fetching')
+
+        article = {
+            'headline': payload['headline'],
+            'url': payload['url'],
+            'source': payload['source'],
+            'content': content
+        }
+        article['article_text'] = ArticleText(article['headline'], content)
+        processed = self.nlp_processor.process_article(article)
+        if not processed:
+            return [], []
+        # Rebuilt from headline and full_text by the coordinator
+        processed.pop('article_text', None)
+        return [processed], []
+
+    def run_task(self, task: Dict) -> bool:
+        """
+        Run one claimed task and report its outcome to the queue
+
+        Returns:
+            bool: True if the task completed
+        """
+        handlers = {'source': self.run_source_task, 'article': self.run_article_task}
+        try:
+            results, follow_ups = handlers[task['kind']](task)
+        except Exception as e:
+            self.logger.error(f"Task {task['kind']} {task['task_key']} failed "
+                              f"(attempt {task['attempts']}): {str(e)}")
+            self.queue.fail(task, self.worker_id, str(e))
+            return False
+
+        if not self.queue.complete(task, self.worker_id, results, follow_ups):
+            self.logger.warning(f"Lease on {task['kind']} {task['task_key']} expired, results discarded")
+            return False
+        return True
+
+    def run(self, exit_when_idle: Optional[float] = None, max_tasks: Optional[int] = None,
+            poll_interval: float = WORK_QUEUE_POLL_INTERVAL) -> int:
+        """
+        Claim and run tasks until stopped
+
+        Args:
+            exit_when_idle (float, optional): Stop after the queue has been
+                empty for this many seconds (None = run forever)
+            max_tasks (int, optional): Stop after this many tasks
+            poll_interval (float): Seconds between polls of an empty queue
+
+        Returns:
+            int: Number of tasks completed
+        """
+        self.logger.info(f"Worker {self.worker_id} started on {self.queue.queue_path}")
+        completed = claimed = 0
+        idle_since = time.monotonic()
+
+        while max_tasks is None or claimed < max_tasks:
+            task = self.queue.claim(self.worker_id)
+            if task is None:
+                if exit_when_idle is not None and time.monotonic() - idle_since >= exit_when_idle:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            claimed += 1
+            completed += self.run_task(task)
+            idle_since = time.monotonic()
+
+        self.logger.info(f"Worker {self.worker_id} stopped after {completed} completed tasks")
+        return completed
+
+def main():
+    """
+    Run a coordinator or worker, or print the status of a run
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Distributed crime data scraping')
+    parser.add_argument('role', choices=['coordinator', 'worker', 'status'])
+    parser.add_argument('--queue', type=str, help=f'Work queue database (default {WORK_QUEUE_PATH})')
+    parser.add_argument('--run-id', type=str, help='Run to resume (coordinator) or show (status)')
+    parser.add_argument('--worker-id', type=str, help='Worker name (default host:pid)')
+    parser.add_argument('--exit-when-idle', type=float, metavar='SECONDS',
+                        help='Stop the worker after the queue has been empty this long')
+    parser.add_argument('--max-tasks', type=int, help='Stop the worker after this many tasks')
+
+    args = parser.parse_args()
+    # Nodes can share a host, so each process writes its own log file
+    worker_id = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    configure_logging(role=f"worker-{worker_id}" if args.role == 'worker' else args.role)
+    queue = WorkQueue(args.queue)
+
+    if args.role == 'coordinator':
+        summary = Coordinator(queue).run(args.run_id)
+        for key, value in summary.items():
+            print(f"{key}: {value}")
+
+    elif args.role == 'worker':
+        Worker(queue, worker_id).run(args.exit_when_idle, args.max_tasks)
+
+    else:
+        run_id = args.run_id or queue.latest_run()
+        if run_id is None:
+            print("No runs in the work queue")
+            return
+        print(f"run_id: {run_id}")
+        for key, value in queue.counts(run_id).items():
+            print(f"{key}: {value}")
+
+if __name__ == "__main__":
+    main()
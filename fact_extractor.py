@@ -0,0 +1,325 @@
+"""
+Single-pass regex fact extractor for crime articles
+Compiles the injury, fatality, arrest, motivation, money and date patterns once
+and scans each article text a single time
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Anchors are the leading tokens the fact patterns can start with. The scanner
+# is one alternation of these as named groups, run over the lowercased text.
+FACT_ANCHORS: Dict[str, str] = {
+    "number": r'\d+',
+    "dollar": r'\$',
+    "injured": r'injured',
+    "killed": r'killed',
+    "arrested": r'arrested',
+    "cause": r'because|due to|motivated by|reason|motive',
+    "topic": r'over|about|regarding',
+    "relation": r'domestic|family|personal',
+    "usd": r'usd',
+    "month": r'january|february|march|april|may|june|july|august|september|october|november|december'
+}
+
+# Ordered (anchor, pattern) lists per fact type. Order is priority: the first
+# pattern that matches anywhere in the text wins, and its leftmost match is used.
+# Every pattern must start with a match of its anchor.
+FACT_PATTERNS: Dict[str, List[Tuple[str, str]]] = {
+    "injuries": [
+        ("number", r'(\d+)\s+(?:people\s+)?(?:were\s+)?injured'),
+        ("injured", r'injured\s+(\d+)'),
+        ("number", r'(\d+)\s+victims?'),
+        ("number", r'(\d+)\s+people\s+hurt')
+    ],
+    "fatalities": [
+        ("number", r'(\d+)\s+(?:people\s+)?(?:were\s+)?killed'),
+        ("killed", r'killed\s+(\d+)'),
+        ("number", r'(\d+)\s+(?:people\s+)?died'),
+        ("number", r'(\d+)\s+deaths?'),
+        ("number", r'(\d+)\s+fatalities')
+    ],
+    "arrests": [
+        ("number", r'(\d+)\s+(?:people\s+)?(?:were\s+)?arrested'),
+        ("arrested", r'arrested\s+(\d+)'),
+        ("number", r'(\d+)\s+suspects?'),
+        ("number", r'(\d+)\s+in\s+custody')
+    ],
+    "motivation": [
+        ("cause", r'(?:because|due to|motivated by|reason|motive)[\s\w]*?(?:money|drugs?|revenge|jealousy|anger|dispute|robbery|theft)'),
+        ("topic", r'(?:over|about|regarding)[\s\w]*?(?:money|drugs?|relationship|property|debt)'),
+        ("relation", r'(?:domestic|family|personal)[\s\w]*?(?:dispute|violence|conflict)')
+    ],
+    "economic_loss": [
+        ("dollar", r'\$[\d,]+(?:\.\d{2})?'),  # $1,000.00
+        ("number", r'\b\d+\s*(?:dollars?|bucks?)\b'),  # 100 dollars
+        ("usd", r'\b(?:USD|usd)\s*\d+\b')  # USD 100
+    ],
+    "publication_date": [
+        ("number", r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b'),  # MM/DD/YYYY or MM-DD-YYYY
+        ("number", r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\b'),    # YYYY/MM/DD or YYYY-MM-DD
+        ("month", r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b'),  # Month DD, YYYY
+        ("number", r'\b\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b')   # DD Month YYYY
+    ]
+}
+
+# Fact types whose value is the integer in the first capture group
+COUNT_FACTS = ("injuries", "fatalities", "arrests")
+
+# Fact types historically matched against the lowercased text
+LOWERCASE_FACTS = COUNT_FACTS + ("motivation",)
+
+class FactExtractor:
+    """
+    Regex engine that finds every fact type in one scan of the text
+
+    The anchors are compiled into a single alternation of named groups and
+    the text is scanned once to collect candidate positions. Each fact
+    pattern is then only tried, anchored, at the positions of its own anchor,
+    so results follow the same priority rules as running each pattern list
+    with re.search in order.
+    """
+
+    def __init__(self, anchors: Optional[Dict[str, str]] = None,
+                 patterns: Optional[Dict[str, List[Tuple[str, str]]]] = None):
+        self.anchors = anchors or FACT_ANCHORS
+        self.patterns = patterns or FACT_PATTERNS
+        self.fact_types = list(self.patterns.keys())
+
+        self._scanner = re.compile('|'.join(
+            f"(?P<{name}>{anchor})" for name, anchor in self.anchors.items()
+        ))
+        # Patterns run on the lowercased text are case-sensitive: with
+        # IGNORECASE, Unicode case folding would let e.g. 'ſ' match 's'
+        self._compiled: Dict[str, List[Tuple[str, re.Pattern]]] = {
+            fact_type: [
+                (anchor, re.compile(pattern, 0 if fact_type in LOWERCASE_FACTS else re.IGNORECASE))
+                for anchor, pattern in pattern_list
+            ]
+            for fact_type, pattern_list in self.patterns.items()
+        }
+        # Word anchors can overlap each other in the non-overlapping scan,
+        # so positions inside their spans are re-checked
+        self._word_anchors = {
+            name for name in self.anchors if name not in ("number", "dollar")
+        }
+
+    def _collect_positions(self, lowered: str) -> Dict[str, List[int]]:
+        """
+        Scan the lowercased text once and collect candidate start positions
+
+        Args:
+            lowered (str): Lowercased text
+
+        Returns:
+            Dict[str, List[int]]: Sorted start positions per anchor
+        """
+        positions: Dict[str, List[int]] = {name: [] for name in self.anchors}
+        interior: List[int] = []
+
+        for match in self._scanner.finditer(lowered):
+            name = match.lastgroup
+            start, end = match.span()
+            positions[name].append(start)
+            if name in self._word_anchors:
+                interior.extend(range(start + 1, end))
+
+        if interior:
+            # A word anchor hidden inside another one can only start here
+            for name in self._word_anchors:
+                positions[name] = sorted(set(positions[name]).union(interior))
+
+        return positions
+
+    def scan(self, text: str, fact_types: Optional[List[str]] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Extract every fact type from the text in a single pass
+
+        Args:
+            text (str): Text to analyze
+            fact_types (List[str], optional): Only resolve these fact types
+
+        Returns:
+            Dict[str, Optional[Dict]]: Per fact type, None or a dictionary with
+            value, text, start, end and pattern (priority index)
+        """
+        fact_types = fact_types or self.fact_types
+        facts: Dict[str, Optional[Dict]] = {fact_type: None for fact_type in fact_types}
+        if not text:
+            return facts
+
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Offsets would not line up with the original text
+            return self._scan_per_pattern(text, lowered, fact_types)
+
+        positions = self._collect_positions(lowered)
+
+        for fact_type in fact_types:
+            for priority, (anchor, pattern) in enumerate(self._compiled[fact_type]):
+                match = None
+                for pos in positions[anchor]:
+                    match = pattern.match(lowered, pos)
+                    if match:
+                        break
+                if match:
+                    facts[fact_type] = self._build_fact(
+                        fact_type, priority, text, match.start(), match.end(), match.group(1) if pattern.groups else None
+                    )
+                    break
+
+        return facts
+
+    def _scan_per_pattern(self, text: str, lowered: str, fact_types: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Extract facts by searching each pattern separately
+
+        Used for the rare texts whose lowercased form has a different length.
+
+        Args:
+            text (str): Original text
+            lowered (str): Lowercased text
+            fact_types (List[str]): Fact types to resolve
+
+        Returns:
+            Dict[str, Optional[Dict]]: Facts as returned by scan
+        """
+        facts: Dict[str, Optional[Dict]] = {fact_type: None for fact_type in fact_types}
+
+        for fact_type in fact_types:
+            source = lowered if fact_type in LOWERCASE_FACTS else text
+            for priority, (anchor, pattern) in enumerate(self._compiled[fact_type]):
+                match = pattern.search(source)
+                if match:
+                    facts[fact_type] = self._build_fact(
+                        fact_type, priority, source, match.start(), match.end(), match.group(1) if pattern.groups else None
+                    )
+                    break
+
+        return facts
+
+    def _build_fact(self, fact_type: str, priority: int, text: str, start: int, end: int,
+                    first_group: Optional[str]) -> Dict:
+        """
+        Build a fact dictionary from a matched span
+
+        Args:
+            fact_type (str): Fact type the match belongs to
+            priority (int): Index of the pattern that matched
+            text (str): Text the offsets refer to
+            start (int): Start offset of the match
+            end (int): End offset of the match
+            first_group (Optional[str]): First capture group of the match
+
+        Returns:
+            Dict: Fact with value, text and character offsets
+        """
+        matched = text[start:end]
+
+        if fact_type in COUNT_FACTS:
+            value = int(first_group)
+        elif fact_type == "motivation":
+            value = re.sub(r'\s+', ' ', matched.lower()).strip()
+        else:
+            value = matched
+
+        return {
+            'value': value,
+            'text': matched,
+            'start': start,
+            'end': end,
+            'pattern': priority
+        }
+
+    def scan_many(self, texts: List[str]) -> List[Dict[str, Optional[Dict]]]:
+        """
+        Extract facts from multiple texts
+
+        Args:
+            texts (List[str]): Texts to analyze
+
+        Returns:
+            List[Dict[str, Optional[Dict]]]: Facts for each text, in order
+        """
+        return [self.scan(text) for text in texts]
+
+    def scan_csv(self, csv_file_path: str, chunksize: int = 500) -> Iterator[Tuple[str, Dict[str, Optional[Dict]]]]:
+        """
+        Extract facts from the stored full_text of every article in a CSV file
+
+        Args:
+            csv_file_path (str): Path to the CSV file
+            chunksize (int): Rows read per chunk
+
+        Yields:
+            Tuple[str, Dict[str, Optional[Dict]]]: Article URL and its facts
+        """
+        import pandas as pd
+
+        for chunk in pd.read_csv(csv_file_path, usecols=['article_url', 'full_text'],
+                                 chunksize=chunksize):
+            for url, full_text in zip(chunk['article_url'], chunk['full_text']):
+                text = full_text if isinstance(full_text, str) else ''
+                yield url, self.scan(text)
+
+_default_extractor: Optional[FactExtractor] = None
+
+def get_fact_extractor() -> FactExtractor:
+    """
+    Get the shared extractor built from FACT_ANCHORS and FACT_PATTERNS
+
+    Returns:
+        FactExtractor: Process-wide extractor instance
+    """
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = FactExtractor()
+    return _default_extractor
+
+def fact_value(facts: Dict[str, Optional[Dict]], fact_type: str):
+    """
+    Get the value of one fact type from scan results
+
+    Args:
+        facts (Dict[str, Optional[Dict]]): Result of FactExtractor.scan
+        fact_type (str): Fact type to read
+
+    Returns:
+        The extracted value or None
+    """
+    fact = facts.get(fact_type)
+    return fact['value'] if fact else None
+
+def main():
+    """
+    Run the extractor over stored articles and print the facts found
+    """
+    import argparse
+    from config import CSV_FILE_PATH
+
+    parser = argparse.ArgumentParser(description='Single-pass regex fact extraction')
+    parser.add_argument('--csv', type=str, default=CSV_FILE_PATH, help='CSV file to scan')
+    parser.add_argument('--text', type=str, help='Scan this text instead of the CSV file')
+
+    args = parser.parse_args()
+    extractor = get_fact_extractor()
+
+    if args.text:
+        for fact_type, fact in extractor.scan(args.text).items():
+            print(f"{fact_type}: {fact}")
+        return
+
+    totals = {fact_type: 0 for fact_type in extractor.fact_types}
+    articles = 0
+    for url, facts in extractor.scan_csv(args.csv):
+        articles += 1
+        for fact_type, fact in facts.items():
+            if fact:
+                totals[fact_type] += 1
+
+    print(f"Scanned {articles} articles")
+    for fact_type, count in totals.items():
+        print(f"  {fact_type}: {count}")
+
+if __name__ == "__main__":
+    main()
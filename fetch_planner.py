@@ -0,0 +1,147 @@
+"""
+Fetch planner for the Crime Data Scraper
+Ranks candidate article links from all sources by how valuable they are
+likely to be, and picks the ones to fetch under per-run and per-source budgets
+"""
+
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+from utils import crime_keyword_patterns
+from config import (
+    FETCH_PRIORITY_WEIGHTS, FETCH_BUDGET_GLOBAL, FETCH_BUDGET_PER_SOURCE, FETCH_YIELD_HISTORY_RUNS, FETCH_RECENCY_HALF_LIFE_DAYS
+)
+
+# Dates in article URLs, e.g. /2025/08/04/ or /2025-08-04-
+URL_DATE_PATTERN = re.compile(r'/(20\d\d)[/-](0[1-9]|1[0-2])(?:[/-](0[1-9]|[12]\d|3[01]))?(?=[/-])')
+
+class FetchPlanner:
+    """
+    Scores candidate article links and plans the fetch order
+
+    The priority of a link is a weighted sum (FETCH_PRIORITY_WEIGHTS) of:
+      - keywords: strength of the crime keywords in the headline, combined
+        as a noisy-OR of their CRIME_KEYWORD_WEIGHTS, so one strong term beats
+        several weak ones
+      - source_yield: share of the source's recent fetches that were saved,
+        from the run reports (smoothed; sources without history get 0.5)
+      - recency: halves every FETCH_RECENCY_HALF_LIFE_DAYS for dates in the
+        URL, otherwise every 10 places down the hub page
+    """
+
+    def __init__(self, global_budget: Optional[int] = FETCH_BUDGET_GLOBAL,
+                 per_source_budget: Optional[int] = FETCH_BUDGET_PER_SOURCE,
+                 source_yields: Optional[Dict[str, float]] = None):
+        self.global_budget = global_budget
+        self.per_source_budget = per_source_budget
+        self.weights = FETCH_PRIORITY_WEIGHTS
+        self.source_yields = source_yields if source_yields is not None else self._load_source_yields()
+        self.keyword_patterns = crime_keyword_patterns()
+
+    @staticmethod
+    def _load_source_yields() -> Dict[str, float]:
+        from metrics import recent_source_counters
+
+        totals, _ = recent_source_counters(['articles_fetched', 'articles_saved'], FETCH_YIELD_HISTORY_RUNS)
+        fetched, saved = totals['articles_fetched'], totals['articles_saved']
+        return {
+            source: (saved.get(source, 0) + 1) / (count + 2)
+            for source, count in fetched.items()
+        }
+
+    def keyword_score(self, headline: str) -> float:
+        """
+        Score the crime keywords of a headline
+
+        Args:
+            headline (str): Article headline
+
+        Returns:
+            float: 0 (no keyword) to 1
+        """
+        headline = headline.lower()
+        miss = 1.0
+        for pattern, weight in self.keyword_patterns:
+            if pattern.search(headline):
+                miss *= 1.0 - weight
+        return 1.0 - miss
+
+    def recency_score(self, url: str, position: int, now: Optional[float] = None) -> float:
+        """
+        Score how recent an article is likely to be
+
+        Args:
+            url (str): Article URL
+            position (int): Position of the link on its hub page (0 = first)
+            now (float, optional): Current UNIX time
+
+        Returns:
+            float: 0 to 1
+        """
+        match = URL_DATE_PATTERN.search(url)
+        if match:
+            try:
+                published = datetime(int(match.group(1)), int(match.group(2)), int(match.group(3) or 1))
+                age_days = max(0.0, ((now or time.time()) - published.timestamp()) / 86400)
+                return 0.5 ** (age_days / FETCH_RECENCY_HALF_LIFE_DAYS)
+            except ValueError:
+                pass
+        return 0.5 ** (position / 10)
+
+    def score(self, article: Dict, position: int = 0) -> float:
+        """
+        Compute the fetch priority of a candidate article
+
+        Args:
+            article (Dict): Candidate with headline, url and source
+            position (int): Position of the link on its hub page
+
+        Returns:
+            float: Priority score, higher is fetched first
+        """
+        return (
+            self.weights['keywords'] * self.keyword_score(article['headline'])
+            + self.weights['source_yield'] * self.source_yields.get(article['source'], 0.5)
+            + self.weights['recency'] * self.recency_score(article['url'], position)
+        )
+
+    def plan(self, candidates: Dict[str, List[Dict]],
+             already_fetched: Optional[Set[str]] = None) -> Tuple[List[Dict], Dict[str, int]]:
+        """
+        Order candidates by priority and apply the fetch budgets
+
+        Args:
+            candidates (Dict[str, List[Dict]]): Candidate articles per source,
+                in hub page order
+            already_fetched (Set[str], optional): URLs fetched earlier in this
+                run; they count against the budgets but are not planned again
+
+        Returns:
+            Tuple[List[Dict], Dict[str, int]]: Articles to fetch, highest
+                priority first (each with a 'priority'), and the number of
+                candidates per source left out by the budgets
+        """
+        already_fetched = already_fetched or set()
+        scored = []
+        for source, articles in candidates.items():
+            for position, article in enumerate(articles):
+                article['priority'] = round(self.score(article, position), 4)
+                scored.append(article)
+        scored.sort(key=lambda article: -article['priority'])
+
+        planned = []
+        over_budget: Dict[str, int] = {}
+        per_source: Dict[str, int] = {}
+        total = 0
+        for article in scored:
+            source = article['source']
+            if ((self.global_budget is not None and total >= self.global_budget)
+                    or (self.per_source_budget is not None and per_source.get(source, 0) >= self.per_source_budget)):
+                over_budget[source] = over_budget.get(source, 0) + 1
+                continue
+            total += 1
+            per_source[source] = per_source.get(source, 0) + 1
+            if article['url'] not in already_fetched:
+                planned.append(article)
+        return planned, over_budget
@@ -0,0 +1,344 @@
+"""
+Logging for the Crime Data Scraper
+Configured once per process: records go through a queue to a background
+listener that writes the console and a log file rotated by size and time.
+Each file has a single writer; child processes forward their records.
+Repetitive per-article lines are sampled, with a summary of what was dropped,
+and the file can be written as JSON lines.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+from config import (
+    LOG_FILE_PATH, LOG_LEVEL, LOG_MAX_BYTES, LOG_ROTATE_HOURS, LOG_BACKUP_COUNT, LOG_JSON,
+    LOG_SAMPLE_BURST, LOG_SAMPLE_WINDOW, LOG_SAMPLE_EVERY
+)
+
+LOGGER_NAME = 'crime_scraper'
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# LogRecord attributes that are not `extra=` fields
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line
+
+    Fields passed with `extra=` are included as top-level keys.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """
+    Rotating file handler that also rolls over every `rotate_hours`
+
+    Time rollovers happen on interval boundaries counted from local midnight
+    (daily at midnight for 24 hours). A file last written in an earlier
+    interval is rotated on the first record after startup.
+    """
+
+    def __init__(self, filename: str, max_bytes: int = LOG_MAX_BYTES, backup_count: int = LOG_BACKUP_COUNT,
+                 rotate_hours: float = LOG_ROTATE_HOURS):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.interval = rotate_hours * 3600
+        self.rollover_at: Optional[float] = None
+        if self.interval:
+            period_start = self._period_start(time.time())
+            try:
+                stale = os.path.getsize(filename) and os.path.getmtime(filename) < period_start
+            except OSError:
+                stale = False
+            self.rollover_at = time.time() if stale else period_start + self.interval
+
+    def _period_start(self, now: float) -> float:
+        midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        return midnight + ((now - midnight) // self.interval) * self.interval
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rollover_at is not None and record.created >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval:
+            self.rollover_at = self._period_start(time.time()) + self.interval
+
+class _SampledSite:
+    __slots__ = ('window_start', 'seen', 'dropped', 'last')
+
+    def __init__(self, window_start: float):
+        self.window_start = window_start
+        self.seen = 0
+        self.dropped = 0
+        self.last: Optional[logging.LogRecord] = None
+
+class LogSampler:
+    """
+    Samples repetitive log lines per call site
+
+    A call site is one log statement (file and line), so per-article lines
+    such as "Fetching URL: ..." are sampled together however their text
+    differs. Per site and window, the first `burst` records pass, then one in
+    `every`; when the window ends a summary record reports the dropped count.
+    Warnings and errors always pass.
+    """
+
+    def __init__(self, burst: int = LOG_SAMPLE_BURST, window: float = LOG_SAMPLE_WINDOW,
+                 every: int = LOG_SAMPLE_EVERY):
+        self.burst = burst
+        self.window = window
+        self.every = every
+        self._sites: Dict[Tuple[str, int], _SampledSite] = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.time() + window
+
+    def admit(self, record: logging.LogRecord) -> List[logging.LogRecord]:
+        """
+        Decide which records to emit for an incoming record
+
+        Args:
+            record (logging.LogRecord): Incoming record
+
+        Returns:
+            List[logging.LogRecord]: Summaries of finished windows, followed by
+                the record itself unless it is dropped
+        """
+        if not self.burst or record.levelno >= logging.WARNING:
+            return [record]
+
+        now = record.created
+        key = (record.pathname, record.lineno)
+        emitted = []
+        with self._lock:
+            if now >= self._next_sweep:
+                emitted.extend(self._sweep(now))
+                self._next_sweep = now + self.window
+
+            site = self._sites.get(key)
+            if site is None or now - site.window_start >= self.window:
+                if site is not None and site.dropped:
+                    emitted.append(self._summary(site, now))
+                site = self._sites[key] = _SampledSite(now)
+
+            site.seen += 1
+            extra = site.seen - self.burst
+            if extra <= 0 or (self.every and extra % self.every == 0):
+                emitted.append(record)
+            else:
+                site.dropped += 1
+                site.last = record
+        return emitted
+
+    def drain(self) -> List[logging.LogRecord]:
+        """
+        Close every window, returning summaries of the dropped records
+
+        Returns:
+            List[logging.LogRecord]: Summary records
+        """
+        with self._lock:
+            return self._sweep(None)
+
+    def _sweep(self, now: Optional[float]) -> List[logging.LogRecord]:
+        summaries = []
+        for key, site in list(self._sites.items()):
+            if now is None or now - site.window_start >= self.window:
+                if site.dropped:
+                    summaries.append(self._summary(site, now or time.time()))
+                del self._sites[key]
+        return summaries
+
+    def _summary(self, site: _SampledSite, now: float) -> logging.LogRecord:
+        last = site.last
+        record = logging.LogRecord(
+            last.name, last.levelno, last.pathname, last.lineno,
+            "Sampled out %d similar log lines from %s:%d in %.0fs (last: %s)",
+            (site.dropped, os.path.basename(last.pathname), last.lineno,
+             now - site.window_start, last.getMessage()),
+            None, func=last.funcName
+        )
+        record.sampled_out = site.dropped
+        return record
+
+class SamplingQueueHandler(QueueHandler):
+    """
+    Queue handler that passes records through a LogSampler first
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, sampler: LogSampler):
+        super().__init__(log_queue)
+        self.sampler = sampler
+
+    def emit(self, record: logging.LogRecord):
+        for admitted in self.sampler.admit(record):
+            super().emit(admitted)
+
+_lock = threading.Lock()
+_pid: Optional[int] = None
+_role: Optional[str] = None
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[SamplingQueueHandler] = None
+_forward_queue = None
+_forward_listener: Optional[QueueListener] = None
+
+def log_file_path(role: Optional[str] = None) -> str:
+    """
+    Get the log file written by a process role
+
+    Args:
+        role (str, optional): Role of the process, e.g. 'scheduler'
+
+    Returns:
+        str: LOG_FILE_PATH, or logs/scraper.<role>.log for a role
+    """
+    if not role:
+        return LOG_FILE_PATH
+    base, extension = os.path.splitext(LOG_FILE_PATH)
+    return f"{base}.{re.sub(r'[^A-Za-z0-9_.-]+', '_', role)}{extension}"
+
+def configure_logging(role: Optional[str] = None, forward_queue=None) -> logging.Logger:
+    """
+    Set up the scraper logger once per process
+
+    Later calls return the configured logger without touching its handlers
+    or level. A log file must only be written by one process, since a
+    rollover renames it under any other writer: processes started on their
+    own pass a `role` to get their own file, and child processes pass the
+    log_forwarding_queue() of their parent, which writes their records.
+    A forked child forwards to its parent automatically.
+
+    Args:
+        role (str, optional): Process role, see log_file_path
+        forward_queue (multiprocessing.Queue, optional): Send records to
+            the parent process through this queue instead of writing them
+
+    Returns:
+        logging.Logger: The scraper logger
+    """
+    global _pid, _role, _listener, _queue_handler, _forward_queue, _forward_listener
+
+    logger = logging.getLogger(LOGGER_NAME)
+    if _pid == os.getpid():
+        return logger
+
+    with _lock:
+        if _pid == os.getpid():
+            return logger
+        if _queue_handler is not None:
+            # Inherited from the parent process, whose listener threads are not running here
+            logger.removeHandler(_queue_handler)
+            _forward_listener = None
+
+        if forward_queue is not None:
+            _listener = None
+            _forward_queue = log_queue = forward_queue
+        else:
+            text_formatter = logging.Formatter(TEXT_FORMAT)
+
+            file_handler = SizeAndTimeRotatingFileHandler(log_file_path(role))
+            file_handler.setFormatter(JsonFormatter() if LOG_JSON else text_formatter)
+
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(text_formatter)
+
+            log_queue = queue.SimpleQueue()
+            _listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+            _listener.start()
+            _forward_queue = None
+
+        _queue_handler = SamplingQueueHandler(log_queue, LogSampler())
+        logger.setLevel(LOG_LEVEL)
+        logger.addHandler(_queue_handler)
+        _role = role
+        _pid = os.getpid()
+
+    return logger
+
+def log_forwarding_queue():
+    """
+    Get a queue child processes can send their log records through
+
+    Records put on it are written by this process's handlers (or, in a
+    child that forwards itself, by the process that owns the log file).
+    The queue can be passed to spawned and forked processes.
+
+    Returns:
+        multiprocessing.Queue: Queue to pass to configure_logging in a child
+    """
+    global _forward_queue, _forward_listener
+
+    configure_logging()
+    with _lock:
+        if _forward_queue is None:
+            import multiprocessing
+            _forward_queue = multiprocessing.get_context('spawn').Queue()
+            _forward_listener = QueueListener(_forward_queue, *_listener.handlers, respect_handler_level=True)
+            _forward_listener.start()
+        return _forward_queue
+
+def shutdown_logging():
+    """
+    Write the sampling summaries and everything still queued, then stop the listeners
+
+    Registered with atexit; safe to call more than once. In a process that
+    forwards its records, the summaries are sent to the parent.
+    """
+    global _pid, _listener, _forward_listener
+
+    with _lock:
+        if _pid != os.getpid():
+            return
+        for summary in _queue_handler.sampler.drain():
+            QueueHandler.emit(_queue_handler, summary)
+        if _forward_listener is not None:
+            _forward_listener.stop()
+            _forward_listener = None
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+        logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+        _pid = None
+
+def _before_fork():
+    # Children forward to this process, the only writer of its log file
+    if _pid == os.getpid():
+        log_forwarding_queue()
+
+def _after_fork_in_child():
+    # The parent's listener threads do not exist in the child, and the lock
+    # may have been held by another parent thread at fork time
+    global _lock
+    _lock = threading.Lock()
+    if _queue_handler is not None:
+        configure_logging(_role, forward_queue=_forward_queue)
+
+atexit.register(shutdown_logging)
+os.register_at_fork(before=_before_fork, after_in_child=_after_fork_in_child)
@@ -4,71 +4,180 @@ Orchestrates web scraping, NLP processing, and data storage
 """
 
 import argparse
+import os
+import subprocess
 import sys
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict
-from scraper import WebScraper
-from nlp_processor import CrimeNLPProcessor
+from typing import List, Dict, Optional, TYPE_CHECKING
 from utils import setup_logging, ensure_csv_exists, append_to_csv_with_dedup
-from config import NEWS_WEBSITES
+from storage import get_article_store
+from article_text import ArticleText
+from metrics import get_run_metrics
+from deadline import Deadline
+from config import (
+    NEWS_WEBSITES, IMPORT_TIME_BUDGET, HEAVY_MODULES, RUN_DEADLINE_SECONDS, PARTIAL_RUN_EXIT_CODE,
+    FETCH_BUDGET_GLOBAL, FETCH_BUDGET_PER_SOURCE, PREFILTER_ENABLED
+)
+
+if TYPE_CHECKING:
+    from scraper import WebScraper
+    from nlp_processor import CrimeNLPProcessor
+    from crime_prefilter import CrimePreFilter
 
 class CrimeDataScraper:
     """
     Main class that orchestrates the entire crime data scraping process
     """
     
-    def __init__(self):
+    def __init__(self, deadline: Optional[float] = RUN_DEADLINE_SECONDS):
+        """
+        Args:
+            deadline (float, optional): Seconds each full run may take; near
+                the deadline no new fetches are started and the run ends
+                with status 'partial' (None = no deadline)
+        """
         self.logger = setup_logging()
-        self.scraper = WebScraper()
-        self.nlp_processor = CrimeNLPProcessor()
+        self.deadline = deadline
+        # Article fetch budgets per full run and per source (see fetch_planner.py)
+        self.fetch_budget = FETCH_BUDGET_GLOBAL
+        self.source_fetch_budget = FETCH_BUDGET_PER_SOURCE
+        # Subsystems are created on first use so modes like stats never load spaCy
+        self._scraper = None
+        self._nlp_processor = None
+        # Shared by the scraper and the NLP processor, so skipped links are
+        # judged by the threshold that NLP applies
+        self._prefilter = None
+        # Prometheus textfile for run metrics (None = METRICS_TEXTFILE_PATH)
+        self.metrics_textfile = None
+        self.last_report_path = None
+        self.last_status = None
+        # StageProfiler set by --profile
+        self.profiler = None
         self.logger.info("Crime Data Scraper initialized")
     
-    def run_full_scrape(self) -> int:
+    @property
+    def scraper(self) -> 'WebScraper':
+        """
+        Web scraper, created on first use
+        """
+        if self._scraper is None:
+            from scraper import WebScraper
+            self._scraper = WebScraper(prefilter=self.prefilter)
+        return self._scraper
+    
+    @property
+    def prefilter(self) -> Optional['CrimePreFilter']:
+        """
+        Crime pre-filter, created on first use (None when disabled)
+        """
+        if self._prefilter is None and PREFILTER_ENABLED:
+            from crime_prefilter import CrimePreFilter
+            self._prefilter = CrimePreFilter()
+        return self._prefilter
+    
+    @property
+    def nlp_processor(self) -> 'CrimeNLPProcessor':
+        """
+        NLP processor, created (and the spaCy model loaded) on first use
+        """
+        if self._nlp_processor is None:
+            from nlp_processor import CrimeNLPProcessor
+            self._nlp_processor = CrimeNLPProcessor(prefilter=self.prefilter)
+        return self._nlp_processor
+    
+    def run_full_scrape(self, resume: bool = False) -> int:
         """
         Run the complete scraping process for all configured websites
         
+        Progress is checkpointed in the run journal (see run_journal.py):
+        fetched articles with their content, NLP results and save outcomes.
+        With a deadline, sources are scraped by recent yield and fetching
+        and NLP stop early enough to save what was processed; the run then
+        ends with status 'partial' and its leftover work stays in the
+        journal for --resume.
+        Writes a run report with per-stage timings and skipped work when
+        done (see metrics.py).
+        
+        Args:
+            resume (bool): Continue the latest unfinished run, skipping the
+                sources, fetches and NLP work it already completed
+        
         Returns:
             int: Number of articles successfully processed and saved
         """
         self.logger.info("Starting full scrape process")
+        metrics = get_run_metrics()
+        metrics.reset()
+        saved_count = 0
+        status = 'failed'
+        journal = None
+        deadline = Deadline(self.deadline)
         
         try:
             # Ensure CSV file exists
             ensure_csv_exists()
             
-            # Scrape articles from all websites
+            from run_journal import RunJournal
+            journal = RunJournal()
+            journal.start(resume)
+            
+            # Scrape articles from all websites not completed by an earlier attempt
             self.logger.info("Scraping articles from all configured websites")
-            raw_articles = self.scraper.scrape_all_websites()
+            from fetch_planner import FetchPlanner
+            planner = FetchPlanner(self.fetch_budget, self.source_fetch_budget)
+            with self._stage('scrape'):
+                self.scraper.scrape_all_websites(journal, deadline, planner)
             
+            # Everything fetched in this run (including earlier attempts) and not saved yet
+            raw_articles = journal.unsaved_articles()
             if not raw_articles:
                 self.logger.warning("No articles found")
+                status = 'partial' if deadline.hit else 'ok'
                 return 0
             
-            # Process articles with NLP
-            self.logger.info(f"Processing {len(raw_articles)} articles with NLP")
-            processed_articles = self.nlp_processor.process_multiple_articles(raw_articles)
+            # Process articles with NLP, reusing results stored by an earlier attempt
+            processed_articles = [article['processed'] for article in raw_articles if article['processed']]
+            pending = [article for article in raw_articles if not article['processed']]
+            deadline.pending = len(pending)
+            if processed_articles:
+                self.logger.info(f"Reusing {len(processed_articles)} processed articles from the run journal")
+            
+            self.logger.info(f"Processing {len(pending)} articles with NLP")
+            with self._stage('nlp'):
+                processed_articles += self.nlp_processor.process_multiple_articles(
+                    pending, on_processed=journal.record_processed, deadline=deadline
+                )
             
-            # Save to CSV with duplicate detection
-            saved_count = 0
+            # Save to the article store with duplicate detection
             skipped_count = 0
             duplicate_info = []
+            outcomes = {}
             
-            for article in processed_articles:
-                result = append_to_csv_with_dedup(article)
-                
-                if result['success']:
-                    saved_count += 1
-                    if result.get('duplicate_info'):
-                        duplicate_info.append({
-                            'title': article.get('headline', 'Unknown'),
-                            'type': result['duplicate_info']['duplicate_type'],
-                            'reason': result['duplicate_info']['reason']
-                        })
-                elif result.get('skipped'):
-                    skipped_count += 1
-                    self.logger.info(f"Skipped duplicate: {article.get('headline', 'Unknown')} - {result['reason']}")
-                else:
-                    self.logger.error(f"Failed to save article: {article.get('headline', 'Unknown')}")
+            with self._stage('save'), get_article_store().batch():
+                for article in processed_articles:
+                    result = append_to_csv_with_dedup(article)
+                    
+                    if result['success']:
+                        saved_count += 1
+                        outcomes[article['article_url']] = 'saved'
+                        if result.get('duplicate_info'):
+                            duplicate_info.append({
+                                'title': article.get('headline', 'Unknown'),
+                                'type': result['duplicate_info']['duplicate_type'],
+                                'reason': result['duplicate_info']['reason']
+                            })
+                    elif result.get('skipped'):
+                        skipped_count += 1
+                        outcomes[article['article_url']] = 'skipped'
+                        self.logger.info(f"Skipped duplicate: {article.get('headline', 'Unknown')} - {result['reason']}")
+                    else:
+                        outcomes[article['article_url']] = 'failed'
+                        self.logger.error(f"Failed to save article: {article.get('headline', 'Unknown')}")
+            
+            # Recorded after the batch is committed; a crash in between saves
+            # again on resume, which duplicate detection skips
+            journal.mark_saved(outcomes)
             
             # Log summary
             self.logger.info(f"Successfully processed and saved {saved_count} articles")
@@ -77,11 +186,47 @@ class CrimeDataScraper:
             if duplicate_info:
                 self.logger.info(f"Found {len(duplicate_info)} similar articles from different sources (kept both)")
             
+            status = 'ok'
+            if deadline.hit:
+                status = 'partial'
+                skipped = deadline.summary()
+                self.logger.warning(
+                    f"Run deadline of {self.deadline}s reached: {len(skipped['sources_not_started'])} sources "
+                    f"not started, {sum(skipped['articles_not_fetched'].values())} articles not fetched, "
+                    f"{skipped['articles_not_processed']} not processed (kept for --resume)"
+                )
             return saved_count
             
         except Exception as e:
             self.logger.error(f"Error in full scrape process: {str(e)}")
             return 0
+        
+        finally:
+            info = {'deadline': deadline.summary()} if deadline.enabled else {}
+            if self._scraper is not None and self._scraper.last_plan is not None:
+                info['fetch_plan'] = self._scraper.last_plan
+            if journal is not None and journal.run_id is not None:
+                info.update(run_id=journal.run_id, resumed=resume, progress=journal.progress())
+                # A failed or partial run stays open in the journal so it can be resumed
+                if status == 'ok':
+                    journal.finish(status)
+                journal.close()
+            self._write_run_report('full', status, saved_count, **info)
+    
+    @contextmanager
+    def _stage(self, name: str):
+        """
+        Time a pipeline stage, and profile it when profiling is enabled
+        
+        Args:
+            name (str): Stage name ('scrape', 'nlp' or 'save')
+        """
+        with get_run_metrics().stage(f'run.{name}'):
+            if self.profiler is None:
+                yield
+            else:
+                with self.profiler.stage(name):
+                    yield
     
     def run_single_website_scrape(self, website_name: str) -> int:
         """
@@ -94,6 +239,10 @@ class CrimeDataScraper:
             int: Number of articles successfully processed and saved
         """
         self.logger.info(f"Starting scrape for website: {website_name}")
+        metrics = get_run_metrics()
+        metrics.reset()
+        saved_count = 0
+        status = 'failed'
         
         try:
             # Ensure CSV file exists
@@ -112,6 +261,9 @@ class CrimeDataScraper:
             
             # Scrape articles from the specified website
             raw_articles = self.scraper.extract_article_links(website_config)
+            if self.scraper.last_links_failed:
+                self.logger.error(f"Could not fetch the article list of {website_name}")
+                return 0
             
             # Get full content for each article
             full_articles = []
@@ -119,38 +271,69 @@ class CrimeDataScraper:
                 content = self.scraper.extract_article_content(article['url'], website_config)
                 if content:
                     article['content'] = content
+                    article['article_text'] = ArticleText(article['headline'], content)
                     full_articles.append(article)
             
+            if raw_articles and not full_articles:
+                # Links were found but no article could be fetched (blocked or down)
+                self.logger.error(f"Could not fetch any of the {len(raw_articles)} articles of {website_name}")
+                return 0
+            
             if not full_articles:
                 self.logger.warning(f"No articles found for {website_name}")
+                status = 'ok'
                 return 0
             
             # Process articles with NLP
             processed_articles = self.nlp_processor.process_multiple_articles(full_articles)
             
-            # Save to CSV with duplicate detection
-            saved_count = 0
+            # Save to the article store with duplicate detection
             skipped_count = 0
             
-            for article in processed_articles:
-                result = append_to_csv_with_dedup(article)
-                
-                if result['success']:
-                    saved_count += 1
-                elif result.get('skipped'):
-                    skipped_count += 1
-                    self.logger.info(f"Skipped duplicate from {website_name}: {article.get('headline', 'Unknown')}")
+            with get_article_store().batch():
+                for article in processed_articles:
+                    result = append_to_csv_with_dedup(article)
+                    
+                    if result['success']:
+                        saved_count += 1
+                    elif result.get('skipped'):
+                        skipped_count += 1
+                        self.logger.info(f"Skipped duplicate from {website_name}: {article.get('headline', 'Unknown')}")
             
             if skipped_count > 0:
                 self.logger.info(f"Successfully processed and saved {saved_count} articles from {website_name} (skipped {skipped_count} duplicates)")
             else:
                 self.logger.info(f"Successfully processed and saved {saved_count} articles from {website_name}")
             
+            status = 'ok'
             return saved_count
             
         except Exception as e:
             self.logger.error(f"Error scraping {website_name}: {str(e)}")
             return 0
+        
+        finally:
+            self._write_run_report('single', status, saved_count, website=website_name)
+    
+    def _write_run_report(self, mode: str, status: str, saved_count: int, **info):
+        """
+        Write the run report and the optional Prometheus textfile
+        
+        Args:
+            mode (str): Run mode ('full' or 'single')
+            status (str): 'ok', 'partial' or 'failed'
+            saved_count (int): Number of articles saved
+            **info: Extra run information for the report
+        """
+        self.last_status = status
+        metrics = get_run_metrics()
+        metrics.finish(mode=mode, status=status, articles_saved=saved_count, **info)
+        try:
+            self.last_report_path = metrics.write_report()
+            metrics.write_prometheus(self.metrics_textfile)
+            self.logger.info(f"Run report written to {self.last_report_path}")
+        except OSError as e:
+            self.logger.error(f"Could not write run report: {str(e)}")
     
     def test_configuration(self) -> bool:
         """
@@ -193,58 +376,110 @@ class CrimeDataScraper:
     
     def get_statistics(self) -> Dict:
         """
-        Get statistics about the scraped data
+        Get statistics about the scraped data from the statistics rollup
+        
+        The rollup is rebuilt from the article store only if it is missing
+        or out of date.
         
         Returns:
             Dict: Statistics about the scraped articles
         """
         try:
-            import pandas as pd
-            from config import CSV_FILE_PATH
-            
-            df = pd.read_csv(CSV_FILE_PATH)
-            
-            stats = {
-                'total_articles': len(df),
-                'date_range': {
-                    'earliest': df['date_scraped'].min(),
-                    'latest': df['date_scraped'].max()
-                },
-                'crime_types': df['what'].value_counts().to_dict() if 'what' in df.columns else {},
-                'locations': df['where'].value_counts().head(10).to_dict() if 'where' in df.columns else {},
-                'articles_with_injuries': len(df[df['injuries'] != '']) if 'injuries' in df.columns else 0,
-                'articles_with_fatalities': len(df[df['fatalities'] != '']) if 'fatalities' in df.columns else 0,
-                'articles_with_arrests': len(df[df['arrests'] != '']) if 'arrests' in df.columns else 0,
-                'duplicate_stats': {
-                    'total_with_hashes': len(df[df['content_hash'].notna()]) if 'content_hash' in df.columns else 0,
-                    'articles_marked_similar': len(df[df['duplicate_note'].notna()]) if 'duplicate_note' in df.columns else 0,
-                    'unique_content_hashes': len(df['content_hash'].dropna().unique()) if 'content_hash' in df.columns else 0,
-                    'unique_similarity_hashes': len(df['similarity_hash'].dropna().unique()) if 'similarity_hash' in df.columns else 0
-                }
-            }
-            
+            from stats_rollup import get_current_statistics
+            from near_duplicates import get_near_duplicate_index
+            from story_clusters import get_story_cluster_index
+            stats = get_current_statistics(get_article_store())
+            stats['near_duplicate_stats'] = get_near_duplicate_index().summary()
+            stats['event_stats'] = get_story_cluster_index().summary()
             return stats
             
         except Exception as e:
             self.logger.error(f"Error getting statistics: {str(e)}")
             return {}
 
+def check_import_budget(budget: float = IMPORT_TIME_BUDGET) -> Dict:
+    """
+    Measure the import time of main.py in a fresh interpreter
+    
+    Args:
+        budget (float): Maximum allowed import time in seconds
+        
+    Returns:
+        Dict: Import time, heavy modules imported eagerly and whether the
+        budget was met
+    """
+    probe = (
+        "import sys, main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', probe],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    
+    # -X importtime lines: "import time: self [us] | cumulative | package"
+    import_seconds = 0.0
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == 'main':
+            import_seconds = int(parts[1].strip()) / 1_000_000
+    
+    heavy_modules = [m for m in result.stdout.strip().split(',') if m]
+    
+    return {
+        'import_seconds': import_seconds,
+        'budget_seconds': budget,
+        'heavy_modules': heavy_modules,
+        'within_budget': result.returncode == 0 and import_seconds <= budget and not heavy_modules
+    }
+
 def main():
     """
     Main function to run the crime data scraper with command line interface
     """
     parser = argparse.ArgumentParser(description='Crime Data Scraper')
-    parser.add_argument('--mode', choices=['full', 'single', 'test', 'stats', 'dedup-test'], 
+    parser.add_argument('--mode', choices=['full', 'single', 'test', 'stats', 'dedup-test', 'import-check'], 
                        default='full', help='Scraping mode')
     parser.add_argument('--website', type=str, help='Website name for single mode')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--metrics-textfile', type=str,
+                       help='Also write run metrics to this Prometheus textfile')
+    parser.add_argument('--deadline', type=float, default=RUN_DEADLINE_SECONDS, metavar='SECONDS',
+                       help='Wind a full run down within this many seconds, saving what was processed')
+    parser.add_argument('--fetch-budget', type=int, default=FETCH_BUDGET_GLOBAL, metavar='N',
+                       help='Fetch at most N articles per full run, highest priority first')
+    parser.add_argument('--source-fetch-budget', type=int, default=FETCH_BUDGET_PER_SOURCE, metavar='N',
+                       help='Fetch at most N articles per source in a full run')
+    parser.add_argument('--resume', action='store_true',
+                       help='Resume the latest unfinished full run from the run journal')
+    parser.add_argument('--profile', nargs='?', const='', metavar='DIR',
+                       help='Profile CPU and allocations per stage of a full run '
+                            '(output in DIR, default logs/profiles/<timestamp>)')
     
     args = parser.parse_args()
     
     # Initialize the scraper
-    scraper = CrimeDataScraper()
+    scraper = CrimeDataScraper(deadline=args.deadline)
+    scraper.metrics_textfile = args.metrics_textfile
+    scraper.fetch_budget = args.fetch_budget
+    scraper.source_fetch_budget = args.source_fetch_budget
+    
+    if args.mode == 'import-check':
+        print("Checking import time...")
+        report = check_import_budget()
+        print(f"Import time: {report['import_seconds']:.3f}s (budget {report['budget_seconds']:.3f}s)")
+        if report['heavy_modules']:
+            print(f"Heavy modules imported at startup: {', '.join(report['heavy_modules'])}")
+        if report['within_budget']:
+            print("✓ Import time within budget")
+            sys.exit(0)
+        else:
+            print("✗ Import time budget exceeded")
+            sys.exit(1)
     
-    if args.mode == 'test':
+    elif args.mode == 'test':
         print("Testing configuration...")
         success = scraper.test_configuration()
         if success:
@@ -256,8 +491,18 @@ def main():
     
     elif args.mode == 'dedup-test':
         print("Testing duplicate detection system...")
-        print("Note: This feature requires a separate test file to be implemented.")
-        print("The duplicate detection functionality is integrated into the main scraper.")
+        # Runs in a separate process with a temporary data directory, so the
+        # synthetic articles never reach the real article store
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        result = subprocess.run(
+            [sys.executable, os.path.join(package_dir, 'benchmark.py'), '--dedup-check'],
+            cwd=package_dir
+        )
+        if result.returncode == 0:
+            print("✓ Duplicate detection check passed")
+        else:
+            print("✗ Duplicate detection check failed")
+        sys.exit(result.returncode)
     
     elif args.mode == 'stats':
         print("Generating statistics...")
@@ -269,6 +514,7 @@ def main():
             print(f"Articles with Injuries: {stats.get('articles_with_injuries', 0)}")
             print(f"Articles with Fatalities: {stats.get('articles_with_fatalities', 0)}")
             print(f"Articles with Arrests: {stats.get('articles_with_arrests', 0)}")
+            print(f"Total Injuries: {stats.get('total_injuries', 0)}, Fatalities: {stats.get('total_fatalities', 0)}, Arrests: {stats.get('total_arrests', 0)}")
             
             # Duplicate detection stats
             dup_stats = stats.get('duplicate_stats', {})
@@ -279,6 +525,19 @@ def main():
                 print(f"Unique Content Signatures: {dup_stats.get('unique_content_hashes', 0)}")
                 print(f"Unique Similarity Signatures: {dup_stats.get('unique_similarity_hashes', 0)}")
             
+            near_dup_stats = stats.get('near_duplicate_stats', {})
+            if near_dup_stats:
+                print(f"Near-Duplicate Groups: {near_dup_stats.get('near_duplicate_groups', 0)} "
+                      f"from {near_dup_stats.get('indexed_articles', 0)} indexed articles "
+                      f"(Jaccard >= {near_dup_stats.get('jaccard_threshold')})")
+                print(f"Articles with Near-Duplicates: {near_dup_stats.get('articles_with_near_duplicates', 0)}")
+            
+            event_stats = stats.get('event_stats', {})
+            if event_stats:
+                print(f"Events: {event_stats.get('events', 0)} "
+                      f"({event_stats.get('articles_in_shared_events', 0)} articles in multi-article events, "
+                      f"largest {event_stats.get('largest_event_size', 0)})")
+            
             print("\nTop Crime Types:")
             for crime_type, count in list(stats.get('crime_types', {}).items())[:5]:
                 if crime_type:
@@ -288,6 +547,10 @@ def main():
             for location, count in list(stats.get('locations', {}).items())[:5]:
                 if location:
                     print(f"  {location}: {count}")
+            
+            print("\nArticles per Source:")
+            for source, count in stats.get('sources', {}).items():
+                print(f"  {source}: {count}")
         else:
             print("No statistics available")
     
@@ -299,16 +562,31 @@ def main():
         print(f"Scraping website: {args.website}")
         count = scraper.run_single_website_scrape(args.website)
         print(f"Processed {count} articles")
+        if scraper.last_report_path:
+            print(f"Run report: {scraper.last_report_path}")
     
     else:  # full mode
         print("Starting full scrape...")
+        if args.profile is not None:
+            from profiling import StageProfiler
+            scraper.profiler = StageProfiler(args.profile)
+        
         start_time = datetime.now()
-        count = scraper.run_full_scrape()
+        count = scraper.run_full_scrape(resume=args.resume)
         end_time = datetime.now()
         duration = end_time - start_time
         
         print(f"Scraping completed in {duration}")
         print(f"Processed {count} articles")
+        if scraper.last_report_path:
+            print(f"Run report: {scraper.last_report_path}")
+        if scraper.profiler is not None:
+            summary_path = scraper.profiler.write_summary()
+            print(f"Profile: {scraper.profiler.output_dir} (summary in {os.path.basename(summary_path)})")
+        if scraper.last_status == 'partial':
+            print("Run stopped at its deadline; skipped work is listed in the run report "
+                  "(continue it with --resume)")
+            sys.exit(PARTIAL_RUN_EXIT_CODE)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,358 @@
+"""
+Run metrics for the Crime Data Scraper
+Per-stage latency histograms and counters, broken down by source, written
+as a JSON run report and optionally as a Prometheus textfile
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from config import METRICS_LATENCY_BUCKETS, RUN_REPORT_DIR, RUN_REPORT_KEEP, METRICS_TEXTFILE_PATH
+
+class StageStats:
+    """
+    Latency histogram of one stage (and source)
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self, bucket_count: int):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+        # Non-cumulative counts per bucket; the last one is +Inf
+        self.buckets = [0] * (bucket_count + 1)
+
+    def observe(self, seconds: float, bounds: Tuple[float, ...]):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for index, bound in enumerate(bounds):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def merge(self, other: 'StageStats'):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def quantile(self, q: float, bounds: Tuple[float, ...]) -> float:
+        """
+        Estimate a quantile by linear interpolation within its bucket
+
+        Args:
+            q (float): Quantile between 0 and 1
+            bounds (Tuple[float, ...]): Bucket upper bounds
+
+        Returns:
+            float: Estimated latency in seconds
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(self.buckets):
+            upper = bounds[index] if index < len(bounds) else self.max
+            if count and seen + count >= rank:
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(max(estimate, self.min), self.max)
+            seen += count
+            lower = upper
+        return self.max
+
+    def to_dict(self, bounds: Tuple[float, ...]) -> Dict:
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0.0,
+            'min_seconds': round(self.min, 6) if self.count else 0.0,
+            'max_seconds': round(self.max, 6),
+            'p50_seconds': round(self.quantile(0.5, bounds), 6),
+            'p95_seconds': round(self.quantile(0.95, bounds), 6),
+            'buckets': {
+                (str(bound) if index < len(bounds) else '+Inf'): count
+                for index, (bound, count) in enumerate(zip(list(bounds) + [None], self.buckets))
+            }
+        }
+
+class RunMetrics:
+    """
+    Collects stage latencies and counters for one scraper run
+
+    Stages are timed with `with metrics.stage('fetch', source):`. Each
+    (stage, source) pair keeps a fixed-bucket histogram, so recording is
+    cheap and memory does not grow with the number of articles.
+    """
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.bounds = tuple(sorted(buckets or METRICS_LATENCY_BUCKETS))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+        Start a new run, dropping everything recorded so far
+        """
+        with self._lock:
+            self.started_at = datetime.now()
+            self.finished_at: Optional[datetime] = None
+            self._stages: Dict[Tuple[str, str], StageStats] = {}
+            self._counters: Dict[Tuple[str, str], int] = {}
+            self.info: Dict = {}
+
+    @contextmanager
+    def stage(self, name: str, source: Optional[str] = None):
+        """
+        Time a block of code as one observation of a stage
+
+        Args:
+            name (str): Stage name, e.g. 'fetch' or 'nlp.entities'
+            source (str, optional): Source website name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, source)
+
+    def observe(self, name: str, seconds: float, source: Optional[str] = None):
+        """
+        Record one stage latency
+
+        Args:
+            name (str): Stage name
+            seconds (float): Elapsed seconds
+            source (str, optional): Source website name
+        """
+        key = (name, source or '')
+        with self._lock:
+            stats = self._stages.get(key)
+            if stats is None:
+                stats = self._stages[key] = StageStats(len(self.bounds))
+            stats.observe(seconds, self.bounds)
+
+    def increment(self, name: str, source: Optional[str] = None, value: int = 1):
+        """
+        Increase a counter
+
+        Args:
+            name (str): Counter name, e.g. 'articles_saved'
+            source (str, optional): Source website name
+            value (int): Amount to add
+        """
+        key = (name, source or '')
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def finish(self, **info):
+        """
+        Mark the run as finished
+
+        Args:
+            **info: Extra run information for the report (e.g. mode, status)
+        """
+        self.finished_at = datetime.now()
+        self.info.update(info)
+
+    def report(self) -> Dict:
+        """
+        Build the run report
+
+        Returns:
+            Dict: Run information, per-stage latency summaries (overall and
+                per source) and counters
+        """
+        with self._lock:
+            stage_items = list(self._stages.items())
+            counter_items = list(self._counters.items())
+
+        stages: Dict[str, Dict] = {}
+        totals: Dict[str, StageStats] = {}
+        for (name, source), stats in sorted(stage_items):
+            total = totals.setdefault(name, StageStats(len(self.bounds)))
+            total.merge(stats)
+            if source:
+                stages.setdefault(name, {'sources': {}})['sources'][source] = stats.to_dict(self.bounds)
+        for name, total in totals.items():
+            stages.setdefault(name, {'sources': {}}).update(total.to_dict(self.bounds))
+
+        counters: Dict[str, Dict] = {}
+        for (name, source), value in sorted(counter_items):
+            counter = counters.setdefault(name, {'total': 0, 'sources': {}})
+            counter['total'] += value
+            if source:
+                counter['sources'][source] = value
+
+        finished_at = self.finished_at or datetime.now()
+        return {
+            'started_at': self.started_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'finished_at': finished_at.strftime("%Y-%m-%d %H:%M:%S"),
+            'duration_seconds': round((finished_at - self.started_at).total_seconds(), 3),
+            **self.info,
+            'stages': stages,
+            'counters': counters
+        }
+
+    def write_report(self, path: Optional[str] = None) -> str:
+        """
+        Write the run report as JSON
+
+        Args:
+            path (str, optional): Output file; defaults to a timestamped file
+                in RUN_REPORT_DIR, keeping the newest RUN_REPORT_KEEP reports
+
+        Returns:
+            str: Path of the written report
+        """
+        prune = path is None
+        if path is None:
+            path = os.path.join(RUN_REPORT_DIR, f"run_{self.started_at.strftime('%Y%m%d_%H%M%S_%f')}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        os.replace(temp_path, path)
+
+        if prune:
+            reports = sorted(name for name in os.listdir(RUN_REPORT_DIR)
+                             if name.startswith('run_') and name.endswith('.json'))
+            for name in reports[:-RUN_REPORT_KEEP]:
+                os.remove(os.path.join(RUN_REPORT_DIR, name))
+        return path
+
+    def prometheus_text(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format
+
+        Returns:
+            str: Histograms of stage latencies and counter totals
+        """
+        with self._lock:
+            stage_items = sorted(self._stages.items())
+            counter_items = sorted(self._counters.items())
+
+        lines = [
+            '# HELP crime_scraper_stage_seconds Latency of scraper pipeline stages',
+            '# TYPE crime_scraper_stage_seconds histogram'
+        ]
+        for (name, source), stats in stage_items:
+            labels = f'stage="{_escape(name)}",source="{_escape(source)}"'
+            cumulative = 0
+            for bound, count in zip(list(self.bounds) + ['+Inf'], stats.buckets):
+                cumulative += count
+                lines.append(f'crime_scraper_stage_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'crime_scraper_stage_seconds_sum{{{labels}}} {stats.total:.6f}')
+            lines.append(f'crime_scraper_stage_seconds_count{{{labels}}} {stats.count}')
+
+        lines.append('# HELP crime_scraper_events_total Counted scraper events')
+        lines.append('# TYPE crime_scraper_events_total counter')
+        for (name, source), value in counter_items:
+            lines.append(f'crime_scraper_events_total{{event="{_escape(name)}",source="{_escape(source)}"}} {value}')
+
+        lines.append('# HELP crime_scraper_last_run_timestamp_seconds Finish time of the last run')
+        lines.append('# TYPE crime_scraper_last_run_timestamp_seconds gauge')
+        lines.append(f'crime_scraper_last_run_timestamp_seconds {(self.finished_at or datetime.now()).timestamp():.0f}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Write a Prometheus textfile (for the node_exporter textfile collector)
+
+        Args:
+            path (str, optional): Output file; defaults to METRICS_TEXTFILE_PATH
+
+        Returns:
+            Optional[str]: Path of the written file, or None if no path is configured
+        """
+        path = path or METRICS_TEXTFILE_PATH
+        if not path:
+            return None
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+        # The collector may read at any time, so replace the file atomically
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, path)
+        return path
+
+def recent_source_counters(names: List[str], runs: int = 20,
+                           report_dir: Optional[str] = None) -> Tuple[Dict[str, Dict[str, int]], int]:
+    """
+    Sum counters per source over the latest run reports
+
+    Args:
+        names (List[str]): Counter names, e.g. ['articles_saved']
+        runs (int): Number of most recent reports to use
+        report_dir (str, optional): Report directory (default RUN_REPORT_DIR)
+
+    Returns:
+        Tuple[Dict[str, Dict[str, int]], int]: Totals by counter name and
+            source name, and the number of reports read
+    """
+    report_dir = report_dir or RUN_REPORT_DIR
+    totals: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    try:
+        files = sorted(name for name in os.listdir(report_dir)
+                       if name.startswith('run_') and name.endswith('.json'))[-runs:]
+    except OSError:
+        return totals, 0
+
+    used = 0
+    for file_name in files:
+        try:
+            with open(os.path.join(report_dir, file_name), 'r', encoding='utf-8') as f:
+                counters = json.load(f).get('counters', {})
+        except (OSError, ValueError):
+            continue
+        used += 1
+        for name in names:
+            for source, count in counters.get(name, {}).get('sources', {}).items():
+                totals[name][source] = totals[name].get(source, 0) + count
+    return totals, used
+
+def recent_source_yields(runs: int = 20, report_dir: Optional[str] = None) -> Dict[str, float]:
+    """
+    Average articles saved per run for each source over the latest run reports
+
+    Args:
+        runs (int): Number of most recent reports to use
+        report_dir (str, optional): Report directory (default RUN_REPORT_DIR)
+
+    Returns:
+        Dict[str, float]: Articles saved per run by source name (sources
+            without saved articles are missing)
+    """
+    totals, used = recent_source_counters(['articles_saved'], runs, report_dir)
+    if not used:
+        return {}
+    return {source: total / used for source, total in totals['articles_saved'].items()}
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+_metrics: Optional[RunMetrics] = None
+
+def get_run_metrics() -> RunMetrics:
+    """
+    Get the metrics of the current run, shared within the process
+
+    Returns:
+        RunMetrics: Metrics collector
+    """
+    global _metrics
+    if _metrics is None:
+        _metrics = RunMetrics()
+    return _metrics
@@ -0,0 +1,339 @@
+"""
+One-off hash backfill for legacy CSV rows
+Computes content_hash and similarity_hash for rows saved before duplicate
+detection existed, in parallel over chunks, and rewrites the CSV atomically.
+Interrupted runs resume where they stopped.
+"""
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from utils import setup_logging, generate_content_hash, check_duplicate_article
+from csv_writer import CSVBatchWriter
+from config import (
+    CSV_FILE_PATH, CSV_COLUMNS,
+    HASH_MIGRATION_CHUNK_SIZE, HASH_MIGRATION_WORKERS
+)
+
+def _normalize(values):
+    """
+    Vectorized equivalent of clean_text(value).lower().strip()
+
+    Args:
+        values (pandas.Series): Raw text values
+
+    Returns:
+        pandas.Series: Normalized text ('' for missing values)
+    """
+    return (
+        values.fillna('').astype(str)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.replace(r'["\n\r\t]', ' ', regex=True)
+        .str.strip()
+        .str.lower()
+        .str.strip()
+    )
+
+def hash_chunk(rows: List[Tuple[str, str, str]]) -> List[Tuple[str, bytes]]:
+    """
+    Compute content hashes and MinHash signatures for a chunk of articles
+
+    Runs in worker processes. Text normalization is vectorized over the
+    chunk; the results equal generate_content_hash() row by row.
+
+    Args:
+        rows (List[Tuple[str, str, str]]): (headline, full_text, source) per article
+
+    Returns:
+        List[Tuple[str, bytes]]: (content_hash, signature bytes) per article
+    """
+    import pandas as pd
+    from near_duplicates import MinHasher, shingles
+
+    if not rows:
+        return []
+
+    frame = pd.DataFrame(rows, columns=['headline', 'full_text', 'source'])
+    titles = _normalize(frame['headline'])
+    contents = _normalize(frame['full_text'])
+    sources = frame['source'].fillna('')
+
+    content_strings = (titles + '||' + contents).where(sources == '', sources + '||' + titles + '||' + contents)
+    content_hashes = [hashlib.sha256(value.encode('utf-8')).hexdigest() for value in content_strings]
+
+    hasher = MinHasher()
+    signatures = [
+        hasher.signature(shingles(f"{title or ''} {content or ''}")).tobytes()
+        for title, content, _ in rows
+    ]
+
+    return list(zip(content_hashes, signatures))
+
+class HashMigration:
+    """
+    Backfills content_hash and similarity_hash in a CSV file
+
+    Rows are read in chunks, hashed in worker processes and appended to a
+    temporary file next to the CSV, which is fsynced after every chunk.
+    Progress is recorded in a state file, so an interrupted run continues
+    from the last completed chunk. The original file is only replaced after
+    the result has been verified.
+
+    content_hash is computed like append_to_csv_with_dedup computes it for
+    processed articles, which carry no source name, so a backfilled row is
+    recognized as an exact duplicate when the article is scraped again.
+    similarity_hash is the MinHash near-duplicate group id assigned through
+    the LSH index.
+    """
+
+    def __init__(self, csv_file_path: Optional[str] = None, chunksize: int = HASH_MIGRATION_CHUNK_SIZE,
+                 workers: int = HASH_MIGRATION_WORKERS, rehash_similarity: bool = False):
+        self.logger = setup_logging()
+        self.csv_file_path = csv_file_path or CSV_FILE_PATH
+        self.chunksize = chunksize
+        self.workers = workers or os.cpu_count() or 1
+        self.rehash_similarity = rehash_similarity
+
+        directory = os.path.dirname(os.path.abspath(self.csv_file_path))
+        name = os.path.basename(self.csv_file_path)
+        self.temp_path = os.path.join(directory, f".{name}.migrating")
+        self.state_path = os.path.join(directory, f".{name}.migrate.json")
+
+    def _source_fingerprint(self) -> Dict:
+        stat = os.stat(self.csv_file_path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def _load_state(self) -> Optional[Dict]:
+        """
+        Load the progress of an interrupted run on the same input file
+        """
+        if not os.path.exists(self.state_path) or not os.path.exists(self.temp_path):
+            return None
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('source') != self._source_fingerprint():
+            self.logger.info("CSV changed since the interrupted migration, starting over")
+            return None
+        return state
+
+    def _save_state(self, state: Dict):
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    @staticmethod
+    def _dedup_source(row: Dict) -> str:
+        # The source append_to_csv_with_dedup hashes with: stored rows have no
+        # source column, so this is '' like for every processed article
+        source = row.get('source')
+        return source if isinstance(source, str) else ''
+
+    def _needs_hashes(self, chunk) -> Tuple:
+        """
+        Select rows that need a content hash or a similarity hash
+
+        Returns:
+            tuple: (mask of rows to hash, mask of rows needing a similarity hash)
+        """
+        hashable = chunk['headline'].notna() & chunk['full_text'].notna()
+        if self.rehash_similarity:
+            return hashable, hashable
+
+        missing_similarity = chunk['similarity_hash'].isna()
+        return hashable & (chunk['content_hash'].isna() | missing_similarity), hashable & missing_similarity
+
+    def _iter_chunks(self, skip_chunks: int = 0):
+        import pandas as pd
+
+        for index, chunk in enumerate(pd.read_csv(self.csv_file_path, chunksize=self.chunksize, dtype=str)):
+            if index < skip_chunks:
+                continue
+            for column in CSV_COLUMNS:
+                if column not in chunk.columns:
+                    chunk[column] = None
+            yield chunk
+
+    def _apply(self, chunk, results, index) -> int:
+        """
+        Write hash results into a chunk, assigning near-duplicate groups in file order
+
+        Returns:
+            int: Number of rows that were changed
+        """
+        import numpy as np
+
+        needs, needs_similarity = self._needs_hashes(chunk)
+        positions = np.flatnonzero(needs.to_numpy())
+        for position, (content_hash, signature) in zip(positions, results):
+            row = chunk.index[position]
+            if not isinstance(chunk.at[row, 'content_hash'], str):
+                chunk.at[row, 'content_hash'] = content_hash
+            signature = np.frombuffer(signature, dtype=np.uint32)
+            if needs_similarity[row]:
+                match = index.query(signature)
+                chunk.at[row, 'similarity_hash'] = match['group_id'] if match else index.group_id_for(signature)
+            index.add(chunk.at[row, 'content_hash'], signature, chunk.at[row, 'similarity_hash'])
+        return len(positions)
+
+    def run(self) -> Dict:
+        """
+        Run (or resume) the migration and replace the CSV when verified
+
+        Returns:
+            Dict: rows, updated rows, elapsed seconds and verification result
+        """
+        from near_duplicates import get_near_duplicate_index
+
+        if not os.path.exists(self.csv_file_path):
+            raise FileNotFoundError(self.csv_file_path)
+
+        state = self._load_state()
+        if state:
+            self.logger.info(f"Resuming hash migration after {state['rows']} rows")
+            with open(self.temp_path, 'rb+') as f:
+                f.truncate(state['temp_size'])
+        else:
+            state = {'source': self._source_fingerprint(), 'chunks': 0, 'rows': 0,
+                     'updated': 0, 'temp_size': 0}
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+        index = get_near_duplicate_index()
+        writer = CSVBatchWriter(self.temp_path, batch_size=self.chunksize)
+        writer.ensure_header()
+        start_time = time.time()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            pending = []
+
+            def finish_oldest():
+                chunk, future = pending.pop(0)
+                state['updated'] += self._apply(chunk, future.result(), index)
+                writer.write_many(chunk.to_dict('records'))
+                writer.commit()
+                state['chunks'] += 1
+                state['rows'] += len(chunk)
+                state['temp_size'] = os.path.getsize(self.temp_path)
+                self._save_state(state)
+
+                elapsed = time.time() - start_time
+                self.logger.info(f"Hash migration: {state['rows']} rows done, "
+                                 f"{state['updated']} updated ({elapsed:.1f}s)")
+
+            for chunk in self._iter_chunks(skip_chunks=state['chunks']):
+                needs, _ = self._needs_hashes(chunk)
+                rows = [
+                    (row['headline'], row['full_text'], self._dedup_source(row))
+                    for row in chunk[needs].to_dict('records')
+                ]
+                pending.append((chunk, executor.submit(hash_chunk, rows)))
+
+                # Keep a bounded number of chunks in flight
+                if len(pending) >= self.workers * 2:
+                    finish_oldest()
+
+            while pending:
+                finish_oldest()
+
+        verification = self.verify()
+        if not verification['ok']:
+            self.logger.error(f"Hash migration verification failed: {verification['errors']}")
+            return {'rows': state['rows'], 'updated': state['updated'],
+                    'seconds': time.time() - start_time, 'verification': verification}
+
+        os.replace(self.temp_path, self.csv_file_path)
+        os.remove(self.state_path)
+        self.logger.info(f"Hash migration complete: {state['updated']} of {state['rows']} rows updated")
+        return {'rows': state['rows'], 'updated': state['updated'],
+                'seconds': time.time() - start_time, 'verification': verification}
+
+    def verify(self, sample_size: int = 200) -> Dict:
+        """
+        Check the migrated file against the original
+
+        Verifies that the row count and all non-hash columns are unchanged,
+        that every row with a headline and full text has both hashes, that a
+        sample of recomputed content hashes matches the scalar
+        generate_content_hash(), and that saving a sampled backfilled row
+        again through the live duplicate check finds it as an exact duplicate.
+
+        Args:
+            sample_size (int): Rows per chunk whose content hash is recomputed
+
+        Returns:
+            Dict: 'ok' flag, 'rows' checked and a list of 'errors'
+        """
+        import pandas as pd
+
+        errors = []
+        rows = 0
+        compared_columns = [column for column in CSV_COLUMNS if column not in ('content_hash', 'similarity_hash')]
+
+        original_chunks = pd.read_csv(self.csv_file_path, chunksize=self.chunksize, dtype=str)
+        migrated_chunks = pd.read_csv(self.temp_path, chunksize=self.chunksize, dtype=str)
+
+        for original, migrated in zip(original_chunks, migrated_chunks):
+            rows += len(migrated)
+            if len(original) != len(migrated):
+                errors.append(f"chunk ending at row {rows}: {len(original)} rows became {len(migrated)}")
+                break
+
+            for column in compared_columns:
+                if column in original.columns:
+                    before = original[column].fillna('').reset_index(drop=True)
+                    after = migrated[column].fillna('').reset_index(drop=True)
+                    if not before.equals(after):
+                        errors.append(f"column {column} changed near row {rows}")
+
+            hashable = migrated['headline'].notna() & migrated['full_text'].notna()
+            missing = hashable & (migrated['content_hash'].isna() | migrated['similarity_hash'].isna())
+            if missing.any():
+                errors.append(f"{int(missing.sum())} rows without hashes near row {rows}")
+
+            # Only backfilled hashes are recomputable; older rows may use other sources
+            backfilled = hashable & original['content_hash'].isna()
+            for row in migrated[backfilled].head(sample_size).to_dict('records'):
+                expected = generate_content_hash(row['headline'], row['full_text'], self._dedup_source(row))
+                if row['content_hash'] != expected:
+                    errors.append(f"content_hash mismatch for {row['article_url']}")
+                    break
+                # The hash append_to_csv_with_dedup would compute for this row
+                live = check_duplicate_article(row, {row['content_hash']}, set(), row.get('source', ''))
+                if live.get('duplicate_type') != 'exact_same_source':
+                    errors.append(f"content_hash of {row['article_url']} differs from the live save path")
+                    break
+
+        return {'ok': not errors, 'rows': rows, 'errors': errors}
+
+def main():
+    """
+    Backfill hashes in the configured CSV file
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Backfill content and similarity hashes for legacy CSV rows')
+    parser.add_argument('--csv', type=str, default=CSV_FILE_PATH, help='CSV file to migrate')
+    parser.add_argument('--chunksize', type=int, default=HASH_MIGRATION_CHUNK_SIZE, help='Rows per chunk')
+    parser.add_argument('--workers', type=int, default=HASH_MIGRATION_WORKERS,
+                        help='Worker processes (0 = one per CPU)')
+    parser.add_argument('--rehash-similarity', action='store_true',
+                        help='Replace legacy keyword similarity hashes with near-duplicate group ids')
+
+    args = parser.parse_args()
+    migration = HashMigration(args.csv, args.chunksize, args.workers, args.rehash_similarity)
+    result = migration.run()
+
+    print(f"Rows: {result['rows']}, updated: {result['updated']} ({result['seconds']:.1f}s)")
+    if result['verification']['ok']:
+        print(f"✓ Verified and replaced {args.csv}")
+    else:
+        print("✗ Verification failed, original file left unchanged:")
+        for error in result['verification']['errors']:
+            print(f"  {error}")
+
+if __name__ == "__main__":
+    main()
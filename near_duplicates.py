@@ -0,0 +1,297 @@
+"""
+Near-duplicate article detection for the Crime Data Scraper
+Word shingles and MinHash signatures with a persistent LSH index, used to
+find rewrites of the same story across sources
+"""
+
+import hashlib
+import re
+import time
+from typing import Dict, List, Optional
+from store_index import StoreDerivedIndex
+from config import (
+    NEAR_DUP_INDEX_PATH, NEAR_DUP_THRESHOLD, NEAR_DUP_NUM_PERM, NEAR_DUP_SHINGLE_SIZE
+)
+
+# Mersenne prime used by the MinHash permutations
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_WORD_PATTERN = re.compile(r'\w+')
+
+def shingles(text: str, size: int = NEAR_DUP_SHINGLE_SIZE) -> set:
+    """
+    Split text into overlapping word n-grams
+
+    Args:
+        text (str): Article text
+        size (int): Words per shingle
+
+    Returns:
+        set: Shingles (texts shorter than `size` words form one shingle)
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def choose_bands(threshold: float, num_perm: int) -> tuple:
+    """
+    Choose the LSH band layout for a Jaccard threshold
+
+    Picks the most rows per band whose collision threshold (1/b)^(1/r)
+    stays at or below `threshold`, so candidates at the threshold are
+    rarely missed; false candidates are filtered by comparing signatures.
+
+    Args:
+        threshold (float): Jaccard similarity threshold
+        num_perm (int): Signature length
+
+    Returns:
+        tuple: (bands, rows_per_band)
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if bands < 1:
+            break
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+class MinHasher:
+    """
+    Computes MinHash signatures of shingle sets
+    """
+
+    def __init__(self, num_perm: int = NEAR_DUP_NUM_PERM, seed: int = 1):
+        import numpy as np
+
+        self.num_perm = num_perm
+        generator = np.random.RandomState(seed)
+        self.a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: set):
+        """
+        Compute the MinHash signature of a shingle set
+
+        Args:
+            shingle_set (set): Shingles from shingles()
+
+        Returns:
+            numpy.ndarray: uint32 signature of length num_perm
+        """
+        import numpy as np
+
+        if not shingle_set:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint32)
+
+        hashes = np.array([
+            int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=4).digest(), 'big')
+            for shingle in shingle_set
+        ], dtype=np.uint64)
+
+        # Universal hashing (a * x + b) mod p; uint64 overflow wraps, which keeps it a valid hash
+        permuted = (np.outer(hashes, self.a) + self.b) % np.uint64(_MERSENNE_PRIME)
+        return (permuted & np.uint64(_MAX_HASH)).min(axis=0).astype(np.uint32)
+
+class NearDuplicateIndex(StoreDerivedIndex):
+    """
+    Persistent MinHash LSH index of stored articles
+
+    Each article signature is split into bands; articles sharing any band
+    bucket become candidates, and candidates whose estimated Jaccard
+    similarity reaches the threshold are near-duplicates. Bucket lookups go
+    through an SQLite index, so a query does not scan all articles.
+
+    Near-duplicates share a group id, which is stored in the article's
+    similarity_hash column.
+    """
+
+    TABLE = 'documents'
+    TABLES = ['buckets', 'documents']
+    STORE_COLUMNS = ['headline', 'full_text', 'content_hash']
+    NAME = 'near-duplicate index'
+
+    def __init__(self, index_path: Optional[str] = None, threshold: float = NEAR_DUP_THRESHOLD,
+                 num_perm: int = NEAR_DUP_NUM_PERM):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = choose_bands(threshold, num_perm)
+        super().__init__(index_path or NEAR_DUP_INDEX_PATH)
+        self._check_layout()
+
+    def _create_schema(self):
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id TEXT PRIMARY KEY, group_id TEXT NOT NULL, signature BLOB NOT NULL, added REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, doc_id TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_bucket ON buckets (bucket)")
+
+    def _check_layout(self):
+        """
+        Clear the index if it was built with a different signature or band layout
+        """
+        layout = f"{self.hasher.num_perm}:{self.bands}x{self.rows}:{NEAR_DUP_SHINGLE_SIZE}"
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'layout'").fetchone()
+
+        if row is None or row[0] != layout:
+            if row is not None:
+                self.logger.info("Near-duplicate settings changed, clearing the LSH index "
+                                 "(it is re-indexed from the article store)")
+            self.clear()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('layout', ?)", (layout,)
+            )
+
+    def signature(self, title: str, content: str):
+        """
+        Compute the MinHash signature of an article
+
+        Args:
+            title (str): Article title
+            content (str): Article content
+
+        Returns:
+            numpy.ndarray: MinHash signature
+        """
+        return self.hasher.signature(shingles(f"{title or ''} {content or ''}"))
+
+    def _bucket_keys(self, signature) -> List[int]:
+        """
+        Hash each band of a signature to a bucket key
+        """
+        keys = []
+        for band in range(self.bands):
+            band_bytes = band.to_bytes(2, 'big') + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            digest = hashlib.blake2b(band_bytes, digest_size=8).digest()
+            keys.append(int.from_bytes(digest, 'big', signed=True))
+        return keys
+
+    @staticmethod
+    def group_id_for(signature) -> str:
+        """
+        Derive a new group id from an article's signature
+
+        Args:
+            signature (numpy.ndarray): MinHash signature
+
+        Returns:
+            str: Hex group id
+        """
+        return hashlib.md5(signature.tobytes()).hexdigest()
+
+    def query(self, signature) -> Optional[Dict]:
+        """
+        Find the most similar indexed article at or above the threshold
+
+        Args:
+            signature (numpy.ndarray): MinHash signature
+
+        Returns:
+            Optional[Dict]: doc_id, group_id and estimated similarity of the
+                best match, or None
+        """
+        import numpy as np
+
+        keys = self._bucket_keys(signature)
+        placeholders = ', '.join('?' for _ in keys)
+        rows = self.conn.execute(
+            "SELECT doc_id, group_id, signature FROM documents WHERE doc_id IN ("
+            f"SELECT DISTINCT doc_id FROM buckets WHERE bucket IN ({placeholders}))",
+            keys
+        ).fetchall()
+
+        best = None
+        for doc_id, group_id, blob in rows:
+            candidate = np.frombuffer(blob, dtype=np.uint32)
+            similarity = float(np.mean(candidate == signature))
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = {'doc_id': doc_id, 'group_id': group_id, 'similarity': similarity}
+        return best
+
+    def add(self, doc_id: str, signature, group_id: str) -> bool:
+        """
+        Index an article
+
+        Args:
+            doc_id (str): Article id (its content_hash)
+            signature (numpy.ndarray): MinHash signature
+            group_id (str): Near-duplicate group id
+
+        Returns:
+            bool: True if added, False if the article was already indexed
+        """
+        if self.conn.execute("SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)).fetchone():
+            return False
+
+        with self._savepoint('add_document'):
+            self.conn.execute(
+                "INSERT INTO documents (doc_id, group_id, signature, added) VALUES (?, ?, ?, ?)",
+                (doc_id, group_id, signature.tobytes(), time.time())
+            )
+            self.conn.executemany(
+                "INSERT INTO buckets (bucket, doc_id) VALUES (?, ?)",
+                [(key, doc_id) for key in self._bucket_keys(signature)]
+            )
+        return True
+
+    def summary(self) -> Dict:
+        """
+        Get near-duplicate statistics
+
+        Returns:
+            Dict: Indexed articles, groups, articles in multi-article groups and threshold
+        """
+        indexed, groups = self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT group_id) FROM documents"
+        ).fetchone()
+        grouped = self.conn.execute(
+            "SELECT COALESCE(SUM(n), 0) FROM (SELECT COUNT(*) AS n FROM documents "
+            "GROUP BY group_id HAVING n > 1)"
+        ).fetchone()[0]
+        return {
+            'indexed_articles': indexed,
+            'near_duplicate_groups': groups,
+            'articles_with_near_duplicates': grouped,
+            'jaccard_threshold': self.threshold
+        }
+
+    def _index_article(self, article: Dict):
+        """
+        Index a stored article row, joining the group of its best match
+        """
+        title = article.get('headline') or ''
+        content = article.get('full_text') or ''
+        if not isinstance(title, str) or not isinstance(content, str) or not (title and content):
+            return
+
+        doc_id = article.get('content_hash')
+        if not isinstance(doc_id, str) or not doc_id:
+            doc_id = hashlib.sha256(f"{title}||{content}".encode('utf-8')).hexdigest()
+        if self.conn.execute("SELECT 1 FROM documents WHERE doc_id = ?", (doc_id,)).fetchone():
+            return
+
+        signature = self.signature(title, content)
+        match = self.query(signature)
+        self.add(doc_id, signature, match['group_id'] if match else self.group_id_for(signature))
+
+def get_near_duplicate_index(backfill: bool = True) -> NearDuplicateIndex:
+    """
+    Get the near-duplicate index shared within the process
+
+    Args:
+        backfill (bool): On first use, index articles of the configured
+            store that are missing from the index
+
+    Returns:
+        NearDuplicateIndex: Index at NEAR_DUP_INDEX_PATH
+    """
+    return NearDuplicateIndex.shared(backfill)
+
+if __name__ == "__main__":
+    NearDuplicateIndex.main()
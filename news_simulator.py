@@ -0,0 +1,323 @@
+"""
+Local simulated news sites for load testing the fetch layer
+Serves synthetic hub and article pages for every configured source, with
+configurable latency, server errors, conditional 304 responses, slow-drip
+bodies and 429 rate limiting
+"""
+
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlparse, urlsplit
+from utils import setup_logging
+from synthetic_news import (
+    generate_articles, hub_page_html, article_page_html, article_path, source_slug
+)
+from config import (
+    VERIFIED_NEWS_WEBSITES, SIMULATOR_HOST, SIMULATOR_PORT, SIMULATOR_ARTICLES_PER_HUB,
+    SIMULATOR_LATENCY, SIMULATOR_JITTER, SIMULATOR_ERROR_RATE, SIMULATOR_SLOW_RATE,
+    SIMULATOR_DRIP_BYTES, SIMULATOR_DRIP_DELAY, SIMULATOR_RATE_LIMIT, SIMULATOR_RATE_LIMIT_BURST
+)
+
+class SimulatedPage:
+    """
+    A page served by the simulator
+    """
+
+    __slots__ = ('body', 'etag', 'last_modified', 'source')
+
+    def __init__(self, body: str, last_modified: float, source: str):
+        self.body = body.encode('utf-8')
+        self.etag = f'"{hashlib.md5(self.body).hexdigest()}"'
+        self.last_modified = int(last_modified)
+        self.source = source
+
+class NewsSimulator:
+    """
+    Synthetic news sites and the network behaviour to serve them with
+
+    Every source gets a hub page at /<source_slug><hub path> whose links
+    match its article selector, and article pages matching its content
+    selector, so `simulated_sources()` configurations scrape it like the
+    real site. Faults are drawn from a seeded random generator, so runs
+    are repeatable.
+    """
+
+    def __init__(self, sources: Optional[List[Dict]] = None,
+                 articles_per_hub: int = SIMULATOR_ARTICLES_PER_HUB, seed: int = 0,
+                 latency: float = SIMULATOR_LATENCY, jitter: float = SIMULATOR_JITTER,
+                 error_rate: float = SIMULATOR_ERROR_RATE, slow_rate: float = SIMULATOR_SLOW_RATE,
+                 drip_bytes: int = SIMULATOR_DRIP_BYTES, drip_delay: float = SIMULATOR_DRIP_DELAY,
+                 rate_limit: float = SIMULATOR_RATE_LIMIT, rate_limit_burst: int = SIMULATOR_RATE_LIMIT_BURST):
+        self.sources = sources or VERIFIED_NEWS_WEBSITES
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.drip_bytes = drip_bytes
+        self.drip_delay = drip_delay
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str], List[float]] = {}
+        self.stats: Counter = Counter()
+        self.started = time.time()
+
+        self.pages: Dict[str, SimulatedPage] = {}
+        self.hub_paths: Dict[str, str] = {}
+        self._build_pages(articles_per_hub, seed)
+
+    def _build_pages(self, articles_per_hub: int, seed: int):
+        articles = generate_articles(articles_per_hub * len(self.sources), seed=seed, sources=self.sources)
+
+        for website_config in self.sources:
+            name = website_config['name']
+            prefix = f"/{source_slug(name)}"
+            own = [article for article in articles if article['source'] == name]
+
+            hub_path = f"{prefix}{urlparse(website_config['url']).path or '/'}"
+            self.hub_paths[name] = hub_path
+            self.pages[hub_path] = SimulatedPage(
+                hub_page_html(website_config, own, path_prefix=prefix), self.started, name
+            )
+
+            for article in own:
+                path = urlsplit(article_path(website_config, article, prefix)).path
+                published = time.mktime(article['published'].timetuple())
+                self.pages[path] = SimulatedPage(article_page_html(website_config, article), published, name)
+
+    def _random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def _retry_after(self, client: str, source: str) -> Optional[float]:
+        """
+        Take a token from the client's bucket for a source
+
+        Returns:
+            Optional[float]: Seconds until a request would be allowed, or
+                None if this request is allowed
+        """
+        if not self.rate_limit:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault((client, source), [float(self.rate_limit_burst), now])
+            tokens = min(self.rate_limit_burst, bucket[0] + (now - bucket[1]) * self.rate_limit)
+            bucket[1] = now
+            if tokens >= 1:
+                bucket[0] = tokens - 1
+                return None
+            bucket[0] = tokens
+            return (1 - tokens) / self.rate_limit
+
+    def _count(self, *keys: str, amount: int = 1):
+        with self._lock:
+            for key in keys:
+                self.stats[key] += amount
+
+    def _not_modified(self, handler: BaseHTTPRequestHandler, page: SimulatedPage) -> bool:
+        etag = handler.headers.get('If-None-Match')
+        if etag is not None:
+            return page.etag in [value.strip() for value in etag.split(',')] or etag.strip() == '*'
+
+        since = handler.headers.get('If-Modified-Since')
+        if since:
+            try:
+                return parsedate_to_datetime(since).timestamp() >= page.last_modified
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def respond(self, handler: BaseHTTPRequestHandler, send_body: bool = True):
+        """
+        Answer one request
+
+        Args:
+            handler (BaseHTTPRequestHandler): Request handler
+            send_body (bool): False for HEAD requests
+        """
+        path = unquote(urlsplit(handler.path).path)
+        self._count('requests')
+
+        if path == '/_stats':
+            self._send(handler, 200, json.dumps(self.summary(), indent=2).encode('utf-8'),
+                       {'Content-Type': 'application/json'}, send_body)
+            return
+        if path == '/':
+            links = ''.join(f'<li><a href="{hub}">{name}</a></li>' for name, hub in self.hub_paths.items())
+            self._send(handler, 200, f"<html><body><ul>{links}</ul></body></html>".encode('utf-8'),
+                       {'Content-Type': 'text/html; charset=utf-8'}, send_body)
+            return
+
+        page = self.pages.get(path)
+        if page is None:
+            self._count('status_404')
+            self._send(handler, 404, b'Not Found', {'Content-Type': 'text/plain'}, send_body)
+            return
+        self._count(f"source:{page.source}")
+
+        retry_after = self._retry_after(handler.client_address[0], page.source)
+        if retry_after is not None:
+            self._count('status_429')
+            self._send(handler, 429, b'Too Many Requests',
+                       {'Content-Type': 'text/plain', 'Retry-After': str(max(1, math.ceil(retry_after)))}, send_body)
+            return
+
+        time.sleep(self.latency + self.jitter * self._random())
+
+        if self._random() < self.error_rate:
+            status = (500, 502, 503)[int(self._random() * 3)]
+            self._count(f"status_{status}")
+            headers = {'Content-Type': 'text/plain'}
+            if status == 503:
+                headers['Retry-After'] = '1'
+            self._send(handler, status, b'Server Error', headers, send_body)
+            return
+
+        if self._not_modified(handler, page):
+            self._count('status_304')
+            self._send(handler, 304, b'', {'ETag': page.etag}, send_body)
+            return
+
+        slow = self._random() < self.slow_rate
+        self._count('status_200', *(['slow_responses'] if slow else []))
+        self._send(handler, 200, page.body, {
+            'Content-Type': 'text/html; charset=utf-8',
+            'ETag': page.etag,
+            'Last-Modified': formatdate(page.last_modified, usegmt=True),
+            'Cache-Control': 'max-age=60'
+        }, send_body, drip=slow)
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, body: bytes, headers: Dict[str, str],
+              send_body: bool = True, drip: bool = False):
+        try:
+            handler.send_response(status)
+            for key, value in headers.items():
+                handler.send_header(key, value)
+            if status != 304:
+                handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+
+            if not send_body or status == 304:
+                return
+            if not drip:
+                handler.wfile.write(body)
+            else:
+                for start in range(0, len(body), self.drip_bytes):
+                    handler.wfile.write(body[start:start + self.drip_bytes])
+                    handler.wfile.flush()
+                    time.sleep(self.drip_delay)
+            self._count('bytes_sent', amount=len(body))
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (e.g. a timeout during a slow drip)
+            self._count('client_disconnects')
+
+    def summary(self) -> Dict:
+        """
+        Get request statistics
+
+        Returns:
+            Dict: Requests, responses per status, bytes sent and requests per source
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        sources = {key[len('source:'):]: value for key, value in stats.items() if key.startswith('source:')}
+        counters = {key: value for key, value in stats.items() if not key.startswith('source:')}
+        elapsed = time.time() - self.started
+        return {
+            **counters,
+            'uptime_seconds': round(elapsed, 1),
+            'requests_per_second': round(counters.get('requests', 0) / elapsed, 2) if elapsed else 0.0,
+            'sources': sources
+        }
+
+class _SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.simulator.respond(self)
+
+    def do_HEAD(self):
+        self.server.simulator.respond(self, send_body=False)
+
+    def log_message(self, format, *args):
+        # Per-request lines would swamp the console under load
+        pass
+
+def start_server(simulator: NewsSimulator, host: str = SIMULATOR_HOST, port: int = SIMULATOR_PORT) -> ThreadingHTTPServer:
+    """
+    Serve a simulator on a background thread
+
+    Args:
+        simulator (NewsSimulator): Simulated sites
+        host (str): Interface to bind
+        port (int): Port to bind (0 picks a free port)
+
+    Returns:
+        ThreadingHTTPServer: Running server (call shutdown() to stop it)
+    """
+    server = ThreadingHTTPServer((host, port), _SimulatorHandler)
+    server.daemon_threads = True
+    server.simulator = simulator
+    threading.Thread(target=server.serve_forever, name='news-simulator', daemon=True).start()
+    return server
+
+def main():
+    """
+    Run the simulator from the command line
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Local simulated news sites for load testing')
+    parser.add_argument('--host', default=SIMULATOR_HOST)
+    parser.add_argument('--port', type=int, default=SIMULATOR_PORT)
+    parser.add_argument('--articles-per-hub', type=int, default=SIMULATOR_ARTICLES_PER_HUB)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=SIMULATOR_LATENCY, help='Seconds before each response')
+    parser.add_argument('--jitter', type=float, default=SIMULATOR_JITTER, help='Random extra latency, up to seconds')
+    parser.add_argument('--error-rate', type=float, default=SIMULATOR_ERROR_RATE, help='Share of 5xx responses')
+    parser.add_argument('--slow-rate', type=float, default=SIMULATOR_SLOW_RATE, help='Share of slow-drip responses')
+    parser.add_argument('--drip-bytes', type=int, default=SIMULATOR_DRIP_BYTES)
+    parser.add_argument('--drip-delay', type=float, default=SIMULATOR_DRIP_DELAY)
+    parser.add_argument('--rate-limit', type=float, default=SIMULATOR_RATE_LIMIT,
+                        help='Requests per second per client and source before 429 (0 = off)')
+    parser.add_argument('--rate-limit-burst', type=int, default=SIMULATOR_RATE_LIMIT_BURST)
+
+    args = parser.parse_args()
+    logger = setup_logging()
+
+    simulator = NewsSimulator(
+        articles_per_hub=args.articles_per_hub, seed=args.seed, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, slow_rate=args.slow_rate, drip_bytes=args.drip_bytes,
+        drip_delay=args.drip_delay, rate_limit=args.rate_limit, rate_limit_burst=args.rate_limit_burst
+    )
+    server = ThreadingHTTPServer((args.host, args.port), _SimulatorHandler)
+    server.daemon_threads = True
+    server.simulator = simulator
+
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+    logger.info(f"Serving {len(simulator.hub_paths)} simulated sources ({len(simulator.pages)} pages) at {base_url}")
+    print(f"Scrape it with: CRIME_SCRAPER_SIMULATED_NEWS_URL={base_url} python main.py --mode full")
+    print(f"Request statistics: {base_url}/_stats")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(simulator.summary(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Persistent cache for NLP extraction results
+Stores process_article results keyed by normalized article content so wire
+stories republished by several sources are only processed once
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, Optional
+from utils import setup_logging, clean_text
+from config import (
+    CRIME_TYPE_PATTERNS, SPACY_MODEL, ENTITY_TYPES,
+    NLP_CACHE_PATH, NLP_CACHE_MAX_ENTRIES
+)
+
+# Bump when the layout of cached results changes
+CACHE_SCHEMA_VERSION = 2
+
+# Fields of process_article that only depend on the article text
+CACHED_FIELDS = [
+    "publication_date", "who", "what", "where", "when", "how", "why",
+    "economic_loss", "injuries", "fatalities", "arrests"
+]
+
+def compute_pipeline_version(model_version: str = "") -> str:
+    """
+    Compute a fingerprint of everything that affects NLP extraction results
+
+    Args:
+        model_version (str): Version of the loaded spaCy model
+
+    Returns:
+        str: Hash of model name, model version and extraction patterns
+    """
+    from fact_extractor import FACT_ANCHORS, FACT_PATTERNS
+
+    fingerprint = json.dumps({
+        "schema": CACHE_SCHEMA_VERSION,
+        "spacy_model": SPACY_MODEL,
+        "model_version": model_version,
+        "crime_type_patterns": CRIME_TYPE_PATTERNS,
+        "entity_types": ENTITY_TYPES,
+        "fact_anchors": FACT_ANCHORS,
+        "fact_patterns": FACT_PATTERNS
+    }, sort_keys=True)
+
+    return hashlib.sha256(fingerprint.encode('utf-8')).hexdigest()
+
+class NLPResultCache:
+    """
+    SQLite-backed LRU cache of NLP extraction results
+
+    The cache is cleared automatically when the pipeline version changes,
+    e.g. after editing CRIME_TYPE_PATTERNS or switching SPACY_MODEL.
+    """
+
+    def __init__(self, pipeline_version: str, cache_path: Optional[str] = None,
+                 max_entries: int = NLP_CACHE_MAX_ENTRIES):
+        self.logger = setup_logging()
+        self.cache_path = cache_path or NLP_CACHE_PATH
+        self.max_entries = max_entries
+        self.pipeline_version = pipeline_version
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.cache_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, data TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)"
+        )
+        self._check_version()
+        self.size = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def _check_version(self):
+        """
+        Clear the cache if it was built by a different pipeline version
+        """
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'pipeline_version'"
+        ).fetchone()
+
+        if row is None or row[0] != self.pipeline_version:
+            if row is not None:
+                self.logger.info("NLP pipeline changed, clearing NLP result cache")
+            self.conn.execute("DELETE FROM results")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('pipeline_version', ?)",
+                (self.pipeline_version,)
+            )
+
+    @staticmethod
+    def make_key(headline: str, content: str) -> str:
+        """
+        Build the cache key for an article
+
+        Case is kept: NER depends on it, so case variants of a text must not
+        share results.
+
+        Args:
+            headline (str): Article headline
+            content (str): Article content
+
+        Returns:
+            str: Hash of the cleaned headline and content (equals
+                ArticleText.cache_key)
+        """
+        normalized = f"{clean_text(headline).strip()}||{clean_text(content).strip()}"
+        return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up cached extraction results
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            Optional[Dict]: Cached fields or None on a miss
+        """
+        row = self.conn.execute(
+            "SELECT data FROM results WHERE key = ?", (key,)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute(
+            "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+        )
+        return json.loads(row[0])
+
+    def put(self, key: str, processed_data: Dict):
+        """
+        Store extraction results, evicting least recently used entries
+
+        Args:
+            key (str): Cache key from make_key
+            processed_data (Dict): Result of process_article
+        """
+        data = {field: processed_data.get(field, '') for field in CACHED_FIELDS}
+
+        exists = self.conn.execute(
+            "SELECT 1 FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results (key, data, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(data), time.time())
+        )
+        if not exists:
+            self.size += 1
+
+        if self.size > self.max_entries:
+            self.conn.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY last_used ASC LIMIT ?)",
+                (self.size - self.max_entries,)
+            )
+            self.size = self.max_entries
+
+    def clear(self):
+        """
+        Remove all cached results
+        """
+        self.conn.execute("DELETE FROM results")
+        self.size = 0
+
+    def close(self):
+        """
+        Close the underlying database connection
+        """
+        self.conn.close()
@@ -4,28 +4,38 @@ Uses spaCy for named entity recognition and custom patterns for crime classifica
 """
 
 import spacy
-from spacy.matcher import Matcher
+from spacy.matcher import Matcher, PhraseMatcher
 from spacy.language import Language
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 import re
 from datetime import datetime
-from utils import (
-    setup_logging, clean_text, extract_date_from_text, 
-    extract_numbers_from_text, extract_money_from_text
-)
-from config import SPACY_MODEL, ENTITY_TYPES, CRIME_TYPE_PATTERNS
+from utils import setup_logging, clean_text, extract_numbers_from_text
+from article_text import ArticleText
+from metrics import get_run_metrics
+from deadline import Deadline
+from fact_extractor import get_fact_extractor, fact_value
+from nlp_cache import NLPResultCache, compute_pipeline_version
+from crime_prefilter import CrimePreFilter, get_prefilter_skip_log
+from config import SPACY_MODEL, ENTITY_TYPES, CRIME_TYPE_PATTERNS, NLP_CACHE_ENABLED, PREFILTER_ENABLED
 
 class CrimeNLPProcessor:
     """
     NLP processor for extracting structured information from crime articles
     """
     
-    def __init__(self):
+    def __init__(self, use_cache: bool = NLP_CACHE_ENABLED, use_prefilter: bool = PREFILTER_ENABLED,
+                 prefilter: Optional[CrimePreFilter] = None):
         self.logger = setup_logging()
         self.nlp: Optional[Language] = None
         self.matcher: Optional[Matcher] = None
+        self.crime_matcher: Optional[PhraseMatcher] = None
+        self.cache: Optional[NLPResultCache] = None
+        self.fact_extractor = get_fact_extractor()
+        self.prefilter = (prefilter or CrimePreFilter()) if use_prefilter else None
         self._load_model()
         self._setup_matcher()
+        if use_cache:
+            self._setup_cache()
     
     def _load_model(self):
         """
@@ -38,6 +48,20 @@ class CrimeNLPProcessor:
             self.logger.error(f"Failed to load spaCy model: {str(e)}")
             raise
     
+    def _setup_cache(self):
+        """
+        Open the persistent NLP result cache for the loaded pipeline
+        """
+        if self.nlp is None:
+            raise RuntimeError("spaCy model must be loaded before setting up the cache")
+        
+        try:
+            model_version = self.nlp.meta.get('version', '')
+            self.cache = NLPResultCache(compute_pipeline_version(model_version))
+        except Exception as e:
+            self.logger.warning(f"NLP result cache unavailable: {str(e)}")
+            self.cache = None
+    
     def _setup_matcher(self):
         """
         Set up pattern matcher for crime types and specific entities
@@ -47,17 +71,14 @@ class CrimeNLPProcessor:
             
         self.matcher = Matcher(self.nlp.vocab)
         
-        # Add patterns for different crime types
+        # Add phrase patterns for different crime types. Phrases are tokenized
+        # like the article text and compared on LOWER, so "break-in" and "DUI"
+        # match regardless of tokenization and case.
+        self.crime_matcher = PhraseMatcher(self.nlp.vocab, attr="LOWER")
         for crime_type, patterns in CRIME_TYPE_PATTERNS.items():
-            pattern_list = []
-            for pattern in patterns:
-                # Create token patterns for each crime keyword
-                tokens = pattern.split()
-                token_pattern = [{"LOWER": token} for token in tokens]
-                pattern_list.append(token_pattern)
-            
-            if pattern_list:
-                self.matcher.add(f"CRIME_{crime_type.upper()}", pattern_list)
+            if patterns:
+                phrase_docs = list(self.nlp.tokenizer.pipe(patterns))
+                self.crime_matcher.add(f"CRIME_{crime_type.upper()}", phrase_docs)
         
         # Add patterns for specific crime-related phrases
         injury_patterns = [
@@ -112,38 +133,52 @@ class CrimeNLPProcessor:
         
         return entities
     
-    def classify_crime_type(self, text: str) -> List[str]:
+    def score_crime_types(self, text: str) -> Dict[str, int]:
         """
-        Classify the type of crime mentioned in the text
+        Count phrase matches for each crime type mentioned in the text
         
         Args:
             text (str): Text to analyze
             
         Returns:
-            List[str]: List of detected crime types
+            Dict[str, int]: Match count per crime type, in order of first match
         """
-        if self.nlp is None or self.matcher is None:
+        if self.nlp is None or self.crime_matcher is None:
             raise RuntimeError("spaCy model and matcher not loaded")
-            
-        doc = self.nlp(text)
-        matches = self.matcher(doc)
         
-        crime_types = []
-        for match_id, start, end in matches:
+        # Phrase matching on LOWER only needs the tokenizer
+        doc = self.nlp.make_doc(text)
+        
+        scores: Dict[str, int] = {}
+        for match_id, start, end in sorted(self.crime_matcher(doc), key=lambda m: m[1]):
             label = self.nlp.vocab.strings[match_id]
-            if label.startswith("CRIME_"):
-                crime_type = label.replace("CRIME_", "").lower()
-                if crime_type not in crime_types:
-                    crime_types.append(crime_type)
+            crime_type = label.replace("CRIME_", "").lower()
+            scores[crime_type] = scores.get(crime_type, 0) + 1
         
-        return crime_types
+        return scores
     
-    def extract_injury_info(self, text: str) -> Dict[str, Optional[int]]:
+    def classify_crime_type(self, text: str) -> List[str]:
+        """
+        Classify the type of crime mentioned in the text
+        
+        Args:
+            text (str): Text to analyze
+            
+        Returns:
+            List[str]: Detected crime types, ranked by match count
+        """
+        scores = self.score_crime_types(text)
+        
+        # sorted() is stable, so ties keep the order of first match
+        return sorted(scores, key=lambda crime_type: scores[crime_type], reverse=True)
+    
+    def extract_injury_info(self, text: str, facts: Optional[Dict] = None) -> Dict[str, Optional[int]]:
         """
         Extract information about injuries, fatalities, and arrests
         
         Args:
             text (str): Text to analyze
+            facts (Dict, optional): Pre-computed FactExtractor.scan results for text
             
         Returns:
             Dict[str, Optional[int]]: Dictionary with injury, fatality, and arrest counts
@@ -176,59 +211,22 @@ class CrimeNLPProcessor:
                     info["arrests"] = max(numbers)
         
         # Additional regex-based extraction as backup
-        text_lower = text.lower()
-        
-        # Injuries
-        injury_patterns = [
-            r'(\d+)\s+(?:people\s+)?(?:were\s+)?injured',
-            r'injured\s+(\d+)',
-            r'(\d+)\s+victims?',
-            r'(\d+)\s+people\s+hurt'
-        ]
-        
-        for pattern in injury_patterns:
-            match = re.search(pattern, text_lower)
-            if match and info["injuries"] is None:
-                info["injuries"] = int(match.group(1))
-                break
+        if facts is None:
+            facts = self.fact_extractor.scan(text, ["injuries", "fatalities", "arrests"])
         
-        # Fatalities
-        fatality_patterns = [
-            r'(\d+)\s+(?:people\s+)?(?:were\s+)?killed',
-            r'killed\s+(\d+)',
-            r'(\d+)\s+(?:people\s+)?died',
-            r'(\d+)\s+deaths?',
-            r'(\d+)\s+fatalities'
-        ]
-        
-        for pattern in fatality_patterns:
-            match = re.search(pattern, text_lower)
-            if match and info["fatalities"] is None:
-                info["fatalities"] = int(match.group(1))
-                break
-        
-        # Arrests
-        arrest_patterns = [
-            r'(\d+)\s+(?:people\s+)?(?:were\s+)?arrested',
-            r'arrested\s+(\d+)',
-            r'(\d+)\s+suspects?',
-            r'(\d+)\s+in\s+custody'
-        ]
-        
-        for pattern in arrest_patterns:
-            match = re.search(pattern, text_lower)
-            if match and info["arrests"] is None:
-                info["arrests"] = int(match.group(1))
-                break
+        for key in ("injuries", "fatalities", "arrests"):
+            if info[key] is None:
+                info[key] = fact_value(facts, key)
         
         return info
     
-    def extract_method_and_motivation(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+    def extract_method_and_motivation(self, text: str, facts: Optional[Dict] = None) -> Tuple[Optional[str], Optional[str]]:
         """
         Extract method (how) and motivation (why) from the text
         
         Args:
             text (str): Text to analyze
+            facts (Dict, optional): Pre-computed FactExtractor.scan results for text
             
         Returns:
             Tuple[Optional[str], Optional[str]]: Method and motivation
@@ -255,19 +253,9 @@ class CrimeNLPProcessor:
                 break
         
         # Motivation extraction patterns
-        motivation_patterns = [
-            r'(?:because|due to|motivated by|reason|motive)[\s\w]*?(?:money|drugs?|revenge|jealousy|anger|dispute|robbery|theft)',
-            r'(?:over|about|regarding)[\s\w]*?(?:money|drugs?|relationship|property|debt)',
-            r'(?:domestic|family|personal)[\s\w]*?(?:dispute|violence|conflict)'
-        ]
-        
-        motivation = None
-        text_lower = text.lower()
-        for pattern in motivation_patterns:
-            match = re.search(pattern, text_lower)
-            if match:
-                motivation = clean_text(match.group(0))
-                break
+        if facts is None:
+            facts = self.fact_extractor.scan(text, ["motivation"])
+        motivation = fact_value(facts, "motivation")
         
         return method, motivation
     
@@ -279,49 +267,53 @@ class CrimeNLPProcessor:
             article_data (Dict): Article data with headline, content, etc.
             
         Returns:
-            Dict: Processed article data with extracted information
+            Dict: Processed article data with extracted information (empty if
+                the article failed or was skipped by the crime pre-filter)
         """
         try:
-            headline = article_data.get('headline', '')
-            content = article_data.get('content', '')
-            full_text = f"{headline} {content}"
-            
-            # Extract entities
-            entities = self.extract_entities(full_text)
-            
-            # Classify crime type
-            crime_types = self.classify_crime_type(full_text)
+            text = ArticleText.for_article(article_data)
+            headline = text.raw_headline
+            full_text = f"{headline} {text.raw_content}"
+            source = article_data.get('source')
+            metrics = get_run_metrics()
             
-            # Extract injury information
-            injury_info = self.extract_injury_info(full_text)
+            # Skip articles that are clearly not crime reports before spaCy
+            if self.prefilter is not None:
+                score = self.prefilter.score(full_text)
+                if score < self.prefilter.threshold:
+                    metrics.increment('prefilter_skipped', source)
+                    self.logger.info(f"Skipped by crime pre-filter (score {score:.2f}): {headline}")
+                    # Remembered so later runs don't fetch the link again
+                    if article_data.get('url'):
+                        get_prefilter_skip_log().record(article_data['url'], score)
+                    return {}
+                metrics.increment('prefilter_passed', source)
             
-            # Extract method and motivation
-            method, motivation = self.extract_method_and_motivation(full_text)
+            # Reuse results for content already processed (e.g. wire stories)
+            cache_key = None
+            extracted = None
+            if self.cache is not None:
+                cache_key = text.cache_key
+                extracted = self.cache.get(cache_key)
             
-            # Extract economic loss
-            economic_loss = extract_money_from_text(full_text)
-            
-            # Extract publication date from content
-            publication_date = extract_date_from_text(full_text)
+            if extracted is None:
+                with metrics.stage('nlp', source):
+                    extracted = self._extract_fields(full_text)
+                if self.cache is not None:
+                    self.cache.put(cache_key, extracted)
+            else:
+                metrics.increment('nlp_cache_hits', source)
             
             # Compile processed data
             processed_data = {
                 'date_scraped': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
                 'article_url': article_data.get('url', ''),
-                'headline': clean_text(headline),
-                'publication_date': publication_date or '',
-                'who': '; '.join(entities.get('who', [])),
-                'what': '; '.join(crime_types) if crime_types else '',
-                'where': '; '.join(entities.get('where', [])),
-                'when': '; '.join(entities.get('when', [])),
-                'how': method or '',
-                'why': motivation or '',
-                'economic_loss': economic_loss or '',
-                'injuries': injury_info.get('injuries', ''),
-                'fatalities': injury_info.get('fatalities', ''),
-                'arrests': injury_info.get('arrests', ''),
-                'full_text': clean_text(full_text)
+                'headline': text.headline
             }
+            processed_data.update(extracted)
+            processed_data['full_text'] = text.full_text
+            # Carried along so duplicate detection reuses the computed hashes
+            processed_data['article_text'] = text
             
             self.logger.info(f"Successfully processed article: {headline}")
             return processed_data
@@ -330,24 +322,93 @@ class CrimeNLPProcessor:
             self.logger.error(f"Error processing article: {str(e)}")
             return {}
     
-    def process_multiple_articles(self, articles: List[Dict]) -> List[Dict]:
+    def _extract_fields(self, full_text: str) -> Dict:
+        """
+        Run all extractors over the article text
+        
+        Args:
+            full_text (str): Headline and content of the article
+            
+        Returns:
+            Dict: Extracted fields, in CSV column order
+        """
+        metrics = get_run_metrics()
+        
+        # Run all regex fact patterns in a single scan
+        with metrics.stage('nlp.facts'):
+            facts = self.fact_extractor.scan(full_text)
+        
+        # Extract entities
+        with metrics.stage('nlp.entities'):
+            entities = self.extract_entities(full_text)
+        
+        # Classify crime type
+        with metrics.stage('nlp.crime_type'):
+            crime_types = self.classify_crime_type(full_text)
+        
+        # Extract injury information
+        with metrics.stage('nlp.injuries'):
+            injury_info = self.extract_injury_info(full_text, facts)
+        
+        # Extract method and motivation
+        with metrics.stage('nlp.method_motivation'):
+            method, motivation = self.extract_method_and_motivation(full_text, facts)
+        
+        # Extract economic loss
+        economic_loss = fact_value(facts, "economic_loss")
+        
+        # Extract publication date from content
+        publication_date = fact_value(facts, "publication_date")
+        
+        return {
+            'publication_date': publication_date or '',
+            'who': '; '.join(entities.get('who', [])),
+            'what': '; '.join(crime_types) if crime_types else '',
+            'where': '; '.join(entities.get('where', [])),
+            'when': '; '.join(entities.get('when', [])),
+            'how': method or '',
+            'why': motivation or '',
+            'economic_loss': economic_loss or '',
+            'injuries': injury_info.get('injuries', ''),
+            'fatalities': injury_info.get('fatalities', ''),
+            'arrests': injury_info.get('arrests', '')
+        }
+    
+    def process_multiple_articles(self, articles: List[Dict],
+                                  on_processed: Optional[Callable[[Dict, Dict], None]] = None,
+                                  deadline: Optional['Deadline'] = None) -> List[Dict]:
         """
         Process multiple articles
         
         Args:
             articles (List[Dict]): List of article data
+            on_processed (Callable, optional): Called with each article and its
+                processed data as soon as it is processed (e.g. to checkpoint it)
+            deadline (Deadline, optional): Run deadline; the remaining articles
+                are skipped once only the time reserved for saving is left
             
         Returns:
             List[Dict]: List of processed article data
         """
         processed_articles = []
         
-        for article in articles:
+        for index, article in enumerate(articles):
+            if deadline is not None and not deadline.allows_processing():
+                deadline.skip_processing(len(articles) - index)
+                self.logger.warning(f"Run deadline reached, {len(articles) - index} articles left unprocessed")
+                break
+            
             processed = self.process_article(article)
+            if deadline is not None:
+                deadline.pending = max(0, deadline.pending - 1)
             if processed:
                 processed_articles.append(processed)
+                if on_processed is not None:
+                    on_processed(article, processed)
         
         self.logger.info(f"Processed {len(processed_articles)} out of {len(articles)} articles")
+        if self.cache is not None:
+            self.logger.info(f"NLP cache: {self.cache.hits} hits, {self.cache.misses} misses")
         return processed_articles
 
 # Test function
@@ -376,5 +437,97 @@ def test_nlp_processor():
     for key, value in result.items():
         print(f"{key}: {value}")
 
+def benchmark_crime_classifier(csv_file_path: str, limit: Optional[int] = None) -> Dict:
+    """
+    Compare the phrase-based crime classifier with the previous token Matcher
+    on stored articles
+    
+    Args:
+        csv_file_path (str): CSV file with stored articles
+        limit (int, optional): Maximum number of articles to use
+        
+    Returns:
+        Dict: Timings and agreement between the two classifiers
+    """
+    import time
+    import pandas as pd
+    
+    processor = CrimeNLPProcessor(use_cache=False)
+    nlp = processor.nlp
+    
+    # Previous classifier: one token pattern per whitespace-split phrase
+    legacy_matcher = Matcher(nlp.vocab)
+    for crime_type, patterns in CRIME_TYPE_PATTERNS.items():
+        token_patterns = [[{"LOWER": token} for token in pattern.split()] for pattern in patterns]
+        if token_patterns:
+            legacy_matcher.add(f"CRIME_{crime_type.upper()}", token_patterns)
+    
+    def legacy_classify(text: str) -> List[str]:
+        doc = nlp(text)
+        crime_types = []
+        for match_id, start, end in legacy_matcher(doc):
+            crime_type = nlp.vocab.strings[match_id].replace("CRIME_", "").lower()
+            if crime_type not in crime_types:
+                crime_types.append(crime_type)
+        return crime_types
+    
+    df = pd.read_csv(csv_file_path, usecols=['full_text'], nrows=limit)
+    texts = [text for text in df['full_text'] if isinstance(text, str)]
+    
+    start = time.perf_counter()
+    legacy_results = [legacy_classify(text) for text in texts]
+    legacy_seconds = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    phrase_results = [processor.classify_crime_type(text) for text in texts]
+    phrase_seconds = time.perf_counter() - start
+    
+    added: Dict[str, int] = {}
+    missing: Dict[str, int] = {}
+    same = 0
+    for legacy, phrase in zip(legacy_results, phrase_results):
+        if set(legacy) == set(phrase):
+            same += 1
+        for crime_type in set(phrase) - set(legacy):
+            added[crime_type] = added.get(crime_type, 0) + 1
+        for crime_type in set(legacy) - set(phrase):
+            missing[crime_type] = missing.get(crime_type, 0) + 1
+    
+    return {
+        'articles': len(texts),
+        'legacy_seconds': legacy_seconds,
+        'phrase_seconds': phrase_seconds,
+        'same_crime_types': same,
+        'types_only_found_by_phrase_matcher': added,
+        'types_only_found_by_legacy_matcher': missing
+    }
+
+def main():
+    """
+    Run the NLP processor self-test or the classifier benchmark
+    """
+    import argparse
+    from config import CSV_FILE_PATH
+    
+    parser = argparse.ArgumentParser(description='Crime NLP processor')
+    parser.add_argument('--benchmark-classifier', action='store_true',
+                       help='Compare the crime classifier with the previous token Matcher')
+    parser.add_argument('--csv', type=str, default=CSV_FILE_PATH, help='CSV file with stored articles')
+    parser.add_argument('--limit', type=int, help='Maximum number of articles to benchmark')
+    
+    args = parser.parse_args()
+    
+    if not args.benchmark_classifier:
+        test_nlp_processor()
+        return
+    
+    results = benchmark_crime_classifier(args.csv, args.limit)
+    print(f"Articles: {results['articles']}")
+    print(f"Token Matcher (full pipeline): {results['legacy_seconds']:.3f}s")
+    print(f"PhraseMatcher (tokenizer only): {results['phrase_seconds']:.3f}s")
+    print(f"Articles with identical crime types: {results['same_crime_types']}")
+    print(f"Types only found by PhraseMatcher: {results['types_only_found_by_phrase_matcher']}")
+    print(f"Types only found by token Matcher: {results['types_only_found_by_legacy_matcher']}")
+
 if __name__ == "__main__":
-    test_nlp_processor()
+    main()
@@ -0,0 +1,189 @@
+"""
+Profiling hooks for the Crime Data Scraper
+CPU (cProfile plus sampled stacks) and allocation (tracemalloc) profiles of
+pipeline stages, written per stage for `python main.py --profile`
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+from config import (
+    PROFILE_DIR, PROFILE_SAMPLE_INTERVAL, PROFILE_TRACEMALLOC_FRAMES, PROFILE_TOP_N
+)
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval
+
+    The samples are written as collapsed stacks ("frame;frame;frame count"),
+    the input format of flamegraph.pl, speedscope and similar tools.
+    """
+
+    def __init__(self, thread_id: int, interval: float = PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+class StageProfiler:
+    """
+    Profiles pipeline stages into a directory
+
+    For each stage `name` it writes:
+      - name.pstats: cProfile statistics (`python -m pstats`, snakeviz)
+      - name.collapsed: sampled collapsed stacks for flame graphs
+      - name.alloc.txt: peak traced memory and the top allocation sites
+    plus a summary.txt with the top functions and allocations of every stage.
+    """
+
+    def __init__(self, output_dir: Optional[str] = None):
+        if not output_dir:
+            output_dir = os.path.join(PROFILE_DIR, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.output_dir = output_dir
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.summaries: List[Dict] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Profile a block of code as one stage
+
+        Args:
+            name (str): Stage name, used for the output file names
+        """
+        file_name = re.sub(r'[^\w.-]+', '_', name)
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start(PROFILE_TRACEMALLOC_FRAMES)
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+
+            tracemalloc.reset_peak()
+        start_snapshot = tracemalloc.take_snapshot()
+
+        sampler = StackSampler(threading.get_ident())
+        profiler = cProfile.Profile()
+        start_time = time.perf_counter()
+
+        sampler.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            sampler.stop()
+            elapsed = time.perf_counter() - start_time
+
+            end_snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+
+            profiler.dump_stats(os.path.join(self.output_dir, f"{file_name}.pstats"))
+            sampler.write_collapsed(os.path.join(self.output_dir, f"{file_name}.collapsed"))
+            allocations = self._write_allocations(
+                os.path.join(self.output_dir, f"{file_name}.alloc.txt"),
+                name, start_snapshot, end_snapshot, peak
+            )
+            self.summaries.append({
+                'stage': name,
+                'seconds': elapsed,
+                'profiler': profiler,
+                'peak_bytes': peak,
+                'allocations': allocations
+            })
+
+    def _write_allocations(self, path: str, name: str, start_snapshot, end_snapshot, peak: int) -> List[str]:
+        """
+        Write the top allocation sites of a stage
+
+        Returns:
+            List[str]: Formatted top allocation sites by size still held at
+                the end of the stage
+        """
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ]
+        start_snapshot = start_snapshot.filter_traces(ignore)
+        end_snapshot = end_snapshot.filter_traces(ignore)
+
+        growth = [
+            stat for stat in end_snapshot.compare_to(start_snapshot, 'lineno')
+            if stat.size_diff > 0
+        ][:PROFILE_TOP_N]
+        top_sites = [
+            f"{stat.size_diff / 1024:10.1f} KiB {stat.count_diff:+8d} blocks  {stat.traceback[0]}"
+            for stat in growth
+        ]
+
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"Stage: {name}\n")
+            f.write(f"Peak traced memory: {peak / (1024 * 1024):.1f} MiB\n\n")
+            f.write(f"Top {len(top_sites)} allocation sites (held at end of stage):\n")
+            for line in top_sites:
+                f.write(f"{line}\n")
+
+            f.write("\nTracebacks of the largest sites:\n")
+            for stat in growth[:5]:
+                f.write(f"\n{stat.size_diff / 1024:.1f} KiB:\n")
+                for line in stat.traceback.format():
+                    f.write(f"{line}\n")
+        return top_sites
+
+    def write_summary(self) -> str:
+        """
+        Write summary.txt with the top functions and allocation sites per stage
+
+        Returns:
+            str: Path of the summary file
+        """
+        path = os.path.join(self.output_dir, 'summary.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            for summary in self.summaries:
+                f.write(f"=== {summary['stage']}: {summary['seconds']:.2f}s, "
+                        f"peak {summary['peak_bytes'] / (1024 * 1024):.1f} MiB ===\n\n")
+
+                stats = pstats.Stats(summary['profiler'], stream=f)
+                stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+
+                f.write("Top allocation sites:\n")
+                for line in summary['allocations']:
+                    f.write(f"{line}\n")
+                f.write("\n")
+        return path
@@ -0,0 +1,253 @@
+"""
+Run journal for checkpointed full scrapes
+Records per-source and per-article progress of a run (fetched, processed,
+saved) together with the fetched content, so an interrupted run can be
+resumed with `python main.py --resume` without fetching or processing again
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from utils import setup_logging
+from article_text import ArticleText
+from config import RUN_JOURNAL_PATH, RUN_JOURNAL_RESUME_HOURS, RUN_JOURNAL_KEEP_RUNS
+
+class RunJournal:
+    """
+    SQLite journal of the current full run
+
+    Article states move fetched -> processed -> saved (or skipped/failed at
+    save time). A source is marked done once its planned links were fetched.
+    Finishing a run drops its article rows and keeps a summary.
+    """
+
+    def __init__(self, journal_path: Optional[str] = None):
+        self.logger = setup_logging()
+        self.journal_path = journal_path or RUN_JOURNAL_PATH
+        self.run_id: Optional[str] = None
+
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.journal_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run_id TEXT PRIMARY KEY, started REAL NOT NULL, finished REAL, status TEXT, summary TEXT)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "run_id TEXT NOT NULL, source TEXT NOT NULL, articles INTEGER NOT NULL, "
+            "PRIMARY KEY (run_id, source))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "run_id TEXT NOT NULL, url TEXT NOT NULL, seq INTEGER NOT NULL, source TEXT, "
+            "headline TEXT NOT NULL, content TEXT NOT NULL, processed TEXT, state TEXT NOT NULL, "
+            "PRIMARY KEY (run_id, url))"
+        )
+
+    def start(self, resume: bool = False) -> str:
+        """
+        Start a new run, or resume the latest unfinished one
+
+        Args:
+            resume (bool): Resume the latest unfinished run started within
+                RUN_JOURNAL_RESUME_HOURS; a new run is started if there is none
+
+        Returns:
+            str: Run id
+        """
+        row = self.conn.execute(
+            "SELECT run_id, started FROM runs WHERE finished IS NULL ORDER BY started DESC LIMIT 1"
+        ).fetchone()
+
+        if resume and row is not None and time.time() - row[1] <= RUN_JOURNAL_RESUME_HOURS * 3600:
+            self.run_id = row[0]
+            progress = self.progress()
+            self.logger.info(
+                f"Resuming run {self.run_id}: {progress['sources_done']} sources done, "
+                f"{progress['fetched']} fetched, {progress['processed']} processed, {progress['saved']} saved"
+            )
+            return self.run_id
+
+        # Unfinished runs that are not resumed are abandoned
+        for (run_id,) in self.conn.execute("SELECT run_id FROM runs WHERE finished IS NULL").fetchall():
+            self._close_run(run_id, 'abandoned')
+
+        self.run_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+        self.conn.execute("INSERT INTO runs (run_id, started) VALUES (?, ?)", (self.run_id, time.time()))
+        return self.run_id
+
+    def is_source_done(self, source: str) -> bool:
+        """
+        Check whether a source was finished earlier in this run
+
+        Args:
+            source (str): Source website name
+
+        Returns:
+            bool: True if mark_source_done was called for it
+        """
+        return self.conn.execute(
+            "SELECT 1 FROM sources WHERE run_id = ? AND source = ?", (self.run_id, source)
+        ).fetchone() is not None
+
+    def mark_source_done(self, source: str, articles: int):
+        """
+        Record that all planned articles of a source were fetched
+
+        Args:
+            source (str): Source website name
+            articles (int): Number of article links found on it
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sources (run_id, source, articles) VALUES (?, ?, ?)",
+            (self.run_id, source, articles)
+        )
+
+    def has_article(self, url: str) -> bool:
+        """
+        Check whether an article was already fetched in this run
+
+        Args:
+            url (str): Article URL
+
+        Returns:
+            bool: True if the article is in the journal
+        """
+        return self.conn.execute(
+            "SELECT 1 FROM articles WHERE run_id = ? AND url = ?", (self.run_id, url)
+        ).fetchone() is not None
+
+    def record_fetched(self, article: Dict):
+        """
+        Store a fetched article with its content
+
+        Args:
+            article (Dict): Article with headline, url, source and content
+        """
+        self.conn.execute(
+            "INSERT OR IGNORE INTO articles (run_id, url, seq, source, headline, content, state) "
+            "VALUES (?, ?, (SELECT COUNT(*) FROM articles WHERE run_id = ?), ?, ?, ?, 'fetched')",
+            (self.run_id, article['url'], self.run_id, article.get('source'),
+             article['headline'], article['content'])
+        )
+
+    def record_processed(self, article: Dict, processed: Dict):
+        """
+        Store the NLP result of a fetched article
+
+        Args:
+            article (Dict): Article as returned by unsaved_articles
+            processed (Dict): Result of process_article
+        """
+        record = {key: value for key, value in processed.items() if key != 'article_text'}
+        self.conn.execute(
+            "UPDATE articles SET processed = ?, state = 'processed' WHERE run_id = ? AND url = ?",
+            (json.dumps(record), self.run_id, article['url'])
+        )
+
+    def mark_saved(self, outcomes: Dict[str, str]):
+        """
+        Record save outcomes once they are committed to the article store
+
+        Args:
+            outcomes (Dict[str, str]): Article URL to 'saved', 'skipped' or 'failed'
+        """
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            "UPDATE articles SET state = ? WHERE run_id = ? AND url = ?",
+            [(state, self.run_id, url) for url, state in outcomes.items()]
+        )
+        self.conn.execute("COMMIT")
+
+    def unsaved_articles(self) -> List[Dict]:
+        """
+        Get the fetched articles of the run that are not saved yet, in fetch order
+
+        Returns:
+            List[Dict]: Articles with headline, url, source, content and
+                article_text; 'processed' holds the stored NLP result, or
+                None if the article still needs processing
+        """
+        articles = []
+        for url, source, headline, content, processed in self.conn.execute(
+            "SELECT url, source, headline, content, processed FROM articles "
+            "WHERE run_id = ? AND state IN ('fetched', 'processed') ORDER BY seq",
+            (self.run_id,)
+        ):
+            articles.append({
+                'headline': headline,
+                'url': url,
+                'source': source,
+                'content': content,
+                'article_text': ArticleText(headline, content),
+                'processed': json.loads(processed) if processed else None
+            })
+        return articles
+
+    def progress(self) -> Dict[str, int]:
+        """
+        Count the progress of the run
+
+        Returns:
+            Dict[str, int]: Sources done, and articles fetched, processed and
+                saved (each count includes the later states)
+        """
+        states = dict(self.conn.execute(
+            "SELECT state, COUNT(*) FROM articles WHERE run_id = ? GROUP BY state", (self.run_id,)
+        ).fetchall())
+        finished = states.get('saved', 0) + states.get('skipped', 0) + states.get('failed', 0)
+        return {
+            'sources_done': self.conn.execute(
+                "SELECT COUNT(*) FROM sources WHERE run_id = ?", (self.run_id,)
+            ).fetchone()[0],
+            'fetched': sum(states.values()),
+            'processed': states.get('processed', 0) + finished,
+            'saved': states.get('saved', 0),
+            'skipped': states.get('skipped', 0)
+        }
+
+    def finish(self, status: str = 'ok'):
+        """
+        Close the run, dropping its stored articles
+
+        Args:
+            status (str): Final run status
+        """
+        self._close_run(self.run_id, status)
+
+    def _close_run(self, run_id: str, status: str):
+        """
+        Mark a run finished with its progress summary and prune old runs
+
+        Args:
+            run_id (str): Run to close
+            status (str): Final run status
+        """
+        current, self.run_id = self.run_id, run_id
+        summary = self.progress()
+        self.run_id = current
+
+        self.conn.execute("BEGIN")
+        self.conn.execute(
+            "UPDATE runs SET finished = ?, status = ?, summary = ? WHERE run_id = ?",
+            (time.time(), status, json.dumps(summary), run_id)
+        )
+        self.conn.execute("DELETE FROM articles WHERE run_id = ?", (run_id,))
+        self.conn.execute("DELETE FROM sources WHERE run_id = ?", (run_id,))
+        self.conn.execute(
+            "DELETE FROM runs WHERE finished IS NOT NULL AND run_id NOT IN "
+            "(SELECT run_id FROM runs WHERE finished IS NOT NULL ORDER BY started DESC LIMIT ?)",
+            (RUN_JOURNAL_KEEP_RUNS,)
+        )
+        self.conn.execute("COMMIT")
+
+    def close(self):
+        """
+        Close the underlying database connection
+        """
+        self.conn.close()
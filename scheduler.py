@@ -8,33 +8,299 @@ import time
 import subprocess
 import sys
 import os
+import threading
+import multiprocessing
 from datetime import datetime
-from utils import setup_logging
+from typing import Dict, Optional
+from utils import setup_logging, get_memory_usage_mb
+from log_setup import configure_logging, log_forwarding_queue, shutdown_logging
+from config import (
+    DAEMON_RECYCLE_AFTER_RUNS, DAEMON_MAX_MEMORY_MB, SCHEDULED_RUN_TIMEOUT, SCHEDULED_RUN_DEADLINE,
+    PARTIAL_RUN_EXIT_CODE
+)
+
+def _pipeline_worker_main(conn, log_queue):
+    """
+    Entry point of the pipeline worker process
+    
+    Builds one CrimeDataScraper and runs the jobs received on `conn` with
+    it until told to stop, replying with the result and the process memory.
+    Log records are forwarded to the scheduler, which writes the log file.
+    
+    Args:
+        conn (multiprocessing.connection.Connection): Pipe to the scheduler
+        log_queue (multiprocessing.Queue): Scheduler's log forwarding queue
+    """
+    configure_logging(forward_queue=log_queue)
+    try:
+        _serve_pipeline_jobs(conn)
+    finally:
+        shutdown_logging()
+
+def _serve_pipeline_jobs(conn):
+    """
+    Run pipeline jobs received on `conn` until told to stop
+    
+    Args:
+        conn (multiprocessing.connection.Connection): Pipe to the scheduler
+    """
+    from main import CrimeDataScraper
+    
+    pipeline = CrimeDataScraper(deadline=SCHEDULED_RUN_DEADLINE)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        
+        kind, website_name = job
+        try:
+            if kind == 'full':
+                # Picks up a run interrupted by a crash from the run journal
+                count = pipeline.run_full_scrape(resume=True)
+            else:
+                count = pipeline.run_single_website_scrape(website_name)
+            reply = {'count': count, 'status': pipeline.last_status}
+        except Exception as e:
+            reply = {'error': str(e)}
+        reply['memory_mb'] = get_memory_usage_mb()
+        conn.send(reply)
+
+class PipelineWorker:
+    """
+    Warm scraper pipeline in a child process
+    
+    The child keeps the spaCy model, HTTP session and caches loaded between
+    runs. Replacing the process is the only way to give leaked memory
+    (including module-level singletons and freed arenas CPython keeps)
+    back to the OS, and a crash or hang of a run only takes the child down.
+    The child is spawned, so it does not inherit the scheduler's state.
+    """
+    
+    def __init__(self):
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_pipeline_worker_main, args=(child_conn, log_forwarding_queue()),
+                                       name='scraper-pipeline', daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+    
+    def run(self, kind: str, website_name: Optional[str] = None,
+            timeout: float = SCHEDULED_RUN_TIMEOUT) -> Dict:
+        """
+        Run a job in the worker process and wait for its result
+        
+        Args:
+            kind (str): 'full' for a full scrape, 'single' for one source
+            website_name (str, optional): Source name for 'single'
+            timeout (float): Seconds to wait for the result
+            
+        Returns:
+            Dict: 'count' and 'status' of the run and the worker's 'memory_mb'
+            
+        Raises:
+            RuntimeError: If the run raised, the worker died or timed out
+        """
+        self.runs += 1
+        try:
+            self._conn.send((kind, website_name))
+            if not self._conn.poll(timeout):
+                raise RuntimeError(f"no result after {timeout} seconds")
+            reply = self._conn.recv()
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"pipeline worker exited (exit code {self.process.exitcode}): {str(e)}")
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+    
+    def stop(self, timeout: float = 30):
+        """
+        Stop the worker process, killing it if it doesn't exit in time
+        
+        Args:
+            timeout (float): Seconds to wait for a clean exit
+        """
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self._conn.close()
 
 class CrimeScraperScheduler:
     """
     Scheduler class for automating crime data scraping
     """
     
-    def __init__(self):
+    def __init__(self, daemon: bool = False,
+                 recycle_after_runs: int = DAEMON_RECYCLE_AFTER_RUNS,
+                 max_memory_mb: float = DAEMON_MAX_MEMORY_MB):
         self.logger = setup_logging()
         self.script_path = os.path.join(os.path.dirname(__file__), 'main.py')
         self.python_path = sys.executable
+        
+        # Daemon mode keeps one warm pipeline in a worker process
+        self.daemon = daemon
+        self.recycle_after_runs = recycle_after_runs
+        self.max_memory_mb = max_memory_mb
+        self._worker: Optional[PipelineWorker] = None
+        self._run_lock = threading.Lock()
+        self.planner = None
     
     def run_scraper(self):
         """
-        Run the scraper script
+        Run a scheduled scrape, skipping it if the previous one is still running
+        """
+        if not self._run_lock.acquire(blocking=False):
+            self.logger.warning("Previous scrape still running, skipping this run")
+            return
+        
+        try:
+            if self.daemon:
+                self.run_in_process()
+            else:
+                self.run_subprocess()
+        finally:
+            self._run_lock.release()
+    
+    def _get_worker(self) -> PipelineWorker:
+        """
+        Get the warm pipeline worker, starting it if needed
+        
+        Returns:
+            PipelineWorker: Worker process running the scraper pipeline
+        """
+        if self._worker is None:
+            self.logger.info("Starting new scraper pipeline worker process")
+            self._worker = PipelineWorker()
+        return self._worker
+    
+    def _recycle_pipeline(self, reason: str):
+        """
+        Stop the worker process so the next run starts a fresh one
+        
+        Args:
+            reason (str): Why the pipeline is recycled
+        """
+        self.logger.info(f"Recycling scraper pipeline worker: {reason}")
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+    
+    def _check_recycle(self, memory_mb: Optional[float]):
+        """
+        Recycle the worker after too many runs or when its memory has grown
+        
+        Args:
+            memory_mb (float, optional): Worker memory after its last run
+        """
+        runs = self._worker.runs if self._worker is not None else 0
+        if self.recycle_after_runs and runs >= self.recycle_after_runs:
+            self._recycle_pipeline(f"reached {runs} runs")
+        elif memory_mb is not None and self.max_memory_mb and memory_mb > self.max_memory_mb:
+            self._recycle_pipeline(f"memory at {memory_mb:.0f} MB exceeds {self.max_memory_mb} MB")
+    
+    def run_in_process(self):
+        """
+        Run a full scrape on the warm pipeline worker
+        
+        The spaCy model, HTTP session and caches are reused between runs.
+        A run that fails, raises, kills the worker or exceeds SCHEDULED_RUN_TIMEOUT
+        is isolated: the worker is replaced on the next run. The worker is
+        also replaced after a number of runs or when its memory grows past
+        the limit, to contain leaks.
+        """
+        self.logger.info("Starting scheduled scrape on the pipeline worker")
+        start_time = datetime.now()
+        
+        try:
+            result = self._get_worker().run('full')
+            
+            duration = datetime.now() - start_time
+            if result['status'] == 'failed':
+                self.logger.error(f"Scheduled scrape failed after {duration}, "
+                                  f"saved {result['count']} articles")
+                self._recycle_pipeline("previous run failed")
+                return
+            elif result['status'] == 'partial':
+                self.logger.warning(f"Scheduled scrape reached its deadline after {duration}, "
+                                    f"saved {result['count']} articles; the next run resumes it")
+            else:
+                self.logger.info(f"Scheduled scrape completed successfully in {duration}, "
+                                 f"saved {result['count']} articles")
+        except Exception as e:
+            self.logger.error(f"Scheduled scrape on the pipeline worker crashed: {str(e)}")
+            self._recycle_pipeline("previous run crashed")
+            return
+        
+        self._check_recycle(result.get('memory_mb'))
+    
+    def run_due_sources(self):
+        """
+        Scrape every source whose adaptive polling interval has elapsed
+        
+        Sources run one at a time on the warm pipeline worker, most overdue
+        first. A source whose scrape fails or crashes is backed off without
+        affecting the others.
+        """
+        if self.planner is None:
+            return
+        
+        if not self._run_lock.acquire(blocking=False):
+            self.logger.warning("Previous scrape still running, skipping this check")
+            return
+        
+        try:
+            due = self.planner.due_sources()
+            if not due:
+                return
+            
+            self.logger.info(f"Adaptive polling: {len(due)} sources due")
+            for name in due:
+                try:
+                    result = self._get_worker().run('single', name)
+                    count = result['count']
+                    if result['status'] == 'failed':
+                        # Unreachable, blocked or broken: back off without
+                        # treating the source as quiet
+                        interval = self.planner.record_poll(name, 0, failed=True)
+                        self.logger.warning(f"Polling {name} failed, next poll in ~{interval:.0f} minutes")
+                    else:
+                        interval = self.planner.record_poll(name, count)
+                        self.logger.info(f"Polled {name}: {count} new articles, next poll in ~{interval:.0f} minutes")
+                except Exception as e:
+                    self.logger.error(f"Adaptive scrape of {name} crashed: {str(e)}")
+                    self.planner.record_poll(name, 0, failed=True)
+                    self._recycle_pipeline("previous run crashed")
+                    continue
+                
+                # Every source scrape counts as one run of the worker
+                self._check_recycle(result.get('memory_mb'))
+        finally:
+            self._run_lock.release()
+    
+    def run_subprocess(self):
+        """
+        Run the scraper script in a new Python process
         """
         try:
             self.logger.info("Starting scheduled scrape")
             start_time = datetime.now()
             
-            # Run the main scraper script
+            # Run the main scraper script, resuming a run that was interrupted
+            # (e.g. by the timeout) from the run journal
             result = subprocess.run(
-                [self.python_path, self.script_path, '--mode', 'full'],
+                [self.python_path, self.script_path, '--mode', 'full', '--resume',
+                 '--deadline', str(SCHEDULED_RUN_DEADLINE)],
                 capture_output=True,
                 text=True,
-                timeout=3600  # 1 hour timeout
+                timeout=SCHEDULED_RUN_TIMEOUT
             )
             
             end_time = datetime.now()
@@ -43,12 +309,16 @@ class CrimeScraperScheduler:
             if result.returncode == 0:
                 self.logger.info(f"Scheduled scrape completed successfully in {duration}")
                 self.logger.info(f"Output: {result.stdout}")
+            elif result.returncode == PARTIAL_RUN_EXIT_CODE:
+                self.logger.warning(f"Scheduled scrape reached its deadline after {duration}, "
+                                    f"saved partial results; the next run resumes it")
+                self.logger.info(f"Output: {result.stdout}")
             else:
                 self.logger.error(f"Scheduled scrape failed with return code {result.returncode}")
                 self.logger.error(f"Error: {result.stderr}")
                 
         except subprocess.TimeoutExpired:
-            self.logger.error("Scheduled scrape timed out after 1 hour")
+            self.logger.error(f"Scheduled scrape timed out after {SCHEDULED_RUN_TIMEOUT} seconds; the next run resumes it")
         except Exception as e:
             self.logger.error(f"Error running scheduled scrape: {str(e)}")
     
@@ -79,6 +349,16 @@ class CrimeScraperScheduler:
         schedule.every(hours).hours.do(self.run_scraper)
         self.logger.info(f"Scheduled scraping every {hours} hours")
     
+    def schedule_adaptive(self):
+        """
+        Schedule each source on its own interval adapted to its publication rate
+        """
+        from source_polling import SourcePollingPlanner
+        
+        self.planner = SourcePollingPlanner()
+        schedule.every(1).minutes.do(self.run_due_sources)
+        self.logger.info(f"Scheduled adaptive polling for {len(self.planner.sources)} sources")
+    
     def run_scheduler(self):
         """
         Run the scheduler (blocking)
@@ -94,6 +374,10 @@ class CrimeScraperScheduler:
             self.logger.info("Scheduler stopped by user")
         except Exception as e:
             self.logger.error(f"Scheduler error: {str(e)}")
+        finally:
+            if self._worker is not None:
+                self._worker.stop()
+                self._worker = None
 
 def main():
     """
@@ -102,7 +386,7 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='Crime Data Scraper Scheduler')
-    parser.add_argument('--schedule', choices=['daily', 'hourly', 'custom'], 
+    parser.add_argument('--schedule', choices=['daily', 'hourly', 'custom', 'adaptive'], 
                        default='daily', help='Scheduling frequency')
     parser.add_argument('--time', type=str, default='09:00', 
                        help='Time for daily schedule (HH:MM format)')
@@ -110,10 +394,23 @@ def main():
                        help='Hours interval for custom schedule')
     parser.add_argument('--run-once', action='store_true',
                        help='Run scraper once and exit')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep the scraper pipeline warm in a worker process between runs')
+    parser.add_argument('--recycle-runs', type=int, default=DAEMON_RECYCLE_AFTER_RUNS,
+                       help='Daemon mode: rebuild the pipeline after this many runs (0 = never)')
+    parser.add_argument('--max-memory-mb', type=float, default=DAEMON_MAX_MEMORY_MB,
+                       help='Daemon mode: rebuild the pipeline when memory exceeds this (0 = never)')
     
     args = parser.parse_args()
+    # Own log file (also holding the daemon worker's records), so the
+    # scheduler never shares one with a scrape run in another process
+    configure_logging(role='scheduler')
     
-    scheduler = CrimeScraperScheduler()
+    scheduler = CrimeScraperScheduler(
+        daemon=args.daemon,
+        recycle_after_runs=args.recycle_runs,
+        max_memory_mb=args.max_memory_mb
+    )
     
     if args.run_once:
         scheduler.run_scraper()
@@ -125,6 +422,9 @@ def main():
         scheduler.schedule_hourly()
     elif args.schedule == 'custom':
         scheduler.schedule_every_n_hours(args.hours)
+    elif args.schedule == 'adaptive':
+        # Per-source polling always runs on the warm pipeline worker
+        scheduler.schedule_adaptive()
     
     scheduler.run_scheduler()
 
@@ -5,55 +5,78 @@ Handles scraping news websites for crime-related articles
 
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 import time
 from urllib.parse import urljoin, urlparse
 from utils import (
     setup_logging, get_random_user_agent, clean_text, 
     rate_limit_delay, is_crime_related, url_is_duplicate
 )
+from article_text import ArticleText
+from metrics import get_run_metrics
 from config import (
     NEWS_WEBSITES, CRIME_KEYWORDS, REQUEST_TIMEOUT, 
-    MAX_RETRIES, DELAY_BETWEEN_REQUESTS
+    MAX_RETRIES, DELAY_BETWEEN_REQUESTS, DEADLINE_YIELD_HISTORY_RUNS
 )
 
+if TYPE_CHECKING:
+    from run_journal import RunJournal
+    from deadline import Deadline
+    from fetch_planner import FetchPlanner
+    from crime_prefilter import CrimePreFilter
+
 class WebScraper:
     """
     Web scraper class for extracting crime-related news articles
     """
     
-    def __init__(self):
+    def __init__(self, prefilter: Optional['CrimePreFilter'] = None):
         self.logger = setup_logging()
+        # Pre-filter of the NLP processor: links it skipped before are not
+        # fetched again while they score below its threshold
+        self.prefilter = prefilter
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': get_random_user_agent()
         })
+        # Fetch plan summary of the last scrape_all_websites call
+        self.last_plan: Optional[Dict] = None
+        # Whether the hub page of the last extract_article_links call could
+        # not be fetched (an empty link list otherwise means a quiet source)
+        self.last_links_failed = False
     
-    def get_page_content(self, url: str) -> Optional[BeautifulSoup]:
+    def get_page_content(self, url: str, source: Optional[str] = None) -> Optional[BeautifulSoup]:
         """
         Get page content with error handling and retries
         
         Args:
             url (str): URL to scrape
+            source (str, optional): Source website name, for run metrics
             
         Returns:
             Optional[BeautifulSoup]: Parsed HTML content or None if failed
         """
+        metrics = get_run_metrics()
         for attempt in range(MAX_RETRIES):
             try:
                 self.logger.info(f"Fetching URL: {url} (Attempt {attempt + 1})")
                 
-                response = self.session.get(
-                    url, 
-                    timeout=REQUEST_TIMEOUT,
-                    headers={'User-Agent': get_random_user_agent()}
-                )
-                response.raise_for_status()
+                with metrics.stage('fetch', source):
+                    response = self.session.get(
+                        url, 
+                        timeout=REQUEST_TIMEOUT,
+                        headers={'User-Agent': get_random_user_agent()}
+                    )
+                    response.raise_for_status()
+                metrics.increment('pages_fetched', source)
+                metrics.increment('bytes_fetched', source, len(response.content))
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
+                with metrics.stage('parse', source):
+                    soup = BeautifulSoup(response.content, 'html.parser')
                 return soup
                 
             except requests.exceptions.RequestException as e:
+                metrics.increment('fetch_errors', source)
                 self.logger.warning(f"Request failed (attempt {attempt + 1}): {str(e)}")
                 if attempt < MAX_RETRIES - 1:
                     time.sleep(2 ** attempt)  # Exponential backoff
@@ -72,48 +95,52 @@ class WebScraper:
         Returns:
             List[Dict]: List of article information dictionaries
         """
-        soup = self.get_page_content(website_config['url'])
-        if not soup:
-            return []
+        source = website_config['name']
+        with get_run_metrics().stage('extract_article_links', source):
+            soup = self.get_page_content(website_config['url'], source)
+            self.last_links_failed = soup is None
+            if not soup:
+                return []
         
-        articles = []
+            articles = []
         
-        try:
-            # Find article links using the CSS selector
-            article_elements = soup.select(website_config['article_selector'])
+            try:
+                # Find article links using the CSS selector
+                article_elements = soup.select(website_config['article_selector'])
             
-            for element in article_elements:
-                try:
-                    # Extract headline and URL
-                    headline = clean_text(element.get_text())
-                    article_url = element.get('href')
+                for element in article_elements:
+                    try:
+                        # Extract headline and URL
+                        headline = clean_text(element.get_text())
+                        article_url = element.get('href')
                     
-                    if not article_url or not isinstance(article_url, str):
-                        continue
+                        if not article_url or not isinstance(article_url, str):
+                            continue
                     
-                    # Convert relative URLs to absolute
-                    article_url = urljoin(website_config['url'], article_url)
+                        # Convert relative URLs to absolute
+                        article_url = urljoin(website_config['url'], article_url)
                     
-                    # Check if it's crime-related and not a duplicate
-                    if (is_crime_related(headline, CRIME_KEYWORDS) and 
-                        not url_is_duplicate(article_url)):
+                        # Check if it's crime-related and not a duplicate
+                        if (is_crime_related(headline, CRIME_KEYWORDS) and 
+                            not url_is_duplicate(article_url, self.prefilter.threshold if self.prefilter else None)):
                         
-                        articles.append({
-                            'headline': headline,
-                            'url': article_url,
-                            'source': website_config['name']
-                        })
+                            articles.append({
+                                'headline': headline,
+                                'url': article_url,
+                                'source': website_config['name']
+                            })
                         
-                        self.logger.info(f"Found crime-related article: {headline}")
+                            self.logger.info(f"Found crime-related article: {headline}")
                     
-                except Exception as e:
-                    self.logger.warning(f"Error processing article element: {str(e)}")
-                    continue
+                    except Exception as e:
+                        self.logger.warning(f"Error processing article element: {str(e)}")
+                        continue
         
-        except Exception as e:
-            self.logger.error(f"Error extracting articles from {website_config['name']}: {str(e)}")
+            except Exception as e:
+                self.logger.error(f"Error extracting articles from {website_config['name']}: {str(e)}")
         
-        return articles
+            get_run_metrics().increment('links_found', source, len(articles))
+            return articles
     
     def extract_article_content(self, article_url: str, website_config: Dict) -> Optional[str]:
         """
@@ -126,68 +153,150 @@ class WebScraper:
         Returns:
             Optional[str]: Article content or None if failed
         """
-        soup = self.get_page_content(article_url)
-        if not soup:
-            return None
+        source = website_config.get('name')
+        with get_run_metrics().stage('extract_article_content', source):
+            soup = self.get_page_content(article_url, source)
+            if not soup:
+                return None
         
-        try:
-            # Try to find content using the configured selector
-            content_elements = soup.select(website_config.get('content_selector', 'p'))
+            try:
+                # Try to find content using the configured selector
+                content_elements = soup.select(website_config.get('content_selector', 'p'))
             
-            if content_elements:
-                content = ' '.join([clean_text(elem.get_text()) for elem in content_elements])
-            else:
-                # Fallback: try common content selectors
-                fallback_selectors = [
-                    'div.article-content', 'div.content', 'article', 
-                    'div.story-body', 'div.post-content', 'p'
-                ]
+                if content_elements:
+                    content = ' '.join([clean_text(elem.get_text()) for elem in content_elements])
+                else:
+                    # Fallback: try common content selectors
+                    fallback_selectors = [
+                        'div.article-content', 'div.content', 'article', 
+                        'div.story-body', 'div.post-content', 'p'
+                    ]
                 
-                content = ""
-                for selector in fallback_selectors:
-                    elements = soup.select(selector)
-                    if elements:
-                        content = ' '.join([clean_text(elem.get_text()) for elem in elements])
-                        break
+                    content = ""
+                    for selector in fallback_selectors:
+                        elements = soup.select(selector)
+                        if elements:
+                            content = ' '.join([clean_text(elem.get_text()) for elem in elements])
+                            break
             
-            return content if content else None
+                get_run_metrics().increment('articles_fetched' if content else 'content_missing', source)
+                return content if content else None
             
-        except Exception as e:
-            self.logger.error(f"Error extracting content from {article_url}: {str(e)}")
-            return None
+            except Exception as e:
+                self.logger.error(f"Error extracting content from {article_url}: {str(e)}")
+                return None
     
-    def scrape_all_websites(self) -> List[Dict]:
+    def scrape_all_websites(self, journal: Optional['RunJournal'] = None,
+                            deadline: Optional['Deadline'] = None,
+                            planner: Optional['FetchPlanner'] = None) -> List[Dict]:
         """
         Scrape all configured websites for crime-related articles
         
+        Article links are collected from every website first, then fetched
+        in priority order within the fetch budgets (see fetch_planner.py).
+        
+        Args:
+            journal (RunJournal, optional): Run journal; sources it marks done
+                and articles it already holds are skipped, and every fetched
+                article is recorded in it
+            deadline (Deadline, optional): Run deadline; websites are scraped
+                in order of their recent yield, and no fetch is started once
+                the remaining time is needed to process what was fetched, so
+                the lowest-priority articles are the ones left out
+            planner (FetchPlanner, optional): Fetch planner (default: one with
+                the configured budgets)
+        
         Returns:
-            List[Dict]: List of all found articles with content
+            List[Dict]: List of all found articles with content (fetched by
+                this call; earlier ones are in the journal)
         """
+        from fetch_planner import FetchPlanner
+        
+        planner = planner or FetchPlanner()
+        metrics = get_run_metrics()
         all_articles = []
         
-        for website_config in NEWS_WEBSITES:
+        websites = NEWS_WEBSITES
+        if deadline is not None and deadline.enabled:
+            from metrics import recent_source_yields
+            yields = recent_source_yields(DEADLINE_YIELD_HISTORY_RUNS)
+            websites = sorted(NEWS_WEBSITES, key=lambda config: -yields.get(config['name'], 0))
+        
+        # Collect candidate article links from every website
+        candidates: Dict[str, List[Dict]] = {}
+        website_configs: Dict[str, Dict] = {}
+        for website_config in websites:
+            if journal is not None and journal.is_source_done(website_config['name']):
+                self.logger.info(f"Skipping website (already fetched in this run): {website_config['name']}")
+                continue
+            
+            if deadline is not None and not deadline.allows_fetch():
+                deadline.skip_source(website_config['name'])
+                continue
+            
             self.logger.info(f"Scraping website: {website_config['name']}")
             
             try:
-                # Get article links
-                articles = self.extract_article_links(website_config)
-                
-                # Get full content for each article
-                for article in articles:
-                    rate_limit_delay(DELAY_BETWEEN_REQUESTS)
-                    
-                    content = self.extract_article_content(article['url'], website_config)
-                    if content:
-                        article['content'] = content
-                        all_articles.append(article)
-                        self.logger.info(f"Successfully scraped: {article['headline']}")
-                    else:
-                        self.logger.warning(f"Failed to get content for: {article['headline']}")
-                
+                candidates[website_config['name']] = self.extract_article_links(website_config)
+                website_configs[website_config['name']] = website_config
             except Exception as e:
                 self.logger.error(f"Error scraping {website_config['name']}: {str(e)}")
                 continue
         
+        # Fetch the most valuable articles first, within the budgets
+        already_fetched = set()
+        if journal is not None:
+            already_fetched = {
+                article['url'] for articles in candidates.values() for article in articles
+                if journal.has_article(article['url'])
+            }
+        planned, over_budget = planner.plan(candidates, already_fetched)
+        for source, count in over_budget.items():
+            metrics.increment('fetches_over_budget', source, count)
+        self.last_plan = {
+            'candidates': sum(len(articles) for articles in candidates.values()),
+            'already_fetched': len(already_fetched),
+            'planned': len(planned),
+            'over_budget': over_budget
+        }
+        if over_budget:
+            self.logger.info(f"Fetch budget: planned {len(planned)} articles, "
+                             f"left out {sum(over_budget.values())} lower-priority ones")
+        
+        cut_off = set()
+        for index, article in enumerate(planned):
+            if deadline is not None and not deadline.allows_fetch():
+                for skipped in planned[index:]:
+                    deadline.skip_fetches(skipped['source'], 1)
+                    cut_off.add(skipped['source'])
+                break
+            
+            rate_limit_delay(DELAY_BETWEEN_REQUESTS)
+            
+            try:
+                content = self.extract_article_content(article['url'], website_configs[article['source']])
+            except Exception as e:
+                self.logger.error(f"Error scraping {article['url']}: {str(e)}")
+                continue
+            
+            if content:
+                article['content'] = content
+                article['article_text'] = ArticleText(article['headline'], content)
+                all_articles.append(article)
+                if deadline is not None:
+                    deadline.pending += 1
+                if journal is not None:
+                    journal.record_fetched(article)
+                self.logger.info(f"Successfully scraped: {article['headline']}")
+            else:
+                self.logger.warning(f"Failed to get content for: {article['headline']}")
+        
+        # A source cut off by the deadline is finished by a resumed run
+        if journal is not None:
+            for source, articles in candidates.items():
+                if source not in cut_off:
+                    journal.mark_source_done(source, len(articles))
+        
         self.logger.info(f"Total articles scraped: {len(all_articles)}")
         return all_articles
     
@@ -0,0 +1,156 @@
+"""
+Adaptive per-source polling for the Crime Data Scraper
+Tracks how often each source publishes new crime articles and plans when
+each source should be scraped next
+"""
+
+import json
+import os
+import random
+import time
+from typing import Dict, List, Optional
+from utils import setup_logging
+from config import (
+    NEWS_WEBSITES, SOURCE_POLLING_STATE_PATH,
+    ADAPTIVE_MIN_INTERVAL_MINUTES, ADAPTIVE_MAX_INTERVAL_MINUTES,
+    ADAPTIVE_DEFAULT_INTERVAL_MINUTES, ADAPTIVE_TARGET_ARTICLES_PER_POLL,
+    ADAPTIVE_RATE_SMOOTHING, ADAPTIVE_BACKOFF_FACTOR, ADAPTIVE_JITTER
+)
+
+class SourcePollingPlanner:
+    """
+    Plans per-source polling intervals from observed publication rates
+
+    Each source keeps an exponentially smoothed rate of new articles per
+    hour. The next interval is chosen so that a poll is expected to find
+    about ADAPTIVE_TARGET_ARTICLES_PER_POLL new articles, clamped to the
+    configured minimum and maximum and spread with random jitter. Sources
+    that return nothing back off multiplicatively.
+    """
+
+    def __init__(self, sources: Optional[List[Dict]] = None, state_path: Optional[str] = None):
+        self.logger = setup_logging()
+        self.sources = sources if sources is not None else NEWS_WEBSITES
+        self.state_path = state_path or SOURCE_POLLING_STATE_PATH
+        self.state: Dict[str, Dict] = self._load_state()
+
+        now = time.time()
+        for index, source in enumerate(self.sources):
+            if source['name'] not in self.state:
+                # Stagger first polls so new sources don't all fire at once
+                self.state[source['name']] = {
+                    'rate_per_hour': None,
+                    'interval_minutes': ADAPTIVE_DEFAULT_INTERVAL_MINUTES,
+                    'last_poll': None,
+                    'next_poll': now + index * 60,
+                    'polls': 0,
+                    'new_articles': 0
+                }
+
+    def _load_state(self) -> Dict[str, Dict]:
+        """
+        Load persisted polling state
+
+        Returns:
+            Dict[str, Dict]: Polling state per source name
+        """
+        try:
+            if os.path.exists(self.state_path):
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Could not load source polling state: {str(e)}")
+        return {}
+
+    def save_state(self):
+        """
+        Persist polling state (written to a temporary file, then renamed)
+        """
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+    def due_sources(self, now: Optional[float] = None) -> List[str]:
+        """
+        Get the sources whose next poll time has passed
+
+        Args:
+            now (float, optional): Current UNIX time
+
+        Returns:
+            List[str]: Source names, most overdue first
+        """
+        now = now if now is not None else time.time()
+        configured = {source['name'] for source in self.sources}
+
+        due = [
+            (state['next_poll'], name) for name, state in self.state.items()
+            if name in configured and state['next_poll'] <= now
+        ]
+        return [name for _, name in sorted(due)]
+
+    def record_poll(self, source_name: str, new_articles: int, failed: bool = False,
+                    now: Optional[float] = None) -> float:
+        """
+        Record the outcome of a poll and schedule the next one
+
+        Args:
+            source_name (str): Name of the polled source
+            new_articles (int): Number of new crime articles saved
+            failed (bool): Whether the poll failed (rate is left unchanged)
+            now (float, optional): Current UNIX time
+
+        Returns:
+            float: Next interval in minutes (before jitter)
+        """
+        now = now if now is not None else time.time()
+        state = self.state[source_name]
+
+        if not failed and state['last_poll'] is not None:
+            elapsed_hours = max((now - state['last_poll']) / 3600, 1 / 60)
+            observed = new_articles / elapsed_hours
+            if state['rate_per_hour'] is None:
+                state['rate_per_hour'] = observed
+            else:
+                state['rate_per_hour'] = (
+                    ADAPTIVE_RATE_SMOOTHING * observed
+                    + (1 - ADAPTIVE_RATE_SMOOTHING) * state['rate_per_hour']
+                )
+
+        if failed or new_articles == 0:
+            interval = state['interval_minutes'] * ADAPTIVE_BACKOFF_FACTOR
+        elif state['rate_per_hour']:
+            interval = ADAPTIVE_TARGET_ARTICLES_PER_POLL / state['rate_per_hour'] * 60
+        else:
+            # First poll: no elapsed time to derive a rate from yet
+            interval = state['interval_minutes']
+
+        interval = min(max(interval, ADAPTIVE_MIN_INTERVAL_MINUTES), ADAPTIVE_MAX_INTERVAL_MINUTES)
+        jitter = random.uniform(1 - ADAPTIVE_JITTER, 1 + ADAPTIVE_JITTER)
+
+        state['interval_minutes'] = interval
+        state['last_poll'] = now
+        state['next_poll'] = now + interval * jitter * 60
+        state['polls'] += 1
+        state['new_articles'] += new_articles
+
+        self.save_state()
+        return interval
+
+    def summary(self) -> List[Dict]:
+        """
+        Get the current polling plan
+
+        Returns:
+            List[Dict]: Per source name, rate, interval and next poll time
+        """
+        return [
+            {
+                'name': name,
+                'rate_per_hour': state['rate_per_hour'],
+                'interval_minutes': state['interval_minutes'],
+                'next_poll': state['next_poll']
+            }
+            for name, state in sorted(self.state.items(), key=lambda item: item[1]['next_poll'])
+        ]
@@ -0,0 +1,593 @@
+"""
+Incrementally maintained statistics for the Crime Data Scraper
+Keeps counts per crime type, location, source and day, plus hash
+cardinalities, so `main.py --mode stats` doesn't read the article store
+"""
+
+import base64
+import hashlib
+import json
+import math
+import os
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+from utils import setup_logging
+from config import NEWS_WEBSITES, STATS_ROLLUP_PATH, STATS_CHUNK_SIZE, STATS_TOP_K
+
+# Columns read from the article store when rebuilding the rollup
+ROLLUP_COLUMNS = [
+    "date_scraped", "article_url", "what", "where", "injuries", "fatalities",
+    "arrests", "content_hash", "similarity_hash", "duplicate_note"
+]
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with fixed memory
+
+    Uses 2**precision one-byte registers (16 KB at the default precision,
+    about 0.8% standard error). Small cardinalities are counted with linear
+    counting, which is close to exact.
+    """
+
+    def __init__(self, precision: int = 14, registers: Optional[bytes] = None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+
+    def add(self, value: str):
+        """
+        Add a value to the counter
+
+        Args:
+            value (str): Value to count
+        """
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        index = hashed >> (64 - self.precision)
+        remainder = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        """
+        Estimate the number of distinct values added
+
+        Returns:
+            int: Estimated cardinality
+        """
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -register for register in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: 'HyperLogLog'):
+        """
+        Merge another counter of the same precision into this one
+        """
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def to_state(self) -> Dict:
+        return {
+            'precision': self.precision,
+            'registers': base64.b64encode(bytes(self.registers)).decode('ascii')
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> 'HyperLogLog':
+        return cls(state['precision'], base64.b64decode(state['registers']))
+
+class TopKCounter:
+    """
+    Approximate counts of the most frequent values with fixed memory
+
+    A Misra-Gries summary: at most 2*k values are tracked. When more
+    arrive, the (k+1)-th largest count is subtracted from every value and
+    values left at zero are dropped. Counts are exact while no more than
+    2*k distinct values have been seen; after that each count is at most
+    total / (k+1) too low, and every value more frequent than that is kept.
+    """
+
+    def __init__(self, k: int = STATS_TOP_K, counts: Optional[Dict[str, int]] = None):
+        self.k = k
+        self.counts: Dict[str, int] = dict(counts or {})
+        self._prune()
+
+    def add(self, value: str, count: int = 1):
+        """
+        Count a value
+
+        Args:
+            value (str): Value to count
+            count (int): Number of occurrences
+        """
+        self.counts[value] = self.counts.get(value, 0) + count
+        if len(self.counts) > 2 * self.k:
+            self._prune()
+
+    def _prune(self):
+        """
+        Shrink the summary back to at most k values
+        """
+        if len(self.counts) <= 2 * self.k:
+            return
+        threshold = sorted(self.counts.values(), reverse=True)[self.k]
+        self.counts = {
+            value: count - threshold
+            for value, count in self.counts.items() if count > threshold
+        }
+
+def _clean(value) -> Optional[str]:
+    """
+    Normalize a stored cell, treating empty strings and NaN as missing
+    """
+    if value is None or value == '' or (isinstance(value, float) and value != value):
+        return None
+    return str(value)
+
+def _to_number(value: Optional[str]) -> int:
+    """
+    Parse a count column, ignoring values that are not plain numbers
+    """
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def _domain(url: str) -> str:
+    """
+    Get the lowercased host of a URL without a leading "www."
+    """
+    domain = urlparse(url).netloc.lower()
+    return domain[4:] if domain.startswith('www.') else domain
+
+_sources_by_domain: Optional[Dict[str, List[tuple]]] = None
+
+def _path_segments(path: str) -> List[str]:
+    """
+    Split a URL path into its non-empty segments
+    """
+    return [segment for segment in path.split('/') if segment]
+
+def _domain_sources(domain: str) -> List[tuple]:
+    """
+    Get the configured sources on a domain
+
+    Args:
+        domain (str): Domain as returned by _domain
+
+    Returns:
+        List[tuple]: (scheme, path segments, name) of each source on the domain
+    """
+    global _sources_by_domain
+    if _sources_by_domain is None:
+        _sources_by_domain = {}
+        for source in NEWS_WEBSITES:
+            parsed = urlparse(source['url'])
+            _sources_by_domain.setdefault(_domain(source['url']), []).append(
+                (parsed.scheme.lower(), _path_segments(parsed.path), source['name'])
+            )
+    return _sources_by_domain.get(domain, [])
+
+def source_for_url(url: Optional[str]) -> str:
+    """
+    Map an article URL to the name of the configured news source
+
+    A domain with a single source maps to it, since articles are rarely
+    under the hub page's path. When several sources share a domain (e.g.
+    all sources on the news simulator), the source whose URL shares the
+    longest scheme and path prefix with the article URL wins.
+
+    Args:
+        url (str): Article URL
+
+    Returns:
+        str: Source name, the URL's domain if no single source matches, or 'unknown'
+    """
+    if not url:
+        return 'unknown'
+    domain = _domain(url)
+    candidates = _domain_sources(domain)
+    if len(candidates) == 1:
+        return candidates[0][2]
+    if not candidates:
+        return domain or 'unknown'
+
+    parsed = urlparse(url)
+    scheme, segments = parsed.scheme.lower(), _path_segments(parsed.path)
+
+    def shared_prefix(candidate: tuple) -> tuple:
+        source_scheme, source_segments, _ = candidate
+        shared = 0
+        for source_segment, segment in zip(source_segments, segments):
+            if source_segment != segment:
+                break
+            shared += 1
+        return shared, source_scheme == scheme
+
+    ranked = sorted(((shared_prefix(candidate), candidate[2]) for candidate in candidates), reverse=True)
+    best, name = ranked[0]
+    if best[0] == 0 or ranked[1][0] == best:
+        return domain
+    return name
+
+class StatsRollup:
+    """
+    Aggregated article statistics, updated as articles are saved
+
+    The rollup stores the signature of the article store it describes.
+    Increments are only applied when the store still has the signature the
+    rollup was saved with, so writes made behind its back leave it stale
+    instead of wrong; a stale rollup is rebuilt from the store.
+    """
+
+    def __init__(self, state_path: Optional[str] = None, load: bool = True):
+        self.logger = setup_logging()
+        self.state_path = state_path or STATS_ROLLUP_PATH
+        self.signature: Optional[str] = None
+        self.reset()
+        if load:
+            self._load_state()
+
+    def reset(self):
+        """
+        Clear all counters
+        """
+        self.total = 0
+        self.earliest: Optional[str] = None
+        self.latest: Optional[str] = None
+        self.crime_types = TopKCounter()
+        self.locations = TopKCounter()
+        self.sources: Dict[str, int] = {}
+        self.days: Dict[str, int] = {}
+        self.with_counts = {'injuries': 0, 'fatalities': 0, 'arrests': 0}
+        self.totals = {'injuries': 0, 'fatalities': 0, 'arrests': 0}
+        self.with_hashes = 0
+        self.marked_similar = 0
+        self.content_hashes = HyperLogLog()
+        self.similarity_hashes = HyperLogLog()
+
+    def _load_state(self):
+        """
+        Load the persisted rollup, if any
+        """
+        try:
+            if not os.path.exists(self.state_path):
+                return
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            self.logger.warning(f"Could not load statistics rollup: {str(e)}")
+            return
+
+        self.signature = state['signature']
+        self.total = state['total']
+        self.earliest = state['earliest']
+        self.latest = state['latest']
+        self.crime_types = TopKCounter(counts=state['crime_types'])
+        self.locations = TopKCounter(counts=state['locations'])
+        self.sources = state['sources']
+        self.days = state['days']
+        self.with_counts = state['with_counts']
+        self.totals = state['totals']
+        self.with_hashes = state['with_hashes']
+        self.marked_similar = state['marked_similar']
+        self.content_hashes = HyperLogLog.from_state(state['content_hashes'])
+        self.similarity_hashes = HyperLogLog.from_state(state['similarity_hashes'])
+
+    def save(self, signature: Optional[str]):
+        """
+        Persist the rollup (written to a temporary file, then renamed)
+
+        Args:
+            signature (str): Signature of the store after the counted writes
+        """
+        self.signature = signature
+        state = {
+            'signature': self.signature,
+            'total': self.total,
+            'earliest': self.earliest,
+            'latest': self.latest,
+            'crime_types': self.crime_types.counts,
+            'locations': self.locations.counts,
+            'sources': self.sources,
+            'days': self.days,
+            'with_counts': self.with_counts,
+            'totals': self.totals,
+            'with_hashes': self.with_hashes,
+            'marked_similar': self.marked_similar,
+            'content_hashes': self.content_hashes.to_state(),
+            'similarity_hashes': self.similarity_hashes.to_state()
+        }
+
+        temp_path = f"{self.state_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def add(self, article: Dict):
+        """
+        Count one saved article
+
+        Args:
+            article (Dict): Article row keyed by CSV_COLUMNS
+        """
+        self.total += 1
+
+        date_scraped = _clean(article.get('date_scraped'))
+        if date_scraped:
+            if self.earliest is None or date_scraped < self.earliest:
+                self.earliest = date_scraped
+            if self.latest is None or date_scraped > self.latest:
+                self.latest = date_scraped
+            day = date_scraped[:10]
+            self.days[day] = self.days.get(day, 0) + 1
+
+        for counter, column in ((self.crime_types, 'what'), (self.locations, 'where')):
+            value = _clean(article.get(column))
+            if value:
+                counter.add(value)
+
+        source = source_for_url(_clean(article.get('article_url')))
+        self.sources[source] = self.sources.get(source, 0) + 1
+
+        for column in self.with_counts:
+            value = _clean(article.get(column))
+            if value:
+                self.with_counts[column] += 1
+                self.totals[column] += _to_number(value)
+
+        content_hash = _clean(article.get('content_hash'))
+        if content_hash:
+            self.with_hashes += 1
+            self.content_hashes.add(content_hash)
+        similarity_hash = _clean(article.get('similarity_hash'))
+        if similarity_hash:
+            self.similarity_hashes.add(similarity_hash)
+        if _clean(article.get('duplicate_note')):
+            self.marked_similar += 1
+
+    def add_many(self, articles: Iterable[Dict]):
+        """
+        Count several saved articles
+
+        Args:
+            articles (Iterable[Dict]): Article rows keyed by CSV_COLUMNS
+        """
+        for article in articles:
+            self.add(article)
+
+    def add_frame(self, df):
+        """
+        Count a chunk of stored articles with vectorized operations
+
+        Produces the same counts as calling add() for every row, except that
+        pruned crime type and location summaries can differ slightly.
+
+        Args:
+            df (pandas.DataFrame): Articles with some or all of ROLLUP_COLUMNS
+                (empty cells as NaN/None)
+        """
+        import pandas as pd
+
+        def present(column: str):
+            if column not in df.columns:
+                return pd.Series([], dtype=object)
+            values = df[column].dropna()
+            return values[values != '']
+
+        def merge(counts: Dict[str, int], values):
+            for value, count in values.value_counts().items():
+                counts[str(value)] = counts.get(str(value), 0) + int(count)
+
+        self.total += len(df)
+
+        dates = present('date_scraped').astype(str)
+        if len(dates):
+            earliest, latest = dates.min(), dates.max()
+            if self.earliest is None or earliest < self.earliest:
+                self.earliest = earliest
+            if self.latest is None or latest > self.latest:
+                self.latest = latest
+            merge(self.days, dates.str[:10])
+
+        for counter, column in ((self.crime_types, 'what'), (self.locations, 'where')):
+            for value, count in present(column).value_counts().items():
+                counter.add(str(value), int(count))
+
+        if 'article_url' in df.columns:
+            # Map each distinct host once instead of every URL, except on
+            # hosts shared by several sources, where the path decides
+            urls = df['article_url'].fillna('').astype(str)
+            hosts = urls.str.extract(r'^[^:/]+://([^/?#]+)', expand=False).fillna('').str.lower()
+            for host, count in hosts.value_counts().items():
+                if host and len(_domain_sources(_domain(f"http://{host}/"))) > 1:
+                    for url, url_count in urls[hosts == host].value_counts().items():
+                        source = source_for_url(url)
+                        self.sources[source] = self.sources.get(source, 0) + int(url_count)
+                    continue
+                source = source_for_url(f"http://{host}/" if host else None)
+                self.sources[source] = self.sources.get(source, 0) + int(count)
+        else:
+            self.sources['unknown'] = self.sources.get('unknown', 0) + len(df)
+
+        for column in self.with_counts:
+            values = present(column)
+            self.with_counts[column] += len(values)
+            numbers = pd.to_numeric(values, errors='coerce').dropna()
+            self.totals[column] += int(numbers.astype('int64').sum()) if len(numbers) else 0
+
+        content_hashes = present('content_hash')
+        self.with_hashes += len(content_hashes)
+        for value in content_hashes.unique():
+            self.content_hashes.add(value)
+        for value in present('similarity_hash').unique():
+            self.similarity_hashes.add(value)
+        self.marked_similar += len(present('duplicate_note'))
+
+    def record_commit(self, articles: List[Dict], signature_before: Optional[str],
+                      signature_after: Optional[str]) -> bool:
+        """
+        Apply committed writes if the rollup was current before them
+
+        Args:
+            articles (List[Dict]): Articles that were committed
+            signature_before (str): Store signature before the writes
+            signature_after (str): Store signature after the writes
+
+        Returns:
+            bool: True if the rollup was updated, False if it is stale
+        """
+        if signature_before is None or self.signature != signature_before:
+            return False
+
+        self.add_many(articles)
+        self.save(signature_after)
+        return True
+
+    def rebuild(self, store) -> 'StatsRollup':
+        """
+        Recompute the rollup from the raw article store
+
+        Args:
+            store (ArticleStore): Store to read (only ROLLUP_COLUMNS are loaded)
+
+        Returns:
+            StatsRollup: This rollup
+        """
+        self.logger.info("Rebuilding statistics rollup from the article store")
+        signature = store.signature()
+        self.reset()
+        for chunk in store.iter_frames(columns=ROLLUP_COLUMNS, chunksize=STATS_CHUNK_SIZE):
+            self.add_frame(chunk)
+        self.save(signature)
+        return self
+
+    def is_current(self, store) -> bool:
+        """
+        Check whether the rollup describes the store as it is now
+
+        Args:
+            store (ArticleStore): Article store
+
+        Returns:
+            bool: True if the signatures match
+        """
+        signature = store.signature()
+        return signature is not None and signature == self.signature
+
+    def statistics(self) -> Dict:
+        """
+        Get statistics in the format printed by `main.py --mode stats`
+
+        Returns:
+            Dict: Statistics, plus per-source and per-day counts and totals
+        """
+        def ranked(counts: Dict[str, int], limit: Optional[int] = None) -> Dict[str, int]:
+            items = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+            return dict(items[:limit] if limit else items)
+
+        return {
+            'total_articles': self.total,
+            'date_range': {
+                'earliest': self.earliest,
+                'latest': self.latest
+            },
+            'crime_types': ranked(self.crime_types.counts),
+            'locations': ranked(self.locations.counts, 10),
+            'sources': ranked(self.sources),
+            'articles_per_day': dict(sorted(self.days.items())),
+            'articles_with_injuries': self.with_counts['injuries'],
+            'articles_with_fatalities': self.with_counts['fatalities'],
+            'articles_with_arrests': self.with_counts['arrests'],
+            'total_injuries': self.totals['injuries'],
+            'total_fatalities': self.totals['fatalities'],
+            'total_arrests': self.totals['arrests'],
+            'duplicate_stats': {
+                'total_with_hashes': self.with_hashes,
+                'articles_marked_similar': self.marked_similar,
+                'unique_content_hashes': self.content_hashes.count(),
+                'unique_similarity_hashes': self.similarity_hashes.count()
+            }
+        }
+
+_rollup: Optional[StatsRollup] = None
+
+def get_stats_rollup() -> StatsRollup:
+    """
+    Get the statistics rollup shared within the process
+
+    Returns:
+        StatsRollup: Rollup for the configured article store
+    """
+    global _rollup
+    if _rollup is None:
+        _rollup = StatsRollup()
+    return _rollup
+
+def stream_csv_statistics(csv_file_path: str, chunksize: int = STATS_CHUNK_SIZE) -> Dict:
+    """
+    Compute statistics over a CSV file in bounded memory
+
+    The file is read in chunks of `chunksize` rows, loading only
+    ROLLUP_COLUMNS (never full_text). Counts and date ranges are aggregated
+    chunk by chunk, crime types and locations are kept in TopKCounter
+    summaries and hash cardinalities are estimated with HyperLogLog, so
+    memory does not grow with the number of rows (only with the number of
+    days and sources).
+
+    Args:
+        csv_file_path (str): CSV file with CSV_COLUMNS headers
+        chunksize (int): Rows per chunk
+
+    Returns:
+        Dict: Statistics in the format printed by `main.py --mode stats`
+    """
+    import pandas as pd
+
+    rollup = StatsRollup(load=False)
+    for chunk in pd.read_csv(csv_file_path, chunksize=chunksize, dtype=str,
+                             usecols=lambda column: column in ROLLUP_COLUMNS):
+        rollup.add_frame(chunk)
+    return rollup.statistics()
+
+def get_current_statistics(store) -> Dict:
+    """
+    Get statistics for a store from the rollup, rebuilding it if stale
+
+    Args:
+        store (ArticleStore): Configured article store
+
+    Returns:
+        Dict: Statistics in the format printed by `main.py --mode stats`
+    """
+    rollup = get_stats_rollup()
+    if not rollup.is_current(store):
+        rollup.rebuild(store)
+    return rollup.statistics()
+
+def main():
+    """
+    Rebuild the statistics rollup or print it
+    """
+    import argparse
+    from storage import get_article_store
+
+    parser = argparse.ArgumentParser(description='Crime article statistics rollup')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Recompute the rollup from the configured article store')
+
+    args = parser.parse_args()
+    store = get_article_store()
+
+    if args.rebuild:
+        stats = get_stats_rollup().rebuild(store).statistics()
+        print(f"Rebuilt statistics rollup from {stats['total_articles']} articles")
+    else:
+        print(json.dumps(get_current_statistics(store), indent=2))
+
+if __name__ == "__main__":
+    main()
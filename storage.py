@@ -0,0 +1,905 @@
+"""
+Storage backends for scraped crime articles
+Provides the flat CSV file, an indexed SQLite database and date-partitioned
+Parquet files behind one interface
+"""
+
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from csv_writer import CSVBatchWriter
+from config import CSV_FILE_PATH, CSV_COLUMNS, SQLITE_DB_PATH, PARQUET_DIR, STORAGE_BACKEND
+
+# Columns needed by get_statistics (full_text is never read for stats)
+STATS_COLUMNS = [
+    "date_scraped", "what", "where", "injuries", "fatalities", "arrests",
+    "content_hash", "similarity_hash", "duplicate_note"
+]
+
+def dataframe_statistics(df) -> Dict:
+    """
+    Compute article statistics from a DataFrame with STATS_COLUMNS
+
+    Args:
+        df (pandas.DataFrame): Stored articles (empty cells as NaN/None)
+
+    Returns:
+        Dict: Statistics in the format printed by `main.py --mode stats`
+    """
+    return {
+        'total_articles': len(df),
+        'date_range': {
+            'earliest': df['date_scraped'].min(),
+            'latest': df['date_scraped'].max()
+        },
+        'crime_types': df['what'].value_counts().to_dict() if 'what' in df.columns else {},
+        'locations': df['where'].value_counts().head(10).to_dict() if 'where' in df.columns else {},
+        'articles_with_injuries': int(df['injuries'].notna().sum()) if 'injuries' in df.columns else 0,
+        'articles_with_fatalities': int(df['fatalities'].notna().sum()) if 'fatalities' in df.columns else 0,
+        'articles_with_arrests': int(df['arrests'].notna().sum()) if 'arrests' in df.columns else 0,
+        'duplicate_stats': {
+            'total_with_hashes': len(df[df['content_hash'].notna()]) if 'content_hash' in df.columns else 0,
+            'articles_marked_similar': len(df[df['duplicate_note'].notna()]) if 'duplicate_note' in df.columns else 0,
+            'unique_content_hashes': len(df['content_hash'].dropna().unique()) if 'content_hash' in df.columns else 0,
+            'unique_similarity_hashes': len(df['similarity_hash'].dropna().unique()) if 'similarity_hash' in df.columns else 0
+        }
+    }
+
+class ArticleStore:
+    """
+    Interface shared by all article storage backends
+
+    When a statistics rollup is attached (see get_article_store), committed
+    writes are also counted in it.
+    """
+
+    def __init__(self):
+        self.rollup = None
+        self._stats_pending: List[Dict] = []
+        self._stats_signature: Optional[str] = None
+        self._in_batch = False
+        self._batch_participants: List = []
+
+    def signature(self) -> Optional[str]:
+        """
+        Cheaply identify the current contents of the store
+
+        Returns:
+            Optional[str]: Value that changes whenever articles are written,
+                or None if the backend can't provide one
+        """
+        return None
+
+    def _track_saved(self, articles: List[Dict]):
+        """
+        Remember articles for the statistics rollup (call before writing them)
+        """
+        if self.rollup is None:
+            return
+        if not self._stats_pending:
+            self._stats_signature = self.signature()
+        self._stats_pending.extend(articles)
+
+    def _commit_saved(self):
+        """
+        Count remembered articles in the statistics rollup once they are committed
+        """
+        if self.rollup is None or not self._stats_pending:
+            return
+        articles, self._stats_pending = self._stats_pending, []
+        self.rollup.record_commit(articles, self._stats_signature, self.signature())
+
+    def _discard_saved(self):
+        """
+        Forget remembered articles after a rolled back write
+        """
+        self._stats_pending = []
+
+    def enlist(self, participant) -> bool:
+        """
+        Tie a participant's writes to the current batch
+
+        Inside batch(), the participant's begin() is called once, then its
+        commit() after the batch's articles are committed, or its rollback()
+        if they are not, so derived data (e.g. index entries) never outlives
+        unsaved rows. Outside a batch nothing happens.
+
+        Args:
+            participant: Object with begin(), commit() and rollback()
+
+        Returns:
+            bool: True if the participant joined a batch
+        """
+        if not self._in_batch:
+            return False
+        if participant not in self._batch_participants:
+            participant.begin()
+            self._batch_participants.append(participant)
+        return True
+
+    def _end_batch(self, committed: bool):
+        """
+        Commit or roll back the participants enlisted in the batch
+        """
+        participants, self._batch_participants = self._batch_participants, []
+        for participant in participants:
+            if committed:
+                participant.commit()
+            else:
+                participant.rollback()
+
+    def url_exists(self, url: str) -> bool:
+        """
+        Check if an article URL is already stored
+
+        Args:
+            url (str): Article URL
+
+        Returns:
+            bool: True if stored, False otherwise
+        """
+        raise NotImplementedError
+
+    def hash_sets(self) -> tuple:
+        """
+        Get the stored content and similarity hashes for duplicate checks
+
+        Returns:
+            tuple: (content_hashes, similarity_hashes) containers supporting `in`
+        """
+        raise NotImplementedError
+
+    def append_many(self, articles: List[Dict]) -> int:
+        """
+        Append articles to the store
+
+        Args:
+            articles (List[Dict]): Article rows keyed by CSV_COLUMNS
+
+        Returns:
+            int: Number of articles written
+        """
+        raise NotImplementedError
+
+    def append(self, article: Dict) -> bool:
+        """
+        Append a single article to the store
+
+        Args:
+            article (Dict): Article row keyed by CSV_COLUMNS
+
+        Returns:
+            bool: True if successful
+        """
+        return self.append_many([article]) == 1
+
+    @contextmanager
+    def batch(self) -> Iterator['ArticleStore']:
+        """
+        Group writes so they are committed together
+        """
+        yield self
+
+    def get_statistics(self) -> Dict:
+        """
+        Get statistics about the stored articles
+
+        Returns:
+            Dict: Statistics in the format printed by `main.py --mode stats`
+        """
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """
+        Count the stored articles
+
+        Returns:
+            int: Number of stored articles
+        """
+        return sum(len(chunk) for chunk in self.iter_frames(['article_url']))
+
+    def export_csv(self, csv_file_path: str) -> int:
+        """
+        Write all stored articles to a CSV file with CSV_COLUMNS headers
+
+        Args:
+            csv_file_path (str): Output path
+
+        Returns:
+            int: Number of articles exported
+        """
+        return CSVBatchWriter(csv_file_path).rewrite(self.iter_articles())
+
+    def iter_articles(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Iterate over all stored articles in insertion order
+
+        Args:
+            columns (List[str], optional): Columns to read (defaults to CSV_COLUMNS)
+
+        Returns:
+            Iterator[Dict]: Article rows keyed by column name
+        """
+        raise NotImplementedError
+
+    def iter_frames(self, columns: Optional[List[str]] = None, chunksize: int = 1000) -> Iterator:
+        """
+        Iterate over stored articles as DataFrame chunks
+
+        Args:
+            columns (List[str], optional): Columns to read (defaults to CSV_COLUMNS)
+            chunksize (int): Rows per chunk
+
+        Returns:
+            Iterator[pandas.DataFrame]: Chunks with empty cells as None/NaN
+        """
+        import pandas as pd
+
+        frame_columns = [column for column in CSV_COLUMNS if column in columns] if columns else CSV_COLUMNS
+        chunk = []
+        for article in self.iter_articles(columns):
+            chunk.append(article)
+            if len(chunk) >= chunksize:
+                yield pd.DataFrame(chunk, columns=frame_columns)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=frame_columns)
+
+class CSVArticleStore(ArticleStore):
+    """
+    Flat CSV file storage (the original format)
+    """
+
+    def __init__(self, csv_file_path: Optional[str] = None):
+        super().__init__()
+        self.csv_file_path = csv_file_path or CSV_FILE_PATH
+        self.writer = CSVBatchWriter(self.csv_file_path)
+        self._in_batch = False
+        # Rows written during a batch may still be buffered, so their
+        # URLs and hashes are tracked for duplicate checks
+        self._pending_urls: set = set()
+        self._pending_content_hashes: set = set()
+        self._pending_similarity_hashes: set = set()
+        # Hash sets read once per batch and extended with its pending rows
+        self._batch_hashes: Optional[tuple] = None
+
+    def signature(self) -> Optional[str]:
+        size = os.path.getsize(self.csv_file_path) if os.path.exists(self.csv_file_path) else 0
+        return f"csv:{os.path.abspath(self.csv_file_path)}:{size}"
+
+    def url_exists(self, url: str) -> bool:
+        if url in self._pending_urls:
+            return True
+
+        try:
+            if not os.path.exists(self.csv_file_path):
+                return False
+
+            import pandas as pd
+            df = pd.read_csv(self.csv_file_path, usecols=['article_url'])
+            return url in df['article_url'].values
+        except Exception:
+            return False
+
+    def hash_sets(self) -> tuple:
+        if self._batch_hashes is not None:
+            return self._batch_hashes
+
+        from utils import load_existing_hashes
+        content_hashes, similarity_hashes = load_existing_hashes(self.csv_file_path)
+        content_hashes |= self._pending_content_hashes
+        similarity_hashes |= self._pending_similarity_hashes
+        if self._in_batch:
+            self._batch_hashes = (content_hashes, similarity_hashes)
+        return content_hashes, similarity_hashes
+
+    def append_many(self, articles: List[Dict]) -> int:
+        if not articles:
+            return 0
+
+        self._track_saved(articles)
+        self.writer.write_many(articles)
+
+        if self._in_batch:
+            for article in articles:
+                self._pending_urls.add(article.get('article_url'))
+                self._pending_content_hashes.add(article.get('content_hash'))
+                self._pending_similarity_hashes.add(article.get('similarity_hash'))
+                if self._batch_hashes is not None:
+                    self._batch_hashes[0].add(article.get('content_hash'))
+                    self._batch_hashes[1].add(article.get('similarity_hash'))
+        else:
+            self.writer.commit()
+            self._commit_saved()
+        return len(articles)
+
+    @contextmanager
+    def batch(self) -> Iterator['CSVArticleStore']:
+        """
+        Buffer writes made inside the block and commit them at the end
+        """
+        if self._in_batch:
+            yield self
+            return
+
+        self._in_batch = True
+        committed = False
+        try:
+            yield self
+        finally:
+            try:
+                self.writer.commit()
+                committed = True
+                self._commit_saved()
+            finally:
+                self._end_batch(committed)
+                self._in_batch = False
+            self._pending_urls.clear()
+            self._pending_content_hashes.clear()
+            self._pending_similarity_hashes.clear()
+            self._batch_hashes = None
+
+    def get_statistics(self) -> Dict:
+        from stats_rollup import stream_csv_statistics
+
+        # Chunked and column-projected, so memory stays bounded as the file grows
+        return stream_csv_statistics(self.csv_file_path)
+
+    def iter_frames(self, columns: Optional[List[str]] = None, chunksize: int = 1000) -> Iterator:
+        import pandas as pd
+
+        if not os.path.exists(self.csv_file_path):
+            return
+        usecols = (lambda column: column in columns) if columns else None
+        for chunk in pd.read_csv(self.csv_file_path, chunksize=chunksize, dtype=str, usecols=usecols):
+            yield chunk
+
+    def iter_articles(self, columns: Optional[List[str]] = None, chunksize: int = 1000) -> Iterator[Dict]:
+        for chunk in self.iter_frames(columns, chunksize):
+            for article in chunk.to_dict('records'):
+                yield article
+
+    def export_csv(self, csv_file_path: str) -> int:
+        import shutil
+
+        if os.path.abspath(csv_file_path) != os.path.abspath(self.csv_file_path):
+            shutil.copyfile(self.csv_file_path, csv_file_path)
+
+        import pandas as pd
+        return len(pd.read_csv(csv_file_path, usecols=['article_url']))
+
+class _SQLiteHashView:
+    """
+    Indexed membership checks on a hash column, usable in place of a set
+    """
+
+    def __init__(self, conn: sqlite3.Connection, column: str):
+        self.conn = conn
+        self.column = column
+
+    def __contains__(self, value) -> bool:
+        row = self.conn.execute(
+            f"SELECT 1 FROM articles WHERE {self.column} = ? LIMIT 1", (value,)
+        ).fetchone()
+        return row is not None
+
+class SQLiteArticleStore(ArticleStore):
+    """
+    SQLite storage with indexes on the columns used for lookups and stats
+    """
+
+    INDEXED_COLUMNS = ["article_url", "content_hash", "similarity_hash", "date_scraped", "what"]
+
+    def __init__(self, db_path: Optional[str] = None):
+        super().__init__()
+        self.db_path = db_path or SQLITE_DB_PATH
+        self._in_batch = False
+
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """
+        Create the articles table and its indexes if missing
+        """
+        columns = ', '.join(f'"{column}" TEXT' for column in CSV_COLUMNS)
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS articles (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})"
+        )
+        for column in self.INDEXED_COLUMNS:
+            self.conn.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_articles_{column} ON articles ("{column}")'
+            )
+        self.conn.commit()
+
+    @staticmethod
+    def _to_row(article: Dict) -> tuple:
+        """
+        Convert an article dictionary to a row in CSV_COLUMNS order
+
+        Empty values are stored as NULL, matching how pandas reads empty
+        CSV cells.
+        """
+        row = []
+        for column in CSV_COLUMNS:
+            value = article.get(column)
+            if value is None or value == '' or (isinstance(value, float) and value != value):
+                row.append(None)
+            else:
+                row.append(str(value))
+        return tuple(row)
+
+    def signature(self) -> Optional[str]:
+        max_id = self.conn.execute("SELECT MAX(id) FROM articles").fetchone()[0]
+        return f"sqlite:{os.path.abspath(self.db_path)}:{max_id or 0}"
+
+    def url_exists(self, url: str) -> bool:
+        row = self.conn.execute(
+            "SELECT 1 FROM articles WHERE article_url = ? LIMIT 1", (url,)
+        ).fetchone()
+        return row is not None
+
+    def hash_sets(self) -> tuple:
+        return _SQLiteHashView(self.conn, "content_hash"), _SQLiteHashView(self.conn, "similarity_hash")
+
+    def append_many(self, articles: List[Dict]) -> int:
+        if not articles:
+            return 0
+
+        placeholders = ', '.join('?' for _ in CSV_COLUMNS)
+        column_names = ', '.join(f'"{column}"' for column in CSV_COLUMNS)
+        self._track_saved(articles)
+        self.conn.executemany(
+            f"INSERT INTO articles ({column_names}) VALUES ({placeholders})",
+            [self._to_row(article) for article in articles]
+        )
+        if not self._in_batch:
+            self.conn.commit()
+            self._commit_saved()
+        return len(articles)
+
+    @contextmanager
+    def batch(self) -> Iterator['SQLiteArticleStore']:
+        """
+        Commit all writes made inside the block in one transaction
+        """
+        if self._in_batch:
+            yield self
+            return
+
+        self._in_batch = True
+        try:
+            yield self
+            self.conn.commit()
+            self._end_batch(True)
+            self._commit_saved()
+        except Exception:
+            self.conn.rollback()
+            self._discard_saved()
+            self._end_batch(False)
+            raise
+        finally:
+            self._in_batch = False
+
+    def _value_counts(self, column: str, limit: Optional[int] = None) -> Dict[str, int]:
+        query = (
+            f'SELECT "{column}", COUNT(*) AS n FROM articles WHERE "{column}" IS NOT NULL '
+            f'GROUP BY "{column}" ORDER BY n DESC'
+        )
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return {value: count for value, count in self.conn.execute(query)}
+
+    def get_statistics(self) -> Dict:
+        (total, earliest, latest, injuries, fatalities, arrests,
+         with_hashes, marked_similar, unique_content, unique_similarity) = self.conn.execute(
+            "SELECT COUNT(*), MIN(date_scraped), MAX(date_scraped), "
+            "COUNT(injuries), COUNT(fatalities), COUNT(arrests), "
+            "COUNT(content_hash), COUNT(duplicate_note), "
+            "COUNT(DISTINCT content_hash), COUNT(DISTINCT similarity_hash) FROM articles"
+        ).fetchone()
+
+        return {
+            'total_articles': total,
+            'date_range': {
+                'earliest': earliest,
+                'latest': latest
+            },
+            'crime_types': self._value_counts('what'),
+            'locations': self._value_counts('where', limit=10),
+            'articles_with_injuries': injuries,
+            'articles_with_fatalities': fatalities,
+            'articles_with_arrests': arrests,
+            'duplicate_stats': {
+                'total_with_hashes': with_hashes,
+                'articles_marked_similar': marked_similar,
+                'unique_content_hashes': unique_content,
+                'unique_similarity_hashes': unique_similarity
+            }
+        }
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+    def iter_articles(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        columns = [column for column in CSV_COLUMNS if column in columns] if columns else CSV_COLUMNS
+        column_names = ', '.join(f'"{column}"' for column in columns)
+        cursor = self.conn.execute(f"SELECT {column_names} FROM articles ORDER BY id")
+        for row in cursor:
+            yield dict(zip(columns, row))
+
+    def import_csv(self, csv_file_path: str, chunksize: int = 1000) -> int:
+        """
+        Load articles from a CSV file into the database
+
+        Args:
+            csv_file_path (str): CSV file with CSV_COLUMNS headers
+            chunksize (int): Rows inserted per transaction
+
+        Returns:
+            int: Number of articles imported
+        """
+        import pandas as pd
+
+        count = 0
+        for chunk in pd.read_csv(csv_file_path, chunksize=chunksize, dtype=str):
+            with self.batch():
+                count += self.append_many(chunk.to_dict('records'))
+        return count
+
+    def close(self):
+        """
+        Close the database connection
+        """
+        self.conn.close()
+
+class ParquetArticleStore(ArticleStore):
+    """
+    Date-partitioned Parquet storage for analytics
+
+    Articles are written as two hive-partitioned datasets under the root
+    directory, both partitioned by the day of date_scraped:
+
+        metadata/scrape_date=YYYY-MM-DD/part-*.parquet   all columns but full_text
+        full_text/scrape_date=YYYY-MM-DD/part-*.parquet  article_url, content_hash, full_text
+
+    Metadata queries therefore never read article bodies, and date filters
+    skip whole partitions. Each write produces one part file per day in
+    both datasets, sharing the same file name.
+    """
+
+    PARTITION_COLUMN = "scrape_date"
+    METADATA_COLUMNS = [column for column in CSV_COLUMNS if column != "full_text"]
+    FULL_TEXT_COLUMNS = ["article_url", "content_hash", "full_text"]
+
+    def __init__(self, root_dir: Optional[str] = None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("The Parquet storage backend requires pyarrow (pip install pyarrow)")
+
+        super().__init__()
+        self.root_dir = root_dir or PARQUET_DIR
+        self.metadata_dir = os.path.join(self.root_dir, "metadata")
+        self.full_text_dir = os.path.join(self.root_dir, "full_text")
+        self._in_batch = False
+        self._buffer: List[Dict] = []
+        # URL and hash sets, loaded on first use and kept up to date on writes
+        self._urls: Optional[set] = None
+        self._content_hashes: Optional[set] = None
+        self._similarity_hashes: Optional[set] = None
+
+    def _dataset(self, directory: str):
+        """
+        Open a hive-partitioned dataset with a string partition key
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(
+            pa.schema([(self.PARTITION_COLUMN, pa.string())]), flavor="hive"
+        )
+        return ds.dataset(directory, format="parquet", partitioning=partitioning)
+
+    def _partition_filter(self, start_date: Optional[str], end_date: Optional[str]):
+        """
+        Build a partition filter for an inclusive date range (YYYY-MM-DD)
+        """
+        import pyarrow.dataset as ds
+
+        expression = None
+        if start_date:
+            expression = ds.field(self.PARTITION_COLUMN) >= start_date[:10]
+        if end_date:
+            condition = ds.field(self.PARTITION_COLUMN) <= end_date[:10]
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read_metadata(self, columns: Optional[List[str]] = None, start_date: Optional[str] = None,
+                      end_date: Optional[str] = None):
+        """
+        Read metadata columns, pruning partitions outside the date range
+
+        Args:
+            columns (List[str], optional): Columns to read (defaults to all metadata columns)
+            start_date (str, optional): First scrape date to include (YYYY-MM-DD)
+            end_date (str, optional): Last scrape date to include (YYYY-MM-DD)
+
+        Returns:
+            pyarrow.Table: Requested columns
+        """
+        import pyarrow as pa
+
+        columns = columns or self.METADATA_COLUMNS
+        if not os.path.isdir(self.metadata_dir):
+            return pa.table({column: pa.array([], type=pa.string()) for column in columns})
+
+        return self._dataset(self.metadata_dir).to_table(
+            columns=columns, filter=self._partition_filter(start_date, end_date)
+        )
+
+    def read_full_text(self, urls: Optional[List[str]] = None, start_date: Optional[str] = None,
+                       end_date: Optional[str] = None):
+        """
+        Read article bodies, optionally limited to some URLs and a date range
+
+        Args:
+            urls (List[str], optional): Article URLs to read
+            start_date (str, optional): First scrape date to include (YYYY-MM-DD)
+            end_date (str, optional): Last scrape date to include (YYYY-MM-DD)
+
+        Returns:
+            pyarrow.Table: article_url, content_hash and full_text columns
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.full_text_dir):
+            return pa.table({column: pa.array([], type=pa.string()) for column in self.FULL_TEXT_COLUMNS})
+
+        expression = self._partition_filter(start_date, end_date)
+        if urls is not None:
+            condition = ds.field("article_url").isin(list(urls))
+            expression = condition if expression is None else expression & condition
+
+        return self._dataset(self.full_text_dir).to_table(
+            columns=self.FULL_TEXT_COLUMNS, filter=expression
+        )
+
+    def _part_files(self) -> List[str]:
+        """
+        List metadata part files as "<partition>/<file name>", oldest first
+        """
+        if not os.path.isdir(self.metadata_dir):
+            return []
+
+        part_files = []
+        for partition in os.listdir(self.metadata_dir):
+            partition_dir = os.path.join(self.metadata_dir, partition)
+            part_files.extend(
+                f"{partition}/{file_name}" for file_name in os.listdir(partition_dir)
+                if file_name.endswith(".parquet")
+            )
+        return sorted(part_files)
+
+    def signature(self) -> Optional[str]:
+        part_files = self._part_files()
+        newest = max(part_files, key=lambda path: path.split('/')[-1]) if part_files else ''
+        return f"parquet:{os.path.abspath(self.root_dir)}:{len(part_files)}:{newest}"
+
+    def _load_index(self):
+        """
+        Load the URL and hash sets used for duplicate checks
+        """
+        if self._urls is not None:
+            return
+
+        table = self.read_metadata(columns=["article_url", "content_hash", "similarity_hash"])
+        self._urls = set(table.column("article_url").to_pylist())
+        self._content_hashes = set(table.column("content_hash").drop_null().to_pylist())
+        self._similarity_hashes = set(table.column("similarity_hash").drop_null().to_pylist())
+
+    def url_exists(self, url: str) -> bool:
+        self._load_index()
+        return url in self._urls
+
+    def hash_sets(self) -> tuple:
+        self._load_index()
+        return self._content_hashes, self._similarity_hashes
+
+    @staticmethod
+    def _to_value(value) -> Optional[str]:
+        """
+        Convert a cell to a string, storing empty values as null
+        """
+        if value is None or value == '' or (isinstance(value, float) and value != value):
+            return None
+        return str(value)
+
+    def _write_table(self, directory: str, partition: str, file_name: str, columns: List[str],
+                     rows: List[Dict]):
+        """
+        Write one part file, renaming it into place once complete
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        partition_dir = os.path.join(directory, f"{self.PARTITION_COLUMN}={partition}")
+        os.makedirs(partition_dir, exist_ok=True)
+
+        table = pa.table({
+            column: pa.array([self._to_value(row.get(column)) for row in rows], type=pa.string())
+            for column in columns
+        })
+        final_path = os.path.join(partition_dir, file_name)
+        temp_path = os.path.join(partition_dir, f".{file_name}.tmp")
+        pq.write_table(table, temp_path, compression="zstd")
+        os.replace(temp_path, final_path)
+
+    def flush(self):
+        """
+        Write buffered articles as one part file per scrape date
+        """
+        if not self._buffer:
+            return
+
+        partitions: Dict[str, List[Dict]] = {}
+        for article in self._buffer:
+            partition = str(article.get('date_scraped') or '')[:10] or "unknown"
+            partitions.setdefault(partition, []).append(article)
+
+        # Time-ordered names keep iter_articles in insertion order
+        file_name = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+        for partition, rows in sorted(partitions.items()):
+            # Bodies first: a visible metadata file always has its full_text file
+            self._write_table(self.full_text_dir, partition, file_name, self.FULL_TEXT_COLUMNS, rows)
+            self._write_table(self.metadata_dir, partition, file_name, self.METADATA_COLUMNS, rows)
+
+        self._buffer = []
+        self._commit_saved()
+
+    def append_many(self, articles: List[Dict]) -> int:
+        if not articles:
+            return 0
+
+        self._load_index()
+        self._track_saved(articles)
+        for article in articles:
+            self._buffer.append(article)
+            self._urls.add(article.get('article_url'))
+            if self._to_value(article.get('content_hash')):
+                self._content_hashes.add(article.get('content_hash'))
+            if self._to_value(article.get('similarity_hash')):
+                self._similarity_hashes.add(article.get('similarity_hash'))
+
+        if not self._in_batch:
+            self.flush()
+        return len(articles)
+
+    @contextmanager
+    def batch(self) -> Iterator['ParquetArticleStore']:
+        """
+        Buffer writes made inside the block and write them as one part file per day
+        """
+        if self._in_batch:
+            yield self
+            return
+
+        self._in_batch = True
+        committed = False
+        try:
+            yield self
+        finally:
+            try:
+                self.flush()
+                committed = True
+            finally:
+                self._end_batch(committed)
+                self._in_batch = False
+
+    def get_statistics(self) -> Dict:
+        # Column projection: only the columns the statistics need are read
+        df = self.read_metadata(columns=STATS_COLUMNS).to_pandas()
+        return dataframe_statistics(df)
+
+    def iter_articles(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        import pyarrow.parquet as pq
+
+        columns = [column for column in CSV_COLUMNS if column in columns] if columns else CSV_COLUMNS
+        metadata_columns = [column for column in columns if column != "full_text"]
+
+        for part_file in self._part_files():
+            metadata = pq.read_table(
+                os.path.join(self.metadata_dir, part_file), columns=metadata_columns
+            ).to_pylist()
+
+            if "full_text" in columns:
+                full_text = pq.read_table(
+                    os.path.join(self.full_text_dir, part_file), columns=["full_text"]
+                ).column("full_text").to_pylist()
+            else:
+                full_text = [None] * len(metadata)
+
+            for row, text in zip(metadata, full_text):
+                yield {column: text if column == "full_text" else row.get(column)
+                       for column in columns}
+
+_stores: Dict[tuple, ArticleStore] = {}
+
+def get_article_store(backend: Optional[str] = None, path: Optional[str] = None) -> ArticleStore:
+    """
+    Get the article store for a backend, shared within the process
+
+    The configured store (no backend or path given) keeps the statistics
+    rollup up to date.
+
+    Args:
+        backend (str, optional): "csv", "sqlite" or "parquet" (defaults to STORAGE_BACKEND)
+        path (str, optional): File or directory path (defaults to the configured path)
+
+    Returns:
+        ArticleStore: Storage backend instance
+    """
+    backend = backend or STORAGE_BACKEND
+    key = (backend, path)
+
+    if key not in _stores:
+        if backend == "csv":
+            _stores[key] = CSVArticleStore(path)
+        elif backend == "sqlite":
+            _stores[key] = SQLiteArticleStore(path)
+        elif backend == "parquet":
+            _stores[key] = ParquetArticleStore(path)
+        else:
+            raise ValueError(f"Unknown storage backend: {backend}")
+
+        if path is None and backend == STORAGE_BACKEND:
+            from stats_rollup import get_stats_rollup
+            _stores[key].rollup = get_stats_rollup()
+
+    return _stores[key]
+
+def main():
+    """
+    Import the CSV file into SQLite, or export the configured store to CSV or Parquet
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Crime article storage')
+    parser.add_argument('--import-csv', type=str, metavar='CSV',
+                        help='Import a CSV file into the SQLite database')
+    parser.add_argument('--export-csv', type=str, metavar='CSV',
+                        help='Export the configured store to a CSV file')
+    parser.add_argument('--export-parquet', type=str, metavar='DIR', nargs='?', const=PARQUET_DIR,
+                        help='Export the configured store to date-partitioned Parquet files')
+    parser.add_argument('--backend', choices=['csv', 'sqlite', 'parquet'], help='Storage backend to use')
+
+    args = parser.parse_args()
+
+    if args.import_csv:
+        count = SQLiteArticleStore().import_csv(args.import_csv)
+        print(f"Imported {count} articles into {SQLITE_DB_PATH}")
+    elif args.export_csv:
+        count = get_article_store(args.backend).export_csv(args.export_csv)
+        print(f"Exported {count} articles to {args.export_csv}")
+    elif args.export_parquet:
+        target = ParquetArticleStore(args.export_parquet)
+        count = 0
+        chunk = []
+        for article in get_article_store(args.backend).iter_articles():
+            chunk.append(article)
+            if len(chunk) >= 1000:
+                count += target.append_many(chunk)
+                chunk = []
+        count += target.append_many(chunk)
+        print(f"Exported {count} articles to {args.export_parquet}")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
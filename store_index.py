@@ -0,0 +1,260 @@
+"""
+Base of the SQLite indexes derived from the article store
+Connection setup, batch participation, backfill from the store and the
+command line shared by the near-duplicate and story clustering indexes
+"""
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from utils import setup_logging
+
+class StoreDerivedIndex:
+    """
+    SQLite index with one row per indexed article of the article store
+
+    The index file is not committed, so it can be missing or behind the
+    store (a fresh checkout, or an index cleared after a settings change);
+    backfill() then indexes the stored articles it lacks. During a store
+    batch the index takes part through ArticleStore.enlist(), so entries
+    are only kept for articles whose batch was saved.
+
+    Subclasses create their tables in _create_schema(), index one stored
+    row in _index_article() and set the class attributes below.
+    """
+
+    # Table with one row per indexed article
+    TABLE = ''
+    # Tables emptied by clear()
+    TABLES: List[str] = []
+    # Store columns read when indexing stored articles
+    STORE_COLUMNS: List[str] = []
+    # Name used in log messages and on the command line
+    NAME = ''
+
+    def __init__(self, index_path: str):
+        self.logger = setup_logging()
+        self.index_path = index_path
+
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(self.index_path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._create_schema()
+
+    def _create_schema(self):
+        """
+        Create the index tables if they don't exist
+        """
+        raise NotImplementedError
+
+    def _index_article(self, article: Dict):
+        """
+        Index one stored article row, skipping it if it can't be indexed
+
+        Args:
+            article (Dict): Row with STORE_COLUMNS
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def _savepoint(self, name: str) -> Iterator[None]:
+        """
+        Run the statements of the block as one unit
+
+        A savepoint commits on release, unless a batch transaction is open,
+        in which case its statements wait for the batch.
+
+        Args:
+            name (str): Savepoint name
+        """
+        self.conn.execute(f"SAVEPOINT {name}")
+        try:
+            yield
+        except Exception:
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.conn.execute(f"RELEASE {name}")
+            raise
+        self.conn.execute(f"RELEASE {name}")
+
+    def indexed_count(self) -> int:
+        """
+        Count the indexed articles
+
+        Returns:
+            int: Rows in TABLE
+        """
+        return self.conn.execute(f"SELECT COUNT(*) FROM {self.TABLE}").fetchone()[0]
+
+    def clear(self):
+        """
+        Remove all indexed articles
+        """
+        for table in self.TABLES:
+            self.conn.execute(f"DELETE FROM {table}")
+        self.conn.execute("DELETE FROM meta WHERE key = 'unindexable_rows'")
+
+    def _index_store(self, store) -> int:
+        """
+        Index every article of a store that is missing, in insertion order
+
+        Stored rows that can't be indexed (no text, no or a shared content
+        hash) are counted in the 'unindexable_rows' meta entry, so backfill()
+        doesn't rescan the store for them.
+
+        Args:
+            store (ArticleStore): Store to read
+
+        Returns:
+            int: Number of articles indexed
+        """
+        before = self.indexed_count()
+        for article in store.iter_articles(columns=self.STORE_COLUMNS):
+            self._index_article(article)
+        indexed = self.indexed_count()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('unindexable_rows', ?)",
+            (str(max(0, store.count() - indexed)),)
+        )
+        return indexed - before
+
+    def rebuild(self, store) -> int:
+        """
+        Re-index all articles of an article store in insertion order
+
+        Args:
+            store (ArticleStore): Store to read
+
+        Returns:
+            int: Number of articles indexed
+        """
+        self.clear()
+        return self._index_store(store)
+
+    def backfill(self, store) -> int:
+        """
+        Index stored articles that are missing from the index
+
+        The store is only scanned when it holds more articles than the index
+        accounts for. Missing articles are added in insertion order.
+
+        Args:
+            store (ArticleStore): Store to read
+
+        Returns:
+            int: Number of articles indexed
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'unindexable_rows'").fetchone()
+        if store.count() - self.indexed_count() <= (int(row[0]) if row else 0):
+            return 0
+
+        count = self._index_store(store)
+        if count:
+            self.logger.info(f"Backfilled the {self.NAME} with {count} stored articles")
+        return count
+
+    def begin(self):
+        """
+        Open a transaction that holds the following adds until commit()
+
+        Called by ArticleStore.enlist() when a store batch starts.
+        """
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+
+    def commit(self):
+        """
+        Keep the adds made since begin(), once the store batch was saved
+        """
+        if self.conn.in_transaction:
+            self.conn.execute("COMMIT")
+
+    def rollback(self):
+        """
+        Drop the adds made since begin(), when the store batch failed
+        """
+        if self.conn.in_transaction:
+            self.conn.execute("ROLLBACK")
+
+    def close(self):
+        """
+        Close the underlying database connection
+        """
+        self.conn.close()
+
+    @classmethod
+    def shared(cls, backfill: bool = True) -> 'StoreDerivedIndex':
+        """
+        Get the index shared within the process
+
+        Args:
+            backfill (bool): On first use, index articles of the configured
+                store that are missing from the index
+
+        Returns:
+            StoreDerivedIndex: Index at the configured path
+        """
+        index = _shared_indexes.get(cls)
+        if index is None:
+            index = _shared_indexes[cls] = cls()
+            if backfill:
+                from storage import get_article_store
+                try:
+                    index.backfill(get_article_store())
+                except Exception as e:
+                    index.logger.warning(f"Could not backfill the {cls.NAME}: {str(e)}")
+        return index
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """
+        Add index-specific options to the command line
+
+        Args:
+            parser (argparse.ArgumentParser): Parser of main()
+        """
+
+    def run_arguments(self, args):
+        """
+        Act on the index-specific options after a rebuild
+
+        Args:
+            args (argparse.Namespace): Parsed command line
+        """
+
+    @classmethod
+    def main(cls):
+        """
+        Rebuild the index from the configured article store or print its statistics
+        """
+        import argparse
+        from storage import get_article_store
+
+        parser = argparse.ArgumentParser(description=f"{cls.NAME[0].upper()}{cls.NAME[1:]}")
+        parser.add_argument('--rebuild', action='store_true',
+                            help=f'Rebuild the {cls.NAME} from all articles of the configured store')
+        cls.add_arguments(parser)
+
+        args = parser.parse_args()
+        index = cls.shared(backfill=not args.rebuild)
+
+        if args.rebuild:
+            count = index.rebuild(get_article_store())
+            print(f"Indexed {count} articles")
+        index.run_arguments(args)
+
+        for key, value in index.summary().items():
+            print(f"{key}: {value}")
+
+    def summary(self) -> Dict:
+        """
+        Get index statistics
+
+        Returns:
+            Dict: Statistics printed by main()
+        """
+        raise NotImplementedError
+
+_shared_indexes: Dict[type, StoreDerivedIndex] = {}
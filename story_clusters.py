@@ -0,0 +1,371 @@
+"""
+Cross-source story clustering for the Crime Data Scraper
+Groups articles that cover the same real-world incident into events, using
+content similarity, shared who/where entities and a publication time window
+"""
+
+import json
+import re
+from datetime import datetime, date
+from typing import Dict, List, Optional
+from store_index import StoreDerivedIndex
+from config import (
+    NEAR_DUP_THRESHOLD, STORY_CLUSTER_INDEX_PATH, STORY_CLUSTER_WINDOW_DAYS, STORY_CLUSTER_THRESHOLD,
+    STORY_CLUSTER_MIN_SHARED_ENTITIES, STORY_CLUSTER_MAX_CANDIDATES,
+    STORY_CLUSTER_CONTENT_WEIGHT
+)
+
+# Trailing possessives and punctuation stripped from entity names
+_ENTITY_CLEANUP = re.compile(r"(['’]s)?[\s.,;:'’\"“”]*$")
+
+def normalize_entities(*values: Optional[str]) -> List[str]:
+    """
+    Split and normalize '; '-separated entity columns
+
+    Args:
+        *values (str): Column values such as `who` and `where`
+
+    Returns:
+        List[str]: Sorted distinct lowercased entity names
+    """
+    entities = set()
+    for value in values:
+        if not isinstance(value, str):
+            continue
+        for entity in value.split(';'):
+            entity = _ENTITY_CLEANUP.sub('', entity.strip().lower()).strip()
+            if len(entity) > 2:
+                entities.add(entity)
+    return sorted(entities)
+
+def _parse_day(value: Optional[str]) -> Optional[int]:
+    """
+    Parse a date string into a day number (proleptic Gregorian ordinal)
+    """
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").toordinal()
+    except ValueError:
+        pass
+    try:
+        from dateutil import parser as date_parser
+        return date_parser.parse(value, default=datetime(2000, 1, 1)).toordinal()
+    except (ValueError, OverflowError):
+        return None
+
+def event_day(article: Dict) -> int:
+    """
+    Get the day an article's incident is placed on for clustering
+
+    The extracted publication date is used when it is plausible (not after
+    the scrape and at most STORY_CLUSTER_WINDOW_DAYS before it), otherwise
+    the scrape date.
+
+    Args:
+        article (Dict): Article row keyed by CSV_COLUMNS
+
+    Returns:
+        int: Day number
+    """
+    scraped = _parse_day(article.get('date_scraped')) or date.today().toordinal()
+    published = _parse_day(article.get('publication_date'))
+    if published is not None and scraped - STORY_CLUSTER_WINDOW_DAYS <= published <= scraped:
+        return published
+    return scraped
+
+class StoryClusterIndex(StoreDerivedIndex):
+    """
+    Incremental index that assigns each article a stable event_id
+
+    A new article is only compared with candidates found through the
+    inverted entity index within +/- STORY_CLUSTER_WINDOW_DAYS, plus articles
+    in its near-duplicate group. Near-duplicates (by MinHash similarity) join
+    the same event; other candidates must share entities and are scored by
+    a weighted mix of content similarity and entity overlap. The best event scoring
+    at least STORY_CLUSTER_THRESHOLD is joined, otherwise a new event is
+    started. An event's id is derived from its first article and never
+    changes, so a rebuild, which adds the stored articles in insertion
+    order, reproduces the same event ids.
+    """
+
+    TABLE = 'articles'
+    TABLES = ['postings', 'articles', 'events']
+    STORE_COLUMNS = ['date_scraped', 'article_url', 'headline', 'publication_date', 'who', 'where',
+                     'full_text', 'content_hash', 'similarity_hash']
+    NAME = 'story cluster index'
+
+    def __init__(self, index_path: Optional[str] = None):
+        self._hasher = None
+        super().__init__(index_path or STORY_CLUSTER_INDEX_PATH)
+
+    def _create_schema(self):
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "doc_id TEXT PRIMARY KEY, article_url TEXT, event_id TEXT NOT NULL, "
+            "group_id TEXT, day INTEGER NOT NULL, signature BLOB, entities TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings (entity TEXT NOT NULL, day INTEGER NOT NULL, doc_id TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "event_id TEXT PRIMARY KEY, first_day INTEGER NOT NULL, last_day INTEGER NOT NULL, size INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_postings_entity_day ON postings (entity, day)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_group ON articles (group_id)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_url ON articles (article_url)")
+
+    @property
+    def hasher(self):
+        """Get the MinHash hasher (created on first use)"""
+        if self._hasher is None:
+            from near_duplicates import MinHasher
+            self._hasher = MinHasher()
+        return self._hasher
+
+    def _candidates(self, entities: List[str], day: int, group_id: Optional[str]) -> Dict[str, tuple]:
+        """
+        Collect candidate articles sharing entities in the time window or the near-duplicate group
+
+        Returns:
+            Dict[str, tuple]: doc_id -> (event_id, signature, entities JSON, shared entity count)
+        """
+        shared: Dict[str, int] = {}
+        if entities:
+            placeholders = ', '.join('?' for _ in entities)
+            rows = self.conn.execute(
+                f"SELECT doc_id, COUNT(*) AS shared FROM postings WHERE entity IN ({placeholders}) "
+                "AND day BETWEEN ? AND ? GROUP BY doc_id ORDER BY shared DESC LIMIT ?",
+                [*entities, day - STORY_CLUSTER_WINDOW_DAYS, day + STORY_CLUSTER_WINDOW_DAYS,
+                 STORY_CLUSTER_MAX_CANDIDATES]
+            ).fetchall()
+            shared = {doc_id: count for doc_id, count in rows}
+
+        doc_ids = set(shared)
+        if group_id:
+            doc_ids.update(row[0] for row in self.conn.execute(
+                "SELECT doc_id FROM articles WHERE group_id = ? LIMIT ?",
+                (group_id, STORY_CLUSTER_MAX_CANDIDATES)
+            ))
+
+        candidates = {}
+        doc_list = list(doc_ids)
+        for start in range(0, len(doc_list), 500):
+            batch = doc_list[start:start + 500]
+            placeholders = ', '.join('?' for _ in batch)
+            for doc_id, event_id, signature, entity_json in self.conn.execute(
+                f"SELECT doc_id, event_id, signature, entities FROM articles WHERE doc_id IN ({placeholders})",
+                batch
+            ):
+                candidates[doc_id] = (event_id, signature, entity_json, shared.get(doc_id, 0))
+        return candidates
+
+    def _entity_weights(self, entities: List[str], day: int) -> Dict[str, float]:
+        """
+        Weight entities by how rare they are in the time window
+
+        Entities mentioned by many articles around the same day (countries,
+        page boilerplate) say little about which incident is covered.
+
+        Returns:
+            Dict[str, float]: Entity -> 1 / (1 + articles in the window mentioning it)
+        """
+        weights = {entity: 1.0 for entity in entities}
+        for start in range(0, len(entities), 500):
+            batch = entities[start:start + 500]
+            placeholders = ', '.join('?' for _ in batch)
+            for entity, count in self.conn.execute(
+                f"SELECT entity, COUNT(*) FROM postings WHERE entity IN ({placeholders}) "
+                "AND day BETWEEN ? AND ? GROUP BY entity",
+                [*batch, day - STORY_CLUSTER_WINDOW_DAYS, day + STORY_CLUSTER_WINDOW_DAYS]
+            ):
+                weights[entity] = 1.0 / (1 + count)
+        return weights
+
+    def _score(self, signature, entities: List[str], weights: Dict[str, float], candidate: tuple) -> float:
+        """
+        Score how likely a candidate covers the same incident
+
+        Entity similarity is the geometric mean of the rarity-weighted share
+        of the new article's entities found in the candidate and of the
+        candidate's entities found in the new article.
+        """
+        import numpy as np
+
+        _, candidate_signature, entity_json, shared_count = candidate
+
+        content = 0.0
+        if signature is not None and candidate_signature is not None:
+            content = float(np.mean(np.frombuffer(candidate_signature, dtype=np.uint32) == signature))
+
+        # Near-duplicates cover the same incident whatever their entities
+        if content >= NEAR_DUP_THRESHOLD:
+            return 1.0
+        if shared_count < STORY_CLUSTER_MIN_SHARED_ENTITIES:
+            return 0.0
+
+        candidate_entities = json.loads(entity_json)
+        shared_mass = sum(weights[entity] for entity in set(candidate_entities).intersection(entities))
+        own_share = shared_mass / max(sum(weights[entity] for entity in entities), 1e-9)
+        candidate_share = shared_mass / max(sum(weights[entity] for entity in candidate_entities), 1e-9)
+        overlap = (own_share * candidate_share) ** 0.5
+
+        return STORY_CLUSTER_CONTENT_WEIGHT * content + (1 - STORY_CLUSTER_CONTENT_WEIGHT) * overlap
+
+    def event_id_for(self, article_url: str) -> Optional[str]:
+        """
+        Look up the event an article was assigned to
+
+        Args:
+            article_url (str): Article URL
+
+        Returns:
+            Optional[str]: event_id, or None if the article isn't indexed
+        """
+        row = self.conn.execute(
+            "SELECT event_id FROM articles WHERE article_url = ? LIMIT 1", (article_url,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def add(self, article: Dict, signature=None) -> Optional[str]:
+        """
+        Assign an article to an event and index it
+
+        Args:
+            article (Dict): Saved article row (content_hash identifies it)
+            signature (numpy.ndarray, optional): MinHash signature, computed
+                from headline and full_text if not given
+
+        Returns:
+            Optional[str]: event_id, or None if the article has no content hash
+        """
+        doc_id = article.get('content_hash')
+        if not isinstance(doc_id, str) or not doc_id:
+            return None
+
+        existing = self.conn.execute(
+            "SELECT event_id FROM articles WHERE doc_id = ?", (doc_id,)
+        ).fetchone()
+        if existing:
+            return existing[0]
+
+        if signature is None:
+            from near_duplicates import shingles
+            title, content = article.get('headline'), article.get('full_text')
+            if isinstance(title, str) and isinstance(content, str):
+                signature = self.hasher.signature(shingles(f"{title} {content}"))
+
+        entities = normalize_entities(article.get('who'), article.get('where'))
+        day = event_day(article)
+        group_id = article.get('similarity_hash') if isinstance(article.get('similarity_hash'), str) else None
+
+        candidates = list(self._candidates(entities, day, group_id).values())
+        all_entities = set(entities)
+        for candidate in candidates:
+            all_entities.update(json.loads(candidate[2]))
+        weights = self._entity_weights(sorted(all_entities), day)
+
+        best_event, best_score = None, 0.0
+        for candidate in candidates:
+            score = self._score(signature, entities, weights, candidate)
+            if score > best_score:
+                best_event, best_score = candidate[0], score
+
+        if best_score < STORY_CLUSTER_THRESHOLD:
+            best_event = f"evt_{doc_id[:16]}"
+
+        with self._savepoint('add_article'):
+            self.conn.execute(
+                "INSERT INTO articles (doc_id, article_url, event_id, group_id, day, signature, entities) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, article.get('article_url'), best_event, group_id, day,
+                 signature.tobytes() if signature is not None else None, json.dumps(entities))
+            )
+            self.conn.executemany(
+                "INSERT INTO postings (entity, day, doc_id) VALUES (?, ?, ?)",
+                [(entity, day, doc_id) for entity in entities]
+            )
+            self.conn.execute(
+                "INSERT INTO events (event_id, first_day, last_day, size) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(event_id) DO UPDATE SET size = size + 1, "
+                "first_day = MIN(first_day, excluded.first_day), last_day = MAX(last_day, excluded.last_day)",
+                (best_event, day, day)
+            )
+
+        return best_event
+
+    def summary(self) -> Dict:
+        """
+        Get event statistics
+
+        Returns:
+            Dict: Number of events, articles in multi-source events and largest event size
+        """
+        events, clustered, largest = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(CASE WHEN size > 1 THEN size ELSE 0 END), 0), "
+            "COALESCE(MAX(size), 0) FROM events"
+        ).fetchone()
+        return {
+            'events': events,
+            'articles_in_shared_events': clustered,
+            'largest_event_size': largest
+        }
+
+    def _index_article(self, article: Dict):
+        """
+        Cluster a stored article row (rows without a content hash are skipped)
+        """
+        self.add(article)
+
+    def export_csv(self, csv_file_path: str) -> int:
+        """
+        Write the article_url -> event_id mapping to a CSV file
+
+        Args:
+            csv_file_path (str): Output path
+
+        Returns:
+            int: Number of rows written
+        """
+        from csv_writer import CSVBatchWriter
+
+        rows = (
+            {'article_url': url, 'event_id': event_id}
+            for url, event_id in self.conn.execute(
+                "SELECT article_url, event_id FROM articles ORDER BY rowid"
+            )
+        )
+        return CSVBatchWriter(csv_file_path, columns=['article_url', 'event_id']).rewrite(rows)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        """
+        Add the --export option
+        """
+        parser.add_argument('--export', type=str, metavar='CSV',
+                            help='Write article_url,event_id rows to a CSV file')
+
+    def run_arguments(self, args):
+        """
+        Export event ids if --export was given
+        """
+        if args.export:
+            count = self.export_csv(args.export)
+            print(f"Exported {count} event ids to {args.export}")
+
+def get_story_cluster_index(backfill: bool = True) -> StoryClusterIndex:
+    """
+    Get the story clustering index shared within the process
+
+    Args:
+        backfill (bool): On first use, cluster articles of the configured
+            store that are missing from the index
+
+    Returns:
+        StoryClusterIndex: Index at STORY_CLUSTER_INDEX_PATH
+    """
+    return StoryClusterIndex.shared(backfill)
+
+if __name__ == "__main__":
+    StoryClusterIndex.main()
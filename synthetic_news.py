@@ -0,0 +1,346 @@
+"""
+Synthetic news content for offline benchmarks and load tests
+Generates crime articles and hub/article pages that match the CSS selectors
+of the configured news sources, so the scraper can run without the network
+"""
+
+import html
+import random
+import re
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+_FIRST_NAMES = [
+    "James", "Maria", "Ahmed", "Chen", "Olga", "Samuel", "Priya", "Lucas",
+    "Fatima", "Daniel", "Aisha", "Marco", "Elena", "Kwame", "Sofia", "Hiroshi"
+]
+_LAST_NAMES = [
+    "Walker", "Hernandez", "Rahman", "Wei", "Petrova", "Okafor", "Sharma",
+    "Silva", "Haddad", "Brennan", "Mensah", "Rossi", "Novak", "Tanaka"
+]
+_PLACES = [
+    "Dhaka", "Chicago", "Manchester", "Melbourne", "Toronto", "Lagos",
+    "Mumbai", "Madrid", "Naples", "Nairobi", "Houston", "Glasgow", "Auckland"
+]
+_STREETS = ["Main Street", "Harbour Road", "Station Avenue", "Market Square", "Park Lane", "Riverside Drive"]
+_WEAPONS = ["a knife", "a handgun", "a metal bar", "a shotgun"]
+_MOTIVES = ["over a debt", "during a dispute", "for money", "after an argument"]
+
+# (crime, headline templates, opening sentence templates)
+_CRIMES = [
+    ("robbery", [
+        "Armed robbery at {street} shop in {place}",
+        "{place} police hunt suspects after {street} robbery",
+    ], "Two men robbed a shop on {street} in {place} on {day}, threatening staff with {weapon}."),
+    ("murder", [
+        "Man charged with murder after {place} stabbing",
+        "{place} murder: {victim} found dead near {street}",
+    ], "{victim}, 34, was found dead near {street} in {place} on {day}, and police have opened a murder inquiry."),
+    ("assault", [
+        "{suspect} arrested over assault in {place}",
+        "Assault outside {place} bar leaves one injured",
+    ], "{suspect} was arrested after an assault outside a bar on {street} in {place} on {day}."),
+    ("burglary", [
+        "Burglary spree hits homes in {place}",
+        "{place} police arrest two over {street} burglary",
+    ], "Police in {place} arrested two suspects over a series of burglary cases around {street} on {day}."),
+    ("fraud", [
+        "{suspect} charged in {place} fraud scheme",
+        "Investment fraud cost {place} residents millions",
+    ], "{suspect} was charged on {day} with running a fraud scheme that targeted pensioners in {place}."),
+    ("shooting", [
+        "Shooting on {street} in {place} leaves two wounded",
+        "{place} shooting: police appeal for witnesses",
+    ], "Two people were injured in a shooting on {street} in {place} on {day}, police said."),
+    ("kidnapping", [
+        "Kidnapping suspect detained in {place}",
+        "{victim} rescued after kidnapping in {place}",
+    ], "{victim} was rescued by police in {place} on {day}, two days after a kidnapping on {street}."),
+    ("drug trafficking", [
+        "Police seize cocaine in {place} drug raid",
+        "{suspect} jailed for drug trafficking in {place}",
+    ], "Police seized cocaine worth $2.4 million in a raid on a warehouse near {street} in {place} on {day}."),
+]
+
+_FOLLOW_UP = [
+    "Officers said {suspect} was taken into custody and is due in court next week.",
+    "{victim} was taken to hospital with serious injuries.",
+    "A spokesperson for {place} police said the attack happened {motive}.",
+    "Witnesses described hearing shouting shortly before the incident.",
+    "Police have appealed for anyone with dashcam footage from {street} to come forward.",
+    "The suspect was charged and remanded in custody.",
+    "Detectives believe the suspects knew each other.",
+    "One person was killed and three others were injured, officials said.",
+    "Neighbours said the area had seen a rise in crime over the past year.",
+    "The investigation is ongoing and further arrests are expected.",
+    "Losses were estimated at $45,000, according to the police report.",
+    "The court heard that {suspect} had previous convictions.",
+]
+
+# Headlines of links that should not pass the crime keyword filter
+_NOISE_HEADLINES = [
+    "Weekend weather: sunny spells expected",
+    "City council approves new cycle lanes",
+    "Local orchestra announces summer season",
+    "Five recipes for a quick weeknight dinner",
+    "Transport strike talks to resume on Monday",
+    "Museum reopens after two-year renovation",
+    "Markets close higher as tech stocks rally",
+    "School holidays: what to do with the kids",
+]
+
+def _slugify(text: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+def source_slug(name: str) -> str:
+    """
+    Get the directory and URL path name of a source
+
+    Args:
+        name (str): Source name, e.g. "AP News Crime"
+
+    Returns:
+        str: Lowercase name with characters other than ASCII letters and
+            digits replaced by '_', so it is the same in a URL and on disk
+    """
+    return ''.join(c if c.isascii() and c.isalnum() else '_' for c in name.lower())
+
+def simulated_sources(sources: List[Dict], base_url: str) -> List[Dict]:
+    """
+    Point source configurations at the local news simulator
+
+    Each source's hub is served under /<source_slug> on the simulator, with
+    the path of its real hub URL (see news_simulator.py).
+
+    Args:
+        sources (List[Dict]): Source configurations
+        base_url (str): Simulator URL, e.g. http://127.0.0.1:8765
+
+    Returns:
+        List[Dict]: Copies of the configurations with the simulator URL
+    """
+    from urllib.parse import urlparse
+
+    return [
+        dict(source, url=f"{base_url.rstrip('/')}/{source_slug(source['name'])}{urlparse(source['url']).path or '/'}")
+        for source in sources
+    ]
+
+def generate_articles(count: int, seed: int = 0, near_duplicate_rate: float = 0.1,
+                      sources: Optional[List[Dict]] = None) -> List[Dict]:
+    """
+    Generate a deterministic corpus of synthetic crime articles
+
+    A share of the articles are rewrites of an earlier article from another
+    source (the same incident with some sentences changed), so duplicate
+    detection and story clustering have something to find.
+
+    Args:
+        count (int): Number of articles
+        seed (int): Random seed
+        near_duplicate_rate (float): Share of articles that rewrite an earlier one
+        sources (List[Dict], optional): Source configurations to attribute
+            articles to (defaults to NEWS_WEBSITES)
+
+    Returns:
+        List[Dict]: Articles with headline, content, url, source, slug,
+            published date, the 'who'/'where' entities used and the index
+            of the rewritten article ('duplicate_of', None for originals)
+    """
+    if sources is None:
+        from config import NEWS_WEBSITES
+        sources = NEWS_WEBSITES
+
+    rng = random.Random(seed)
+    start_day = date(2025, 1, 1)
+    articles: List[Dict] = []
+
+    for index in range(count):
+        source = sources[index % len(sources)]
+
+        if articles and rng.random() < near_duplicate_rate:
+            duplicate_of = rng.randrange(len(articles))
+            original = articles[duplicate_of]
+            sentences = original['content'].split('. ')
+            # Swap one sentence and reword the headline, keeping the facts
+            position = rng.randrange(1, len(sentences)) if len(sentences) > 1 else 0
+            sentences[position] = rng.choice(_FOLLOW_UP).format(**original['facts']).rstrip('.')
+            headline = f"{original['headline']} - update"
+            content = '. '.join(sentences)
+            facts = original['facts']
+            published = original['published']
+        else:
+            duplicate_of = None
+            crime, headlines, opening = rng.choice(_CRIMES)
+            published = start_day + timedelta(days=rng.randrange(365))
+            facts = {
+                'crime': crime,
+                'place': rng.choice(_PLACES),
+                'street': rng.choice(_STREETS),
+                'weapon': rng.choice(_WEAPONS),
+                'motive': rng.choice(_MOTIVES),
+                'victim': f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                'suspect': f"{rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+                'day': published.strftime('%B %d, %Y').replace(' 0', ' '),
+            }
+            headline = rng.choice(headlines).format(**facts)
+            follow_ups = rng.sample(_FOLLOW_UP, rng.randint(4, 8))
+            content = ' '.join([opening.format(**facts)] + [line.format(**facts) for line in follow_ups])
+
+        slug = f"{_slugify(headline)[:60]}-{index}"
+        articles.append({
+            'headline': headline,
+            'content': content,
+            'url': f"{source['url'].rstrip('/')}/{slug}",
+            'source': source['name'],
+            'slug': slug,
+            'published': published,
+            'facts': facts,
+            'who': f"{facts['victim']}; {facts['suspect']}",
+            'where': facts['place'],
+            'duplicate_of': duplicate_of,
+        })
+    return articles
+
+def _parse_compound(compound: str) -> Tuple[str, List[str], Optional[str], List[Tuple[str, str, str]]]:
+    """
+    Parse one compound selector like div.story-body or a[href*='/news/']
+
+    Returns:
+        tuple: (tag, classes, id, [(attribute, operator, value)])
+    """
+    match = re.match(r'^([a-zA-Z][a-zA-Z0-9]*)?', compound)
+    tag = match.group(1) or 'div'
+    rest = compound[match.end():]
+    classes = re.findall(r'\.([\w-]+)', re.sub(r'\[[^\]]*\]', '', rest))
+    element_id = next(iter(re.findall(r'#([\w-]+)', rest)), None)
+    attributes = [
+        (name, operator or '=', value)
+        for name, operator, value in re.findall(r"\[([\w-]+)(?:([*^$~|]?=)['\"]?([^'\"\]]*)['\"]?)?\]", rest)
+    ]
+    return tag, classes, element_id, attributes
+
+def _open_tag(compound: str, href_slug: Optional[str] = None, path_prefix: str = '') -> Tuple[str, str]:
+    """
+    Build the opening and closing tag matching a compound selector
+
+    Args:
+        compound (str): Compound selector
+        href_slug (str, optional): Slug for an href attribute, combined with
+            the selector's substring requirement
+        path_prefix (str): Path prepended to the href
+
+    Returns:
+        tuple: (opening tag, closing tag)
+    """
+    tag, classes, element_id, attributes = _parse_compound(compound)
+    parts = [tag]
+    if classes:
+        parts.append(f'class="{" ".join(classes)}"')
+    if element_id:
+        parts.append(f'id="{element_id}"')
+
+    has_href = False
+    for name, operator, value in attributes:
+        if name == 'href':
+            has_href = True
+            slug = href_slug or ''
+            if operator == '$=':
+                value = f"{path_prefix}/{slug}{value}"
+            elif operator in ('*=', '^='):
+                value = f"{path_prefix}{value.rstrip('/')}/{slug}" if slug else value
+        parts.append(f'{name}="{html.escape(value, quote=True)}"')
+    if href_slug is not None and not has_href:
+        parts.append(f'href="{path_prefix}/{href_slug}"')
+
+    return f"<{' '.join(parts)}>", f"</{tag}>"
+
+def _wrap(selector: str, inner: str, href_slug: Optional[str] = None, path_prefix: str = '') -> str:
+    """
+    Wrap content in elements matching a descendant selector (e.g. "h3 a[href*='/news/']")
+    """
+    compounds = selector.split()
+    for position, compound in enumerate(reversed(compounds)):
+        opening, closing = _open_tag(compound, href_slug if position == 0 else None, path_prefix)
+        inner = f"{opening}{inner}{closing}"
+    return inner
+
+def _page(title: str, body: str) -> str:
+    return (
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title>"
+        "<script>window.dataLayer = window.dataLayer || [];</script></head><body>"
+        "<header><nav><a href=\"/\">Home</a> <a href=\"/world\">World</a> "
+        "<a href=\"/sport\">Sport</a> <a href=\"/weather\">Weather</a></nav></header>"
+        f"<main>{body}</main>"
+        "<footer><p>&copy; Example News. All rights reserved.</p></footer></body></html>"
+    )
+
+def article_path(website_config: Dict, article: Dict, path_prefix: str = '') -> str:
+    """
+    Get the path of an article on the hub page of a source
+
+    Args:
+        website_config (Dict): Source configuration
+        article (Dict): Article from generate_articles()
+        path_prefix (str): Path prepended to article links
+
+    Returns:
+        str: Link href as it appears on the hub page
+    """
+    opening, _ = _open_tag(website_config['article_selector'].split()[-1], article['slug'], path_prefix)
+    return html.unescape(re.search(r'href="([^"]*)"', opening).group(1))
+
+def hub_page_html(website_config: Dict, articles: List[Dict], noise_links: int = 8,
+                  path_prefix: str = '') -> str:
+    """
+    Render a hub page whose links match the source's article selector
+
+    Args:
+        website_config (Dict): Source configuration
+        articles (List[Dict]): Articles to link to
+        noise_links (int): Non-crime links mixed in (still matching the selector)
+        path_prefix (str): Path prepended to article links
+
+    Returns:
+        str: HTML of the hub page
+    """
+    selector = website_config['article_selector']
+    items = [
+        _wrap(selector, html.escape(article['headline']), article['slug'], path_prefix)
+        for article in articles
+    ]
+    for index in range(noise_links):
+        headline = _NOISE_HEADLINES[index % len(_NOISE_HEADLINES)]
+        items.insert((index * 3) % (len(items) + 1), _wrap(selector, html.escape(headline), f"{_slugify(headline)}-{index}", path_prefix))
+
+    body = "<section class=\"latest\">" + "".join(f"<article>{item}</article>" for item in items) + "</section>"
+    return _page(website_config['name'], body)
+
+def article_page_html(website_config: Dict, article: Dict) -> str:
+    """
+    Render an article page matching the source's headline and content selectors
+
+    Args:
+        website_config (Dict): Source configuration
+        article (Dict): Article from generate_articles()
+
+    Returns:
+        str: HTML of the article page
+    """
+    content_selector = website_config.get('content_selector', 'p')
+    compounds = content_selector.split()
+    paragraphs = [sentence.strip() for sentence in re.split(r'(?<=\.)\s+', article['content']) if sentence.strip()]
+
+    # Each paragraph is a leaf element; the ancestors wrap all of them once
+    leaves = "".join(_wrap(compounds[-1], html.escape(paragraph)) for paragraph in paragraphs)
+    body_html = _wrap(' '.join(compounds[:-1]), leaves) if len(compounds) > 1 else leaves
+
+    headline = _wrap(website_config.get('headline_selector', 'h1'), html.escape(article['headline']))
+    published = article['published'].strftime('%B %d, %Y')
+    body = (
+        f"<article>{headline}<div class=\"byline\">By Staff Reporter | {published}</div>"
+        f"{body_html}<aside><h4>Related</h4><ul><li>More from {html.escape(website_config['name'])}</li></ul></aside>"
+        "</article>"
+    )
+    return _page(article['headline'], body)
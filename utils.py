@@ -7,46 +7,30 @@ import logging
 import os
 import time
 import re
-import hashlib
 import json
 from datetime import datetime
-from typing import List, Dict, Optional
-from fake_useragent import UserAgent
-import pandas as pd
-from config import LOG_FILE_PATH, CSV_FILE_PATH, CSV_COLUMNS
+from typing import List, Dict, Optional, Pattern, Tuple
+from config import (
+    CSV_FILE_PATH, CSV_COLUMNS, CRIME_KEYWORDS, CRIME_KEYWORD_WEIGHTS, CRIME_KEYWORD_DEFAULT_WEIGHT
+)
+from log_setup import configure_logging
+from fact_extractor import get_fact_extractor, fact_value
+from csv_writer import CSVBatchWriter
 
 def setup_logging() -> logging.Logger:
     """
     Set up logging configuration for the scraper
+
+    Logging is configured on the first call in a process (see log_setup);
+    later calls return the same logger.
     
     Returns:
         logging.Logger: Configured logger instance
     """
-    # Create logger
-    logger = logging.getLogger('crime_scraper')
-    logger.setLevel(logging.INFO)
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    
-    # File handler
-    file_handler = logging.FileHandler(LOG_FILE_PATH)
-    file_handler.setLevel(logging.INFO)
-    file_handler.setFormatter(formatter)
-    
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    
-    # Add handlers to logger
-    if not logger.handlers:
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
-    
-    return logger
+    return configure_logging()
+
+# Shared fake_useragent instance, created on first use
+_user_agent = None
 
 def get_random_user_agent() -> str:
     """
@@ -55,9 +39,13 @@ def get_random_user_agent() -> str:
     Returns:
         str: Random user agent string
     """
+    global _user_agent
     try:
-        ua = UserAgent()
-        return ua.random
+        if _user_agent is None:
+            # Deferred: loading the user agent dataset is slow
+            from fake_useragent import UserAgent
+            _user_agent = UserAgent()
+        return _user_agent.random
     except Exception:
         # Fallback user agent if fake-useragent fails
         return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
@@ -96,19 +84,8 @@ def extract_date_from_text(text: str) -> Optional[str]:
     Returns:
         Optional[str]: Extracted date string or None
     """
-    date_patterns = [
-        r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b',  # MM/DD/YYYY or MM-DD-YYYY
-        r'\b(\d{4}[/-]\d{1,2}[/-]\d{1,2})\b',    # YYYY/MM/DD or YYYY-MM-DD
-        r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',  # Month DD, YYYY
-        r'\b\d{1,2}\s+(January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b'   # DD Month YYYY
-    ]
-    
-    for pattern in date_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(0)
-    
-    return None
+    facts = get_fact_extractor().scan(text, ['publication_date'])
+    return fact_value(facts, 'publication_date')
 
 def extract_numbers_from_text(text: str) -> List[int]:
     """
@@ -133,26 +110,14 @@ def extract_money_from_text(text: str) -> Optional[str]:
     Returns:
         Optional[str]: Extracted monetary amount or None
     """
-    money_patterns = [
-        r'\$[\d,]+(?:\.\d{2})?',  # $1,000.00
-        r'\b\d+\s*(?:dollars?|bucks?)\b',  # 100 dollars
-        r'\b(?:USD|usd)\s*\d+\b'  # USD 100
-    ]
-    
-    for pattern in money_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            return match.group(0)
-    
-    return None
+    facts = get_fact_extractor().scan(text, ['economic_loss'])
+    return fact_value(facts, 'economic_loss')
 
 def ensure_csv_exists():
     """
     Ensure the CSV file exists with proper headers
     """
-    if not os.path.exists(CSV_FILE_PATH):
-        df = pd.DataFrame(columns=CSV_COLUMNS)
-        df.to_csv(CSV_FILE_PATH, index=False)
+    CSVBatchWriter(CSV_FILE_PATH).ensure_header()
 
 def append_to_csv(data: Dict) -> bool:
     """
@@ -165,13 +130,10 @@ def append_to_csv(data: Dict) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        ensure_csv_exists()
-        
-        # Create DataFrame from the data
-        df = pd.DataFrame([data])
-        
-        # Append to CSV
-        df.to_csv(CSV_FILE_PATH, mode='a', header=False, index=False)
+        # Write the row in CSV_COLUMNS order and fsync it
+        writer = CSVBatchWriter(CSV_FILE_PATH)
+        writer.write(data)
+        writer.commit()
         
         return True
     except Exception as e:
@@ -179,22 +141,27 @@ def append_to_csv(data: Dict) -> bool:
         logger.error(f"Error appending to CSV: {str(e)}")
         return False
 
-def url_is_duplicate(url: str) -> bool:
+def url_is_duplicate(url: str, prefilter_threshold: Optional[float] = None) -> bool:
     """
-    Check if URL already exists in the CSV file
+    Check if URL already exists in the configured article store, or was
+    recently skipped by the crime pre-filter
     
     Args:
         url (str): URL to check
+        prefilter_threshold (float, optional): Threshold of the pre-filter in
+            use; skipped URLs only count below it (None = no pre-filter)
         
     Returns:
         bool: True if duplicate, False otherwise
     """
     try:
-        if not os.path.exists(CSV_FILE_PATH):
-            return False
-        
-        df = pd.read_csv(CSV_FILE_PATH)
-        return url in df['article_url'].values
+        from storage import get_article_store
+        if get_article_store().url_exists(url):
+            return True
+        if prefilter_threshold is not None:
+            from crime_prefilter import get_prefilter_skip_log
+            return get_prefilter_skip_log().is_skipped(url, prefilter_threshold)
+        return False
     except Exception:
         return False
 
@@ -221,6 +188,44 @@ def is_crime_related(text: str, keywords: List[str]) -> bool:
     text_lower = text.lower()
     return any(keyword.lower() in text_lower for keyword in keywords)
 
+# (pattern, weight) per crime keyword, compiled on first use
+_keyword_weight_patterns = None
+
+def crime_keyword_patterns() -> List[Tuple[Pattern, float]]:
+    """
+    Get the weighted crime keywords as compiled patterns
+    
+    Every CRIME_KEYWORDS entry gets its CRIME_KEYWORD_WEIGHTS weight (or
+    CRIME_KEYWORD_DEFAULT_WEIGHT). Patterns match lowercased text at word
+    starts, so "arrest" matches "arrested" but "gun" does not match "begun".
+    
+    Returns:
+        List[Tuple[Pattern, float]]: Compiled pattern and weight per keyword
+    """
+    global _keyword_weight_patterns
+    if _keyword_weight_patterns is None:
+        weights = {keyword.lower(): CRIME_KEYWORD_DEFAULT_WEIGHT for keyword in CRIME_KEYWORDS}
+        weights.update({keyword.lower(): weight for keyword, weight in CRIME_KEYWORD_WEIGHTS.items()})
+        _keyword_weight_patterns = [
+            (re.compile(r'\b' + re.escape(keyword)), weight) for keyword, weight in weights.items()
+        ]
+    return _keyword_weight_patterns
+
+def get_memory_usage_mb() -> Optional[float]:
+    """
+    Get the current resident memory of this process
+    
+    Returns:
+        Optional[float]: Resident set size in MB, or None where the current
+        RSS is not available (only Linux /proc is supported)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            rss_pages = int(f.read().split()[1])
+        return rss_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError, IndexError):
+        return None
+
 def get_current_timestamp() -> str:
     """
     Get current timestamp as string
@@ -242,25 +247,14 @@ def generate_content_hash(title: str, content: str, source: Optional[str] = None
     Returns:
         str: SHA-256 hash of the normalized content
     """
-    # Normalize content for comparison
-    normalized_title = clean_text(title).lower().strip()
-    normalized_content = clean_text(content).lower().strip()
-    
-    # Create content string for hashing
-    if source:
-        # Include source for exact duplicate detection (same source + same content)
-        content_string = f"{source}||{normalized_title}||{normalized_content}"
-    else:
-        # Content-only hash for cross-source duplicate detection
-        content_string = f"{normalized_title}||{normalized_content}"
-    
-    # Generate SHA-256 hash
-    return hashlib.sha256(content_string.encode('utf-8')).hexdigest()
+    from article_text import ArticleText
+    return ArticleText.from_record(title, content).content_hash(source)
 
 def generate_similarity_hash(title: str, content: str) -> str:
     """
     Generate a similarity hash for detecting similar articles across sources
-    Uses key content indicators for loose matching
+    Uses key content indicators for loose matching. Only used for legacy rows;
+    new articles get near-duplicate group ids from near_duplicates.py
     
     Args:
         title (str): Article title
@@ -269,51 +263,45 @@ def generate_similarity_hash(title: str, content: str) -> str:
     Returns:
         str: Hash for similarity detection
     """
-    # Extract key phrases and normalize
-    title_words = set(clean_text(title).lower().split())
-    content_words = set(clean_text(content).lower().split())
-    
-    # Focus on crime-related keywords and entities
-    crime_keywords = {
-        'murder', 'robbery', 'assault', 'theft', 'burglary', 'shooting', 
-        'stabbing', 'arrest', 'police', 'victim', 'suspect', 'charged',
-        'court', 'jail', 'prison', 'crime', 'criminal', 'felony'
-    }
-    
-    # Extract crime-related words from title and content
-    crime_words_title = title_words.intersection(crime_keywords)
-    crime_words_content = content_words.intersection(crime_keywords)
-    
-    # Create similarity signature
-    signature_parts = sorted(list(crime_words_title.union(crime_words_content)))
-    signature = '||'.join(signature_parts[:10])  # Use top 10 crime-related words
-    
-    return hashlib.md5(signature.encode('utf-8')).hexdigest()
+    from article_text import ArticleText
+    return ArticleText.from_record(title, content).similarity_hash
 
 def check_duplicate_article(article_data: Dict, existing_hashes: set, 
                           similarity_hashes: set, source: str) -> Dict:
     """
     Check if an article is a duplicate and determine the type of duplicate
     
+    Exact duplicates are found by content hash. Near-duplicates across
+    sources are found with the MinHash LSH index (NEAR_DUP_THRESHOLD) and
+    share the matched article's group id as their similarity hash.
+    
     Args:
         article_data (Dict): Article data with title, content, etc.
         existing_hashes (set): Set of existing exact content hashes
-        similarity_hashes (set): Set of existing similarity hashes
+        similarity_hashes (set): Set of existing similarity hashes (group
+            ids); an exact group id match counts as a near-duplicate
         source (str): Source website name
     
     Returns:
-        Dict: Duplicate detection results
+        Dict: Duplicate detection results, including the article's MinHash
+            'signature' for indexing once it is saved
     """
+    from near_duplicates import get_near_duplicate_index
+    from article_text import ArticleText
+    
     title = article_data.get('headline', '')
     content = article_data.get('full_text', article_data.get('content', ''))
     
     if not title or not content:
         return {'is_duplicate': False, 'duplicate_type': None}
     
-    # Generate hashes
-    exact_hash = generate_content_hash(title, content, source)
-    content_only_hash = generate_content_hash(title, content)
-    similarity_hash = generate_similarity_hash(title, content)
+    # Reuse the hashes of the article's text record when it was processed in this run
+    text = article_data.get('article_text')
+    if text is None:
+        text = ArticleText.from_record(title, content)
+    
+    exact_hash = text.content_hash(source)
+    content_only_hash = text.content_hash()
     
     # Check for exact duplicate (same source + same content)
     if exact_hash in existing_hashes:
@@ -324,13 +312,24 @@ def check_duplicate_article(article_data: Dict, existing_hashes: set,
             'reason': f'Exact duplicate from same source: {source}'
         }
     
-    # Check for content similarity across sources
-    if similarity_hash in similarity_hashes:
+    # Check for near-duplicate content across sources
+    index = get_near_duplicate_index()
+    signature = text.signature(index.hasher)
+    similarity_hash = index.group_id_for(signature)
+    match = index.query(signature)
+    
+    if match is None and similarity_hash in similarity_hashes:
+        match = {'group_id': similarity_hash, 'similarity': 1.0}
+    
+    if match:
         return {
             'is_duplicate': True,
             'duplicate_type': 'similar_cross_source',
-            'hash': similarity_hash,
-            'reason': f'Similar content detected across sources (keeping both)',
+            'hash': match['group_id'],
+            'exact_hash': exact_hash,
+            'similarity': match['similarity'],
+            'signature': signature,
+            'reason': f"Similar content detected across sources (Jaccard ~{match['similarity']:.2f}, keeping both)",
             'allow_duplicate': True  # Allow similar content from different sources
         }
     
@@ -339,7 +338,8 @@ def check_duplicate_article(article_data: Dict, existing_hashes: set,
         'duplicate_type': None,
         'exact_hash': exact_hash,
         'content_hash': content_only_hash,
-        'similarity_hash': similarity_hash
+        'similarity_hash': similarity_hash,
+        'signature': signature
     }
 
 def load_existing_hashes(csv_file_path: str) -> tuple:
@@ -358,17 +358,26 @@ def load_existing_hashes(csv_file_path: str) -> tuple:
     try:
         import pandas as pd
         if os.path.exists(csv_file_path):
-            df = pd.read_csv(csv_file_path)
+            columns = pd.read_csv(csv_file_path, nrows=0).columns
             
-            # Extract hashes if they exist in the CSV
-            if 'content_hash' in df.columns:
-                exact_hashes = set(df['content_hash'].dropna().values)
+            # Extract hashes if they exist in the CSV (reading only the hash columns)
+            hash_columns = [column for column in ('content_hash', 'similarity_hash') if column in columns]
+            if hash_columns:
+                df = pd.read_csv(csv_file_path, usecols=hash_columns, dtype=str)
+                if 'content_hash' in df.columns:
+                    exact_hashes = set(df['content_hash'].dropna().values)
+                if 'similarity_hash' in df.columns:
+                    similarity_hashes = set(df['similarity_hash'].dropna().values)
             
-            if 'similarity_hash' in df.columns:
-                similarity_hashes = set(df['similarity_hash'].dropna().values)
-            
-            # If no hash columns exist, generate them from existing data
-            if not exact_hashes and 'headline' in df.columns and 'full_text' in df.columns:
+            # If no hash columns exist, generate them from existing data.
+            # `python migrate_hashes.py` backfills them once instead.
+            if not exact_hashes and 'headline' in columns and 'full_text' in columns:
+                df = pd.read_csv(csv_file_path, usecols=['headline', 'full_text'])
+                if len(df):
+                    setup_logging().warning(
+                        f"{csv_file_path} has no content hashes; run `python migrate_hashes.py` "
+                        "to stop rehashing it on every load"
+                    )
                 for _, row in df.iterrows():
                     if pd.notna(row['headline']) and pd.notna(row['full_text']):
                         source = row.get('source', '') if 'source' in row else ''
@@ -384,31 +393,49 @@ def load_existing_hashes(csv_file_path: str) -> tuple:
 
 def append_to_csv_with_dedup(article_data: Dict, csv_file_path: Optional[str] = None) -> Dict:
     """
-    Append article to CSV with duplicate detection
+    Append article to the article store with duplicate detection
     
     Args:
         article_data (Dict): Article data to append
-        csv_file_path (str, optional): Path to CSV file
+        csv_file_path (str, optional): Path to a CSV file to use instead of
+            the configured store
     
     Returns:
         Dict: Result with success status and duplicate information
     """
-    from config import CSV_FILE_PATH
+    from storage import get_article_store
+    from metrics import get_run_metrics
+    from stats_rollup import source_for_url
     
     if csv_file_path is None:
-        csv_file_path = CSV_FILE_PATH
-    
-    # Load existing hashes
-    existing_hashes, similarity_hashes = load_existing_hashes(csv_file_path)
+        store = get_article_store()
+    else:
+        store = get_article_store('csv', csv_file_path)
     
-    # Check for duplicates
+    metrics = get_run_metrics()
     source = article_data.get('source', '')
-    duplicate_result = check_duplicate_article(
-        article_data, existing_hashes, similarity_hashes, source
-    )
+    # Processed articles carry no source name; label metrics by the URL's source
+    label = source or source_for_url(article_data.get('article_url'))
+    
+    with metrics.stage('dedup', label):
+        # Opened before anything is written, so their first-use backfill
+        # never sees uncommitted rows of the current batch
+        from near_duplicates import get_near_duplicate_index
+        from story_clusters import get_story_cluster_index
+        near_duplicate_index = get_near_duplicate_index()
+        story_cluster_index = get_story_cluster_index()
+        
+        # Load existing hashes
+        existing_hashes, similarity_hashes = store.hash_sets()
+        
+        # Check for duplicates
+        duplicate_result = check_duplicate_article(
+            article_data, existing_hashes, similarity_hashes, source
+        )
     
     # If it's an exact duplicate from the same source, skip it
     if duplicate_result['is_duplicate'] and duplicate_result['duplicate_type'] == 'exact_same_source':
+        metrics.increment('duplicates_skipped', label)
         return {
             'success': False,
             'skipped': True,
@@ -421,16 +448,36 @@ def append_to_csv_with_dedup(article_data: Dict, csv_file_path: Optional[str] =
         article_data['content_hash'] = duplicate_result.get('exact_hash', '')
         article_data['similarity_hash'] = duplicate_result.get('similarity_hash', '')
     else:
-        # Similar content from different source - add hash and note
-        article_data['content_hash'] = duplicate_result.get('hash', duplicate_result.get('exact_hash', ''))
-        article_data['similarity_hash'] = duplicate_result.get('hash', duplicate_result.get('similarity_hash', ''))
+        # Similar content from different source - join its group and add a note
+        article_data['content_hash'] = duplicate_result.get('exact_hash', '')
+        article_data['similarity_hash'] = duplicate_result.get('hash', '')
         article_data['duplicate_note'] = duplicate_result.get('reason', '')
     
-    # Append to CSV
-    success = append_to_csv(article_data)
+    # Append to the store
+    try:
+        with metrics.stage('write', label):
+            success = store.append(article_data)
+    except Exception as e:
+        logger = setup_logging()
+        logger.error(f"Error appending article: {str(e)}")
+        success = False
+    
+    # Index the saved article for near-duplicate lookups and story clustering
+    event_id = None
+    if success and duplicate_result.get('signature') is not None:
+        with metrics.stage('index', label):
+            # Inside a store batch, the index entries are committed with it
+            store.enlist(near_duplicate_index)
+            store.enlist(story_cluster_index)
+            near_duplicate_index.add(
+                article_data['content_hash'], duplicate_result['signature'], article_data['similarity_hash']
+            )
+            event_id = story_cluster_index.add(article_data, duplicate_result['signature'])
+    metrics.increment('articles_saved' if success else 'save_failures', label)
     
     return {
         'success': success,
         'skipped': False,
-        'duplicate_info': duplicate_result if duplicate_result['is_duplicate'] else None
+        'duplicate_info': duplicate_result if duplicate_result['is_duplicate'] else None,
+        'event_id': event_id
     }